@@ -2,71 +2,199 @@
 """
 Simple LLM Fallback Action - Just routes to configured system
 """
-from typing import Any, Text, Dict, List
+import asyncio
+import logging
+import threading
+from typing import Any, AsyncIterator, Text, Dict, List, Tuple
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
-from rasa_sdk.events import SlotSet
+from rasa_sdk.events import SlotSet, UserUtteranceReverted, UserUttered, FollowupAction
 
 # Import config
-from .fallback_config import ACTIVE_FALLBACK, FALLBACK_ENABLED
+from .fallback_config import (
+    ACTIVE_FALLBACK, FALLBACK_ENABLED, SEMANTIC_CACHE_ENABLED, FALLBACK_TIMEOUT_SECONDS,
+    STREAMING_ENABLED, STREAM_CHANNEL_NAME, FALLBACK_COALESCING_ENABLED, LLM_SHED_MARGIN_SECONDS,
+    INTENT_RESCUE_ENABLED, KB_RELOAD_ENABLED
+)
+from .async_utils import run_blocking, FallbackText
+from .metrics import current_engine, stage_timer, count_error, timed_action
+from .single_flight import get_fallback_flights, flight_key
+from .rate_limiter import LoadShedError, set_llm_deadline
+from .kb_reloader import get_kb_watcher
+from .stream_endpoint import register_stream_endpoint
+
+logger = logging.getLogger(__name__)
+
+if STREAMING_ENABLED:
+    # Streamed answers are generated here too; streaming_channel relays them
+    register_stream_endpoint()
 
 # Global variables for lazy loading (avoid startup delay)
 _llm_only_system = None
 _static_rag_system = None
 _dynamic_rag_system = None
 _dynamic_llm_system = None
+# Loaders may run on worker threads; make sure each system is built once
+_loader_lock = threading.Lock()
 
 def get_llm_only():
-    """Lazy load LLM-only system"""
+    """Lazy load LLM-only system (returns the awaitable allm_only_fallback)"""
     global _llm_only_system
-    if _llm_only_system is None:
-        print("🔄 Loading LLM-only system...")
-        from .llm_only_fallback import llm_only_fallback
-        _llm_only_system = llm_only_fallback
-        print("✅ LLM-only ready")
+    with _loader_lock:
+        if _llm_only_system is None:
+            print("🔄 Loading LLM-only system...")
+            from .llm_only_fallback import allm_only_fallback
+            _llm_only_system = allm_only_fallback
+            print("✅ LLM-only ready")
     return _llm_only_system
 
 def get_static_rag():
     """Lazy load Static RAG"""
     global _static_rag_system
-    if _static_rag_system is None:
-        print("🔄 Loading Static RAG system...")
-        from .llm_fallback import BillMartRAGFallback
-        _static_rag_system = BillMartRAGFallback()
-        print("✅ Static RAG ready")
+    with _loader_lock:
+        if _static_rag_system is None:
+            print("🔄 Loading Static RAG system...")
+            from .llm_fallback import BillMartRAGFallback
+            # Watcher first, so KB edits made while loading aren't missed
+            watcher = get_kb_watcher() if KB_RELOAD_ENABLED else None
+            _static_rag_system = BillMartRAGFallback()
+            if watcher:
+                watcher.watch('static_rag', _static_rag_system)
+            print("✅ Static RAG ready")
     return _static_rag_system
 
 def get_dynamic_rag():
     """Lazy load Dynamic RAG"""
     global _dynamic_rag_system
-    if _dynamic_rag_system is None:
-        print("🔄 Loading Dynamic RAG system...")
-        from .dynamic_rag_fallback import DynamicRAGSystem
-        _dynamic_rag_system = DynamicRAGSystem()
-        print("✅ Dynamic RAG ready")
+    with _loader_lock:
+        if _dynamic_rag_system is None:
+            print("🔄 Loading Dynamic RAG system...")
+            from .dynamic_rag_fallback import DynamicRAGSystem
+            watcher = get_kb_watcher() if KB_RELOAD_ENABLED else None
+            _dynamic_rag_system = DynamicRAGSystem()
+            if watcher:
+                watcher.watch('dynamic_rag', _dynamic_rag_system)
+            print("✅ Dynamic RAG ready")
     return _dynamic_rag_system
 
 def get_dynamic_llm():
     """Lazy load Dynamic LLM"""
     global _dynamic_llm_system
-    if _dynamic_llm_system is None:
-        print("🔄 Loading Dynamic LLM system...")
-        from .dynamic_llm_fallback import DynamicLLMSystem
-        _dynamic_llm_system = DynamicLLMSystem()
-        print("✅ Dynamic LLM ready")
+    with _loader_lock:
+        if _dynamic_llm_system is None:
+            print("🔄 Loading Dynamic LLM system...")
+            from .dynamic_llm_fallback import DynamicLLMSystem
+            _dynamic_llm_system = DynamicLLMSystem()
+            print("✅ Dynamic LLM ready")
     return _dynamic_llm_system
 
 
+def format_sources(sources) -> Text:
+    """Sources footer for dynamic RAG answers"""
+    sources_text = "\n\n📚 **Sources:**\n"
+    for src in sources[:3]:  # Top 3 sources
+        sources_text += f"• {src.get('title', 'Source')}\n"
+    return sources_text
+
+def format_regulatory_sources(sources) -> Text:
+    """Sources footer for dynamic LLM answers"""
+    sources_text = "\n\n📚 **Regulatory Sources:**\n"
+    for src in sources[:3]:
+        regulator = src.get('regulator', 'N/A')
+        title = src.get('title', 'Source')
+        sources_text += f"• {title} ({regulator})\n"
+    return sources_text
+
+async def astream_fallback(query: Text, mode: Text = ACTIVE_FALLBACK) -> AsyncIterator[Text]:
+    """
+    Yield the fallback answer for ``mode`` as text chunks, sources footer last.
+    Served to streaming_channel by stream_endpoint, so the widget gets tokens
+    as they arrive. Identical concurrent queries share one stream.
+    """
+    current_engine.set(mode)
+    set_llm_deadline(FALLBACK_TIMEOUT_SECONDS - LLM_SHED_MARGIN_SECONDS)
+    if FALLBACK_COALESCING_ENABLED:
+        chunks = get_fallback_flights().stream(flight_key(mode, query), lambda: _astream_fallback(query, mode))
+    else:
+        chunks = _astream_fallback(query, mode)
+    async for chunk in chunks:
+        yield chunk
+
+
+def _warm_cache(query: Text, mode: Text, messages: List[Text]):
+    """Cache a streamed answer, or one the asker didn't get (an LLM stream that missed its deadline), for the next asker"""
+    if not SEMANTIC_CACHE_ENABLED:
+        return
+    from .embedding_service import get_embedder
+    from .semantic_cache import get_response_cache
+    # The action's cache lookup embedded this query moments ago, so this is an embedder cache hit
+    get_response_cache().store(mode, query, get_embedder().encode(query), messages)
+
+
+async def _astream_fallback(query: Text, mode: Text) -> AsyncIterator[Text]:
+    """Chunks of the answer; once it has fully streamed from the LLM it is cached like a non-streamed one"""
+    parts, cacheable = [], True
+    async for chunk in _astream_engine(query, mode):
+        cacheable = cacheable and not isinstance(chunk, FallbackText)
+        if chunk:
+            parts.append(chunk)
+            yield chunk
+    if cacheable and parts:
+        try:
+            await run_blocking(_warm_cache, query, mode, ["".join(parts)])
+        except Exception as e:
+            count_error('semantic_cache', e)
+            logger.warning(f"❌ Streamed answer not cached: {e}")
+
+
+async def _astream_engine(query: Text, mode: Text) -> AsyncIterator[Text]:
+    if mode == 'llm_only':
+        from .llm_only_fallback import astream_llm_only_fallback
+        await run_blocking(get_llm_only)
+        async for chunk in astream_llm_only_fallback(query):
+            yield chunk
+    
+    elif mode == 'static_rag':
+        rag = await run_blocking(get_static_rag)
+        async for chunk in rag.astream_fallback_response(query, on_late_answer=lambda late: _warm_cache(query, mode, [late['answer']])):
+            yield chunk
+    
+    elif mode == 'dynamic_rag':
+        rag = await run_blocking(get_dynamic_rag)
+        sources, chunks = await rag.astream_response_with_citations(query)
+        async for chunk in chunks:
+            yield chunk
+        if sources:
+            yield format_sources(sources)
+    
+    elif mode == 'dynamic_llm':
+        llm = await run_blocking(get_dynamic_llm)
+        sources, chunks = llm.astream_response_with_live_sources(query)
+        async for chunk in chunks:
+            yield chunk
+        if sources:
+            yield format_regulatory_sources(sources)
+
+
 class ActionLLMFallback(Action):
     """
     Main fallback action - automatically triggered by Rasa when confidence is low
     Routes to system configured in fallback_config.py
     """
     
+    # ACTIVE_FALLBACK value -> handler method
+    HANDLERS = {
+        'llm_only': '_handle_llm_only',
+        'static_rag': '_handle_static_rag',
+        'dynamic_rag': '_handle_dynamic_rag',
+        'dynamic_llm': '_handle_dynamic_llm',
+    }
+    
     def name(self) -> Text:
         return "action_llm_fallback"
     
-    def run(
+    @timed_action
+    async def run(
         self,
         dispatcher: CollectingDispatcher,
         tracker: Tracker,
@@ -78,12 +206,11 @@ class ActionLLMFallback(Action):
         intent = tracker.latest_message.get('intent', {}).get('name', 'unknown')
         confidence = tracker.latest_message.get('intent', {}).get('confidence', 0.0)
         
-        print(f"\n{'='*60}")
-        print(f"🤖 LLM FALLBACK TRIGGERED")
-        print(f"Query: {user_message}")
-        print(f"Intent: {intent} (confidence: {confidence:.2f})")
-        print(f"Active System: {ACTIVE_FALLBACK}")
-        print(f"{'='*60}\n")
+        logger.debug(f"🤖 LLM fallback triggered: {user_message!r} "
+                     f"(intent {intent}, confidence {confidence:.2f}, system {ACTIVE_FALLBACK})")
+        current_engine.set(ACTIVE_FALLBACK)
+        # LLM calls that can't finish inside the turn are shed to an extractive answer
+        set_llm_deadline(FALLBACK_TIMEOUT_SECONDS - LLM_SHED_MARGIN_SECONDS)
         
         # Check if fallback is enabled
         if not FALLBACK_ENABLED:
@@ -92,29 +219,50 @@ class ActionLLMFallback(Action):
             )
             return []
         
+        # A close paraphrase of a known intent gets that intent's answer, no LLM call.
+        # Part of the fallback: off with it, and with ACTIVE_FALLBACK = 'none'
+        if INTENT_RESCUE_ENABLED and user_message and ACTIVE_FALLBACK in self.HANDLERS:
+            rescued = await self._rescue_intent(tracker, user_message, confidence)
+            if rescued is not None:
+                return rescued
+        
         # Route to configured system
         try:
-            if ACTIVE_FALLBACK == 'llm_only':
-                self._handle_llm_only(dispatcher, user_message)
-                
-            elif ACTIVE_FALLBACK == 'static_rag':
-                self._handle_static_rag(dispatcher, user_message)
-                
-            elif ACTIVE_FALLBACK == 'dynamic_rag':
-                self._handle_dynamic_rag(dispatcher, user_message)
-                
-            elif ACTIVE_FALLBACK == 'dynamic_llm':
-                self._handle_dynamic_llm(dispatcher, user_message)
-                
-            else:  # 'none' or invalid
+            if ACTIVE_FALLBACK not in self.HANDLERS:  # 'none' or invalid
                 dispatcher.utter_message(
                     text="I'm not sure about that. Could you rephrase or ask something else about BillMart?"
                 )
+            elif self._should_stream(tracker):
+                # Cached answers are sent here; otherwise the streaming channel
+                # fetches the answer from this server's stream endpoint
+                cached, _ = await self._lookup_cache(user_message)
+                if cached is not None:
+                    for text in cached:
+                        dispatcher.utter_message(text=text)
+                else:
+                    dispatcher.utter_message(json_message={
+                        "stream_fallback": {"query": user_message, "mode": ACTIVE_FALLBACK}
+                    })
+            else:
+                # Cancels the whole turn (retrieval, retries, LLM) if it overruns
+                messages = await asyncio.wait_for(self._answer(user_message), timeout=FALLBACK_TIMEOUT_SECONDS)
+                for text in messages:
+                    dispatcher.utter_message(text=text)
         
+        except LoadShedError as e:
+            # Only llm_only gets here; the other engines shed to an extractive answer themselves
+            logger.warning(f"⏳ Fallback shed: {e}")
+            from .llm_only_fallback import BUSY_MESSAGE
+            dispatcher.utter_message(text=BUSY_MESSAGE)
+        except asyncio.TimeoutError:
+            count_error('fallback', 'timeout')
+            logger.error(f"❌ Fallback timed out after {FALLBACK_TIMEOUT_SECONDS}s")
+            dispatcher.utter_message(
+                text="I apologize, I'm experiencing technical difficulties. Please try rephrasing your question or contact BillMart support."
+            )
         except Exception as e:
-            print(f"❌ Fallback error: {e}")
-            import traceback
-            traceback.print_exc()
+            count_error('fallback', e)
+            logger.exception(f"❌ Fallback error: {e}")
             dispatcher.utter_message(
                 text="I apologize, I'm experiencing technical difficulties. Please try rephrasing your question or contact BillMart support."
             )
@@ -124,46 +272,125 @@ class ActionLLMFallback(Action):
             SlotSet("last_confidence", confidence)
         ]
     
-    def _handle_llm_only(self, dispatcher, query):
+    async def _rescue_intent(self, tracker: Tracker, query: Text, confidence: float):
+        """Events replaying the turn as the nearest known intent and running its action, or None"""
+        try:
+            from .intent_rescue import get_intent_rescuer
+            rescuer = await run_blocking(get_intent_rescuer)
+            match = await run_blocking(rescuer.rescue, query)
+        except Exception as e:
+            count_error('intent_rescue', e)
+            logger.warning(f"❌ Intent rescue unavailable: {e}")
+            return None
+        if match is None:
+            return None
+        
+        intent, action, similarity = match
+        logger.debug(f"🎯 Intent rescue: {query!r} -> {intent} ({similarity:.2f}), running {action}")
+        parse_data = {
+            'text': query,
+            'intent': {'name': intent, 'confidence': similarity},
+            'intent_ranking': [{'name': intent, 'confidence': similarity}],
+            'entities': tracker.latest_message.get('entities', []),
+        }
+        # As in Rasa's two-stage fallback: swap the user turn for one with the rescued intent
+        return [
+            UserUtteranceReverted(),
+            UserUttered(query, parse_data, input_channel=tracker.get_latest_input_channel()),
+            SlotSet("last_fallback_mode", "intent_rescue"),
+            SlotSet("last_confidence", confidence),
+            FollowupAction(action)
+        ]
+    
+    def _should_stream(self, tracker: Tracker) -> bool:
+        return STREAMING_ENABLED and tracker.get_latest_input_channel() == STREAM_CHANNEL_NAME
+    
+    async def _lookup_cache(self, query: Text):
+        """(cached messages or None, query vector or None)"""
+        if not SEMANTIC_CACHE_ENABLED:
+            return None, None
+        
+        from .embedding_service import get_embedder
+        from .semantic_cache import get_response_cache
+        embedder = await run_blocking(get_embedder)
+        with stage_timer('embed'):
+            query_vector = (await embedder.aencode([query]))[0]
+        
+        cache = get_response_cache()
+        cached = cache.lookup(ACTIVE_FALLBACK, query, query_vector)
+        if cached is not None:
+            logger.debug(f"⚡ Semantic cache hit ({cache.stats()['hit_rate']:.0%} hit rate)")
+        return cached, query_vector
+    
+    async def _answer(self, query: Text) -> List[Text]:
+        """Messages for the query, served from the semantic cache when possible"""
+        cached, query_vector = await self._lookup_cache(query)
+        if cached is not None:
+            return cached
+        
+        if not FALLBACK_COALESCING_ENABLED:
+            return await self._compute(query, query_vector)
+        # Identical queries already being answered wait for that answer instead of starting their own
+        messages = await get_fallback_flights().run(
+            flight_key(ACTIVE_FALLBACK, query), lambda: self._compute(query, query_vector)
+        )
+        return list(messages)
+    
+    async def _compute(self, query: Text, query_vector) -> List[Text]:
+        """Run the active engine and cache a good answer"""
+        handler = getattr(self, self.HANDLERS[ACTIVE_FALLBACK])
+        messages, cacheable = await handler(query, query_vector)
+        if cacheable:
+            self._store(query, query_vector, messages)
+        return messages
+    
+    @staticmethod
+    def _store(query: Text, query_vector, messages: List[Text]):
+        if query_vector is None:
+            return
+        from .semantic_cache import get_response_cache
+        with stage_timer('post_process'):
+            get_response_cache().store(ACTIVE_FALLBACK, query, query_vector, messages)
+    
+    # Handlers return (messages, cacheable); failed or degraded answers are not cached.
+    # Engines are loaded on the worker pool so a cold start doesn't stall the event loop.
+    async def _handle_llm_only(self, query, query_vector=None) -> Tuple[List[Text], bool]:
         """Handle LLM-only fallback"""
-        llm_func = get_llm_only()
-        answer = llm_func(query)
-        dispatcher.utter_message(text=answer)
+        llm_func = await run_blocking(get_llm_only)
+        answer = await llm_func(query)
+        return [answer], True
     
-    def _handle_static_rag(self, dispatcher, query):
+    async def _handle_static_rag(self, query, query_vector=None) -> Tuple[List[Text], bool]:
         """Handle Static RAG fallback"""
-        rag = get_static_rag()
-        answer = rag.generate_fallback_response(query)
-        dispatcher.utter_message(text=answer)
+        rag = await run_blocking(get_static_rag)
+        # If the LLM misses the answer deadline, its late answer still warms the cache
+        result = await rag.agenerate_fallback_result(
+            query, on_late_answer=lambda late: self._store(query, query_vector, [late['answer']])
+        )
+        return [result['answer']], result['source'] == 'llm'
     
-    def _handle_dynamic_rag(self, dispatcher, query):
+    async def _handle_dynamic_rag(self, query, query_vector=None) -> Tuple[List[Text], bool]:
         """Handle Dynamic RAG fallback"""
-        rag = get_dynamic_rag()
-        result = rag.generate_response_with_citations(query)
+        rag = await run_blocking(get_dynamic_rag)
+        result = await rag.agenerate_response_with_citations(query)
         
-        # Send main answer
-        dispatcher.utter_message(text=result['answer'])
+        # Main answer
+        messages = [result['answer']]
         
-        # Send sources if available
+        # Sources if available
         if result.get('sources') and len(result['sources']) > 0:
-            sources_text = "\n\n📚 **Sources:**\n"
-            for src in result['sources'][:3]:  # Top 3 sources
-                sources_text += f"• {src.get('title', 'Source')}\n"
-            dispatcher.utter_message(text=sources_text)
+            messages.append(format_sources(result['sources']))
+        return messages, 'error' not in result and not result.get('shed')
     
-    def _handle_dynamic_llm(self, dispatcher, query):
+    async def _handle_dynamic_llm(self, query, query_vector=None) -> Tuple[List[Text], bool]:
         """Handle Dynamic LLM fallback"""
-        llm = get_dynamic_llm()
-        result = llm.generate_response_with_live_sources(query)
+        llm = await run_blocking(get_dynamic_llm)
+        result = await llm.agenerate_response_with_live_sources(query)
         
-        # Send main answer
-        dispatcher.utter_message(text=result['answer'])
+        # Main answer
+        messages = [result['answer']]
         
-        # Send sources if available
+        # Sources if available
         if result.get('sources') and len(result['sources']) > 0:
-            sources_text = "\n\n📚 **Regulatory Sources:**\n"
-            for src in result['sources'][:3]:
-                regulator = src.get('regulator', 'N/A')
-                title = src.get('title', 'Source')
-                sources_text += f"• {title} ({regulator})\n"
-            dispatcher.utter_message(text=sources_text)
+            messages.append(format_regulatory_sources(result['sources']))
+        return messages, 'error' not in result and not result.get('shed')
@@ -0,0 +1,42 @@
+# actions/async_utils.py
+"""
+Helpers for the async fallback path: a shared thread pool for blocking
+embedding/vector-store work and small async iterator utilities. Rate-limit
+handling lives in rate_limiter.py.
+"""
+import asyncio
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable
+
+from .fallback_config import BLOCKING_WORKERS
+from .rate_limiter import LoadShedError
+
+_executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix='fallback-worker')
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """Run a blocking call (model encode, Chroma query, ...) off the event loop."""
+    loop = asyncio.get_running_loop()
+    # Carry context variables (e.g. metrics.current_engine) into the worker thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_executor, functools.partial(context.run, func, *args, **kwargs))
+
+
+class FallbackText(str):
+    """A chunk standing in for the LLM's answer (extractive, busy message...): streamed like any other, never cached."""
+
+
+async def iterate_once(text: str) -> AsyncIterator[str]:
+    """A stream that yields one ready-made answer (cached, rejected, extractive...)."""
+    yield text
+
+
+async def shed_to(chunks: AsyncIterator[str], fallback: Callable[[], str]) -> AsyncIterator[str]:
+    """Pass chunks through; if the LLM call is shed before any text, yield fallback() instead."""
+    try:
+        async for chunk in chunks:
+            yield chunk
+    except LoadShedError:
+        yield FallbackText(fallback())
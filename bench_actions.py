@@ -0,0 +1,415 @@
+# actions/bench_actions.py
+"""
+Replay benchmark for the custom action server.
+
+Conversations are rebuilt from stories.yml and rules.yml. Each intent step is
+given a concrete user message drawn from the nlu.yml / enhanced_nlu.yml
+examples, and its annotated entities fill the matching slots. Every custom
+action in enhanced_actions.py, actions.py and action_llm_fallback.py is then
+run against the trackers those conversations produce, with the Sarvam LLM
+replaced by a deterministic in-process stand-in (fixed latency, answer
+derived from the prompt), so runs are repeatable and need no API key or
+network. With --llm mock the mock_llm_server.py backend is used instead.
+
+Per action it reports p50/p95/p99 latency, requests/sec and how far RSS
+rose above its level when the action's replay started. A run
+can be saved as a baseline and later runs diffed against it; any action that
+got slower, lost throughput or grew memory beyond the tolerance fails the
+run.
+
+Usage (from the project root):
+    python -m actions.bench_actions --save-baseline bench_baseline.json
+    python -m actions.bench_actions --baseline bench_baseline.json
+Exits with status 1 if a regression against the baseline is found.
+"""
+import io
+import sys
+import json
+import time
+import random
+import asyncio
+import inspect
+import argparse
+import threading
+import contextlib
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+from rasa_sdk import Action, Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+from . import llm_client
+from .llm_backends import LLMBackend, create_backend
+from .mock_llm_server import mock_answer
+from .nlu_data import load_yaml, load_examples
+from .fallback_config import NLU_DATA_DIR
+
+ACTION_MODULES = ("enhanced_actions", "actions", "action_llm_fallback")
+# Training data, relative to --data-dir
+STORY_FILES = ("stories.yml", "rules.yml")
+
+# Used for intents without examples (nlu_fallback) - the questions that miss the NLU
+FALLBACK_QUERIES = [
+    "what does RBI say about digital lending to gig workers",
+    "is invoice discounting regulated by SEBI",
+    "how is interest calculated on a salary advance",
+    "can an NBFC co-lend with a bank on supply chain finance",
+    "what KYC is needed for a hospital claim loan",
+]
+
+
+# ===== DETERMINISTIC LLM STAND-IN =====
+class _StandInCompletions:
+    """Same surface as client.chat.completions: sync, async and streaming variants."""
+
+    def __init__(self, latency: float, is_async: bool):
+        self.latency = latency
+        self.is_async = is_async
+
+    @staticmethod
+    def _response(text: str):
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+    def __call__(self, messages, temperature=0.3, max_tokens=150, stream=False, **kwargs):
+        text = mock_answer(messages, max_tokens)
+        if not self.is_async:
+            time.sleep(self.latency)
+            return self._response(text)
+        return self._astream(text) if stream else self._acomplete(text)
+
+    async def _acomplete(self, text: str):
+        await asyncio.sleep(self.latency)
+        return self._response(text)
+
+    async def _astream(self, text: str):
+        await asyncio.sleep(self.latency / 2)
+
+        async def chunks():
+            words = text.split(" ")
+            for i, word in enumerate(words):
+                await asyncio.sleep(self.latency / 2 / len(words))
+                delta = SimpleNamespace(content=word if i == 0 else " " + word)
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+        return chunks()
+
+
+class StandInBackend(LLMBackend):
+    name = "stand-in"
+
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+
+    def create_client(self, http, timeout):
+        return SimpleNamespace(chat=SimpleNamespace(completions=_StandInCompletions(self.latency, False)))
+
+    def create_async_client(self, http, timeout):
+        return SimpleNamespace(chat=SimpleNamespace(completions=_StandInCompletions(self.latency, True)))
+
+
+# ===== CONVERSATIONS =====
+def load_flows(data_dir: str) -> List[List[Tuple[Optional[str], str]]]:
+    """Each story/rule as [(latest intent, action)] for its action steps."""
+    flows = []
+    for name in STORY_FILES:
+        data = load_yaml(data_dir, name)
+        for flow in data.get("stories", []) + data.get("rules", []):
+            intent, turns = None, []
+            for step in flow.get("steps", []):
+                if "or" in step:
+                    step = step["or"][0]
+                if "intent" in step:
+                    intent = step["intent"]
+                elif "action" in step:
+                    turns.append((intent, step["action"]))
+            if turns:
+                flows.append(turns)
+    return flows
+
+
+def load_actions() -> Dict[str, Action]:
+    """{'module.action_name': instance} for every concrete Action defined in ACTION_MODULES."""
+    import importlib
+    registry = {}
+    for module_name in ACTION_MODULES:
+        module = importlib.import_module(f"{__package__}.{module_name}")
+        for _, cls in inspect.getmembers(module, inspect.isclass):
+            if issubclass(cls, Action) and cls.__module__ == module.__name__ and not inspect.isabstract(cls):
+                action = cls()
+                registry[f"{module_name}.{action.name()}"] = action
+    return registry
+
+
+def make_tracker(sender_id: str, slots: Dict[str, Any], intent: Optional[str], text: str,
+                 entities: List[Dict[str, str]]) -> Tracker:
+    confidence = 0.35 if intent == "nlu_fallback" else 0.95
+    latest = {"intent": {"name": intent, "confidence": confidence}, "entities": entities, "text": text}
+    return Tracker(sender_id, dict(slots), latest, [], False, None, {}, "action_listen")
+
+
+async def call_action(action: Action, tracker: Tracker) -> Optional[List[Dict[str, Any]]]:
+    """
+    Run an action the way the rasa_sdk executor does (sync actions run on the
+    loop). Returns its events, or None if it raised - the action server would
+    answer that request with an error.
+    """
+    try:
+        events = action.run(CollectingDispatcher(), tracker, {})
+        if inspect.isawaitable(events):
+            events = await events
+    except Exception:
+        return None
+    return events or []
+
+
+async def record_turns(actions: Dict[str, Action], data_dir: str, variants: int, seed: int) -> Dict[str, List[Tracker]]:
+    """
+    Replay every flow `variants` times and capture, for each custom action,
+    the tracker it saw. Slots carry over between turns of a conversation.
+    Doubles as warm-up: engines, caches and indexes are loaded here.
+    """
+    rng = random.Random(seed)
+    examples = load_examples(data_dir)
+    all_examples = [example for items in examples.values() for example in items]
+    by_name: Dict[str, List[str]] = {}
+    for key, action in actions.items():
+        by_name.setdefault(action.name(), []).append(key)
+
+    turns: Dict[str, List[Tracker]] = {key: [] for key in actions}
+    flows = load_flows(data_dir)
+    # Actions no story or rule reaches still get traffic: one-turn flows on random intents
+    reached = {name for flow in flows for _, name in flow}
+    for name in by_name:
+        if name not in reached:
+            flows += [[(rng.choice(list(examples)), name)] for _ in range(3)]
+
+    conversation = 0
+    for _ in range(variants):
+        for flow in flows:
+            conversation += 1
+            sender_id = f"bench_{conversation}"
+            slots_by_key: Dict[str, Dict[str, Any]] = {}
+            for intent, name in flow:
+                if intent == "nlu_fallback" or (intent and intent not in examples):
+                    text, entities = rng.choice(FALLBACK_QUERIES), []
+                elif intent:
+                    text, entities = rng.choice(examples[intent])
+                else:
+                    text, entities = rng.choice(all_examples)
+                for key in by_name.get(name, []):
+                    # Each implementation of a duplicated action name keeps its own slot history
+                    slots = slots_by_key.setdefault(key, {})
+                    for entity in entities:
+                        slots[entity["entity"]] = entity["value"]
+                    tracker = make_tracker(sender_id, slots, intent, text, entities)
+                    turns[key].append(tracker)
+                    for event in await call_action(actions[key], tracker) or []:
+                        if event.get("event") == "slot":
+                            slots[event["name"]] = event["value"]
+    return turns
+
+
+# ===== MEASUREMENT =====
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process right now, in MB (None if unavailable)."""
+    try:
+        import resource
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / (1024 * 1024)
+    except (ImportError, OSError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+class RSSSampler:
+    """
+    Samples RSS on a thread while one action replays and reports how far it
+    rose above the starting level. ru_maxrss can't be used: it is the peak
+    of the whole process, so every action after the heaviest one would show
+    the same number.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.start = self.peak = current_rss_mb()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, current_rss_mb())
+
+    def __enter__(self):
+        if self.start is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            self._done.set()
+            self._thread.join()
+            self.peak = max(self.peak, current_rss_mb())
+
+    @property
+    def growth_mb(self) -> Optional[float]:
+        return round(self.peak - self.start, 1) if self.start is not None else None
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def bench_action(action: Action, trackers: List[Tracker], repeat: int, concurrency: int) -> Dict[str, Any]:
+    """Replay the recorded trackers `repeat` times with `concurrency` requests in flight."""
+    slots = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(tracker: Tracker):
+        nonlocal errors
+        async with slots:
+            started = time.perf_counter()
+            if await call_action(action, tracker) is None:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    with RSSSampler() as rss:
+        started = time.perf_counter()
+        await asyncio.gather(*(one(tracker) for _ in range(repeat) for tracker in trackers))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "rss_growth_mb": rss.growth_mb,
+    }
+
+
+def configure_fallback(mode: Optional[str], answer_cache: bool):
+    """Pick the fallback engine to measure; the semantic answer cache is off unless asked for,
+    otherwise repeated fallback queries would only measure cache hits."""
+    from . import action_llm_fallback
+    if mode:
+        action_llm_fallback.ACTIVE_FALLBACK = mode
+    action_llm_fallback.SEMANTIC_CACHE_ENABLED = answer_cache and action_llm_fallback.SEMANTIC_CACHE_ENABLED
+
+
+async def run_benchmark(args) -> Dict[str, Dict[str, Any]]:
+    configure_fallback(args.fallback_mode, args.answer_cache)
+    actions = load_actions()
+    if args.action:
+        actions = {key: action for key, action in actions.items() if args.action in key}
+    with contextlib.redirect_stdout(io.StringIO()):
+        turns = await record_turns(actions, args.data_dir, args.variants, args.seed)
+    results = {}
+    for key in sorted(actions):
+        if not turns[key]:
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[key] = await bench_action(actions[key], turns[key], args.repeat, args.concurrency)
+    await llm_client.aclose_async_llm_client()
+    return results
+
+
+# ===== REPORTING =====
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float,
+            rss_tolerance_mb: float, check_missing: bool = True) -> List[str]:
+    """Human-readable regressions of results vs. baseline."""
+    regressions = []
+    for key, current in sorted(results.items()):
+        base = baseline.get(key)
+        if not base:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            # Ignore sub-millisecond noise on trivially fast actions
+            if current[metric] > base[metric] * (1 + tolerance) and current[metric] - base[metric] > 1.0:
+                regressions.append(f"{key}: {metric} {base[metric]:.2f} -> {current[metric]:.2f}")
+        if current["errors"] > base.get("errors", 0):
+            regressions.append(f"{key}: errors {base.get('errors', 0)} -> {current['errors']}")
+        if current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{key}: rps {base['rps']:.1f} -> {current['rps']:.1f}")
+        if current["rss_growth_mb"] is not None and base.get("rss_growth_mb") is not None and \
+                current["rss_growth_mb"] > base["rss_growth_mb"] + rss_tolerance_mb:
+            regressions.append(f"{key}: RSS growth {base['rss_growth_mb']:.1f} -> {current['rss_growth_mb']:.1f} MB")
+    for key in sorted(set(baseline) - set(results)) if check_missing else []:
+        regressions.append(f"{key}: missing from this run")
+    return regressions
+
+
+def print_report(results: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]]):
+    width = max((len(key) for key in results), default=10)
+    print(f"{'action':<{width}}  {'calls':>6}  {'errors':>6}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  {'req/s':>9}  {'+RSS MB':>7}")
+    for key, r in sorted(results.items()):
+        rss = f"{r['rss_growth_mb']:.1f}" if r["rss_growth_mb"] is not None else "n/a"
+        line = (f"{key:<{width}}  {r['calls']:>6}  {r['errors']:>6}  {r['p50_ms']:>8.2f}  {r['p95_ms']:>8.2f}  "
+                f"{r['p99_ms']:>8.2f}  {r['rps']:>9.1f}  {rss:>7}")
+        base = (baseline or {}).get(key)
+        if base and base["p95_ms"]:
+            line += f"  (p95 {(r['p95_ms'] / base['p95_ms'] - 1) * 100:+.0f}%)"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=NLU_DATA_DIR, help="directory with stories.yml, rules.yml and nlu.yml")
+    parser.add_argument("--variants", type=int, default=3, help="replays of each story/rule with different examples")
+    parser.add_argument("--repeat", type=int, default=5, help="times each recorded turn is replayed per action")
+    parser.add_argument("--concurrency", type=int, default=20, help="requests in flight per action")
+    parser.add_argument("--llm", choices=["stand-in", "mock"], default="stand-in",
+                        help="in-process LLM stand-in, or mock_llm_server.py at MOCK_LLM_URL")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="latency of the LLM stand-in")
+    parser.add_argument("--fallback-mode", choices=["llm_only", "static_rag", "dynamic_rag", "dynamic_llm"],
+                        help="fallback engine for action_llm_fallback (default: ACTIVE_FALLBACK)")
+    parser.add_argument("--answer-cache", action="store_true", help="keep the semantic answer cache on")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--action", help="only actions whose 'module.name' contains this")
+    parser.add_argument("--baseline", help="baseline JSON to diff against")
+    parser.add_argument("--save-baseline", help="write this run's results as a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative latency/throughput change")
+    parser.add_argument("--rss-tolerance-mb", type=float, default=20.0, help="allowed extra RSS growth per action")
+    args = parser.parse_args()
+
+    llm_client.set_backend(StandInBackend(args.llm_latency_ms) if args.llm == "stand-in" else create_backend("mock"))
+    started = time.perf_counter()
+    results = asyncio.run(run_benchmark(args))
+    from .action_llm_fallback import ACTIVE_FALLBACK
+    llm = "mock server" if args.llm == "mock" else f"stand-in {args.llm_latency_ms:.0f} ms"
+    print(f"📊 {len(results)} actions benchmarked in {time.perf_counter() - started:.1f}s "
+          f"(LLM {llm}, concurrency {args.concurrency}, fallback {ACTIVE_FALLBACK})")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    print_report(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": {k: v for k, v in vars(args).items() if k not in ("baseline", "save_baseline")},
+                       "results": results}, f, indent=2)
+        print(f"💾 Baseline saved to {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance, args.rss_tolerance_mb,
+                              check_missing=not args.action)
+        if regressions:
+            print(f"❌ {len(regressions)} regressions vs {args.baseline}:")
+            for regression in regressions:
+                print(f"   {regression}")
+            sys.exit(1)
+        print(f"✅ No regressions vs {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# actions/bench_state_isolation.py
+"""
+Concurrency stress benchmark for ActionProcessWithMinimalState.
+
+Runs a few hundred simulated conversations at once against ONE shared action
+instance (as the action server does) and checks that every conversation ends
+up with exactly the state its own messages imply - no user type or product
+leaking in from another sender. Some senders never declare anything, so any
+user type or product they end up with must have come from someone else.
+
+Usage (from the project root):
+    python -m actions.bench_state_isolation --senders 300 --turns 4
+Exits with status 1 if any conversation shows cross-talk.
+"""
+import io
+import sys
+import time
+import random
+import argparse
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from rasa_sdk import Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+from . import enhanced_actions, minimal_state
+
+# (user_type or None, product, message mentioning the product)
+PERSONAS = [
+    ("individual", "gigcash", "I deliver for zomato, tell me about gigcash"),
+    ("individual", "empcash", "can I get a salary advance with empcash"),
+    ("business", "scf", "what is supply chain finance"),
+    ("business", "lrd", "tell me about lease rental discounting"),
+    ("business", "term_loan", "I need a term loan"),
+    ("lender", "lender_services", "we are an nbfc looking for deal flow"),
+    (None, None, "hello there"),
+]
+
+ACTIONS = {
+    "enhanced": enhanced_actions.ActionProcessWithMinimalState,
+    "minimal": minimal_state.ActionProcessWithMinimalState,
+}
+
+
+def make_tracker(sender_id: str, slots: Dict[str, Any], intent: str, text: str) -> Tracker:
+    return Tracker(sender_id, dict(slots), {"intent": {"name": intent, "confidence": 0.99}, "entities": [], "text": text},
+                   [], False, None, {}, "action_listen")
+
+
+def conversation(sender_id: str, persona: Tuple[Optional[str], Optional[str], str], turns: int) -> List[Tuple[str, str]]:
+    """(intent, text) turns for one sender; the last turn is always ask_process"""
+    user_type, product, product_text = persona
+    script = []
+    if user_type:
+        script.append((f"declare_{user_type}", f"I am a {user_type}"))
+        script.append(("ask_info", product_text))
+    else:
+        script.append(("greet", product_text))
+    while len(script) < turns - 1:
+        script.append(("ask_info", "tell me more"))
+    script.append(("ask_process", "how does it work"))
+    return script
+
+
+def expected_state(persona: Tuple[Optional[str], Optional[str], str]) -> Dict[str, Any]:
+    user_type, product, _ = persona
+    return {
+        "user_type": user_type or "unknown",
+        "product_focus": product,
+        "conversation_phase": "process",
+        "last_intent": "ask_process",
+    }
+
+
+def run_sender(action, sender_id: str, persona, turns: int, barrier: threading.Barrier, latencies: List[float]) -> Dict[str, Any]:
+    slots: Dict[str, Any] = {}
+    barrier.wait()
+    for intent, text in conversation(sender_id, persona, turns):
+        tracker = make_tracker(sender_id, slots, intent, text)
+        started = time.perf_counter()
+        events = action.run(CollectingDispatcher(), tracker, {})
+        latencies.append(time.perf_counter() - started)
+        for event in events:
+            if event.get("event") == "slot":
+                slots[event["name"]] = event["value"]
+        # Give other senders a chance to interleave between turns
+        time.sleep(random.random() * 0.001)
+    return slots.get("conversation_state") or {}
+
+
+def run_benchmark(action_name: str, senders: int, turns: int) -> int:
+    action = ACTIONS[action_name]()  # one shared instance, like the action server
+    personas = [PERSONAS[i % len(PERSONAS)] for i in range(senders)]
+    barrier = threading.Barrier(senders)
+    latencies: List[float] = []
+
+    sys.setswitchinterval(1e-5)  # force frequent thread switches
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=senders) as pool:
+        futures = [pool.submit(run_sender, action, f"sender_{i}", personas[i], turns, barrier, latencies)
+                   for i in range(senders)]
+        results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - started
+
+    mismatches = []
+    for i, (persona, final_state) in enumerate(zip(personas, results)):
+        expected = expected_state(persona)
+        if final_state != expected:
+            mismatches.append((f"sender_{i}", expected, final_state))
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0
+    print(f"📊 [{action_name}] {senders} senders x {turns} turns = {len(latencies)} turns in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:.0f} turns/sec, p95 {p95:.2f} ms)")
+    if mismatches:
+        print(f"❌ [{action_name}] cross-talk in {len(mismatches)} conversations, e.g.:")
+        for sender_id, expected, got in mismatches[:3]:
+            print(f"   {sender_id}: expected {expected}, got {got}")
+    else:
+        print(f"✅ [{action_name}] no cross-talk between conversations")
+    return len(mismatches)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--senders", type=int, default=300)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--action", choices=sorted(ACTIONS) + ["all"], default="all")
+    args = parser.parse_args()
+
+    names = sorted(ACTIONS) if args.action == "all" else [args.action]
+    failures = sum(run_benchmark(name, args.senders, max(args.turns, 3)) for name in names)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+# components/__init__.py
+"""Custom Rasa NLU components referenced from config.yml."""
@@ -0,0 +1,222 @@
+# components/parse_cache.py
+"""
+Exact-match memoization of NLU parses.
+
+The widget's FAQ buttons and a handful of stock phrases reach the NLU
+pipeline over and over. ParseCacheLookup, placed first in the pipeline,
+looks the normalized text (lowercased, whitespace collapsed) up in a
+bounded LRU and, on a hit, restores the intent, ranking, entities and
+response selector output that ParseCacheStore - placed right before the
+FallbackClassifier - recorded the first time round. The expensive
+components are swapped for the Cached* subclasses below, which pass hit
+messages through untouched; the FallbackClassifier still runs on every
+message.
+
+Entries are keyed by the model id and the cache is emptied whenever a
+different model is loaded, so a retrained model never serves stale parses.
+"""
+import copy
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Text
+
+from rasa.engine.graph import ExecutionContext, GraphComponent
+from rasa.engine.recipes.default_recipe import DefaultV1Recipe
+from rasa.engine.storage.resource import Resource
+from rasa.engine.storage.storage import ModelStorage
+from rasa.nlu.classifiers.diet_classifier import DIETClassifier
+from rasa.nlu.constants import RESPONSE_SELECTOR_PROPERTY_NAME
+from rasa.nlu.featurizers.sparse_featurizer.count_vectors_featurizer import CountVectorsFeaturizer
+from rasa.nlu.featurizers.sparse_featurizer.lexical_syntactic_featurizer import LexicalSyntacticFeaturizer
+from rasa.nlu.featurizers.sparse_featurizer.regex_featurizer import RegexFeaturizer
+from rasa.nlu.selectors.response_selector import ResponseSelector
+from rasa.shared.nlu.constants import ENTITIES, INTENT, INTENT_RANKING_KEY, TEXT
+from rasa.shared.nlu.training_data.message import Message
+from rasa.shared.nlu.training_data.training_data import TrainingData
+
+logger = logging.getLogger(__name__)
+
+# Set on messages answered from the cache; the Cached* components skip them
+PARSE_CACHE_HIT = "parse_cache_hit"
+# Parse results copied into / out of the cache
+CACHED_KEYS = (INTENT, INTENT_RANKING_KEY, ENTITIES, RESPONSE_SELECTOR_PROPERTY_NAME, "typo_corrections")
+
+
+def normalize(text: Text) -> Text:
+    return " ".join(str(text).lower().split())
+
+
+class ParseCache:
+    """Thread-safe LRU of parse results for one model at a time."""
+
+    def __init__(self, max_entries: int = 5000):
+        self.max_entries = max_entries
+        self.model_id: Optional[Text] = None
+        self._entries: "OrderedDict[Text, Dict[Text, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def bind(self, model_id: Optional[Text], max_entries: int):
+        """Use the cache for model_id; entries of any other model are dropped."""
+        with self._lock:
+            self.max_entries = max_entries
+            if model_id != self.model_id:
+                if self._entries:
+                    logger.info(f"Model changed ({self.model_id} -> {model_id}), dropping {len(self._entries)} cached parses")
+                self._entries.clear()
+                self.model_id = model_id
+                self.hits = self.misses = 0
+
+    def get(self, text: Text) -> Optional[Dict[Text, Any]]:
+        key = normalize(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, text: Text, entry: Dict[Text, Any]):
+        key = normalize(text)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[Text, Any]:
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0
+        }
+
+
+_cache = ParseCache()
+
+
+def get_parse_cache() -> ParseCache:
+    """The process-wide parse cache shared by ParseCacheLookup and ParseCacheStore."""
+    return _cache
+
+
+class _ParseCacheComponent(GraphComponent):
+    @staticmethod
+    def get_default_config() -> Dict[Text, Any]:
+        return {
+            "max_entries": 5000,
+            # Log hit-rate stats every this many lookups (0 = never)
+            "log_every": 1000,
+        }
+
+    def __init__(self, config: Dict[Text, Any], model_id: Optional[Text]) -> None:
+        self._config = config
+        self.cache = get_parse_cache()
+        self.cache.bind(model_id, config["max_entries"])
+
+    @classmethod
+    def create(cls, config: Dict[Text, Any], model_storage: ModelStorage, resource: Resource,
+               execution_context: ExecutionContext) -> GraphComponent:
+        return cls(config, execution_context.model_id)
+
+    def process_training_data(self, training_data: TrainingData) -> TrainingData:
+        # Training always runs the full pipeline
+        return training_data
+
+
+@DefaultV1Recipe.register(
+    [DefaultV1Recipe.ComponentType.MESSAGE_FEATURIZER], is_trainable=False
+)
+class ParseCacheLookup(_ParseCacheComponent):
+    """First in the pipeline: restores cached parses and flags those messages."""
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        for message in messages:
+            text = message.get(TEXT)
+            if not text:
+                continue
+            entry = self.cache.get(text)
+            # Entity offsets only hold if the text has the same length (case differences are fine)
+            if entry is None or (entry.get(ENTITIES) and len(entry[TEXT]) != len(text)):
+                continue
+            for key in CACHED_KEYS:
+                if key in entry:
+                    message.set(key, copy.deepcopy(entry[key]), add_to_output=True)
+            message.set(PARSE_CACHE_HIT, True)
+        self._log_stats()
+        return messages
+
+    def _log_stats(self):
+        stats = self.cache.stats()
+        lookups = stats['hits'] + stats['misses']
+        if self._config["log_every"] and lookups and lookups % self._config["log_every"] == 0:
+            logger.info(f"NLU parse cache: {stats}")
+
+
+@DefaultV1Recipe.register(
+    [DefaultV1Recipe.ComponentType.MESSAGE_FEATURIZER], is_trainable=False
+)
+class ParseCacheStore(_ParseCacheComponent):
+    """Right before the FallbackClassifier: records parses the pipeline computed."""
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        for message in messages:
+            if message.get(PARSE_CACHE_HIT) or not message.get(TEXT) or not message.get(INTENT):
+                continue
+            entry = {key: copy.deepcopy(message.get(key)) for key in CACHED_KEYS if message.get(key) is not None}
+            entry[TEXT] = message.get(TEXT)
+            self.cache.put(message.get(TEXT), entry)
+        return messages
+
+
+class _SkipParseCacheHits:
+    """Mixin: process() only the messages the parse cache did not answer."""
+
+    def process(self, messages: List[Message], *args: Any, **kwargs: Any) -> List[Message]:
+        misses = [message for message in messages if not message.get(PARSE_CACHE_HIT)]
+        if misses:
+            super().process(misses, *args, **kwargs)
+        return messages
+
+
+# Drop-in replacements for the expensive pipeline steps in config.yml
+@DefaultV1Recipe.register(
+    [DefaultV1Recipe.ComponentType.MESSAGE_FEATURIZER], is_trainable=True
+)
+class CachedRegexFeaturizer(_SkipParseCacheHits, RegexFeaturizer):
+    pass
+
+
+@DefaultV1Recipe.register(
+    [DefaultV1Recipe.ComponentType.MESSAGE_FEATURIZER], is_trainable=True
+)
+class CachedLexicalSyntacticFeaturizer(_SkipParseCacheHits, LexicalSyntacticFeaturizer):
+    pass
+
+
+@DefaultV1Recipe.register(
+    [DefaultV1Recipe.ComponentType.MESSAGE_FEATURIZER], is_trainable=True
+)
+class CachedCountVectorsFeaturizer(_SkipParseCacheHits, CountVectorsFeaturizer):
+    pass
+
+
+@DefaultV1Recipe.register(
+    [DefaultV1Recipe.ComponentType.INTENT_CLASSIFIER, DefaultV1Recipe.ComponentType.ENTITY_EXTRACTOR],
+    is_trainable=True,
+)
+class CachedDIETClassifier(_SkipParseCacheHits, DIETClassifier):
+    pass
+
+
+@DefaultV1Recipe.register(
+    [DefaultV1Recipe.ComponentType.INTENT_CLASSIFIER], is_trainable=True
+)
+class CachedResponseSelector(_SkipParseCacheHits, ResponseSelector):
+    pass
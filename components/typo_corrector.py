@@ -0,0 +1,249 @@
+# components/typo_corrector.py
+"""
+Spelling correction for user messages, run right after the tokenizer.
+
+A symmetric-delete (SymSpell) index over the bot's own vocabulary: every
+dictionary word is stored under each string obtained by deleting up to
+max_edit_distance characters from it. A misspelt token generates its own
+deletes the same way, and any word sharing one of them is a candidate;
+candidates are checked with the Damerau-Levenshtein (optimal string
+alignment) distance and the closest, most frequent one wins. No
+dictionary scan is involved, so a lookup costs a few dict probes per
+token whatever the vocabulary size.
+
+The vocabulary is built at training time from the NLU examples, entity
+synonyms and lookup tables, the vocabulary files (domain.yml: intents,
+entities, slots, response texts) and the product names, and persisted with
+the model. Tokens are corrected in place (text and lemma), so the
+featurizers and DIETClassifier see "compliance" for "complinace"; the
+message text itself is left alone so entity offsets stay valid.
+"""
+import os
+import re
+import json
+import logging
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+import yaml
+from rasa.engine.graph import ExecutionContext, GraphComponent
+from rasa.engine.recipes.default_recipe import DefaultV1Recipe
+from rasa.engine.storage.resource import Resource
+from rasa.engine.storage.storage import ModelStorage
+from rasa.nlu.constants import TOKENS_NAMES
+from rasa.shared.nlu.constants import TEXT
+from rasa.shared.nlu.training_data.message import Message
+from rasa.shared.nlu.training_data.training_data import TrainingData
+
+logger = logging.getLogger(__name__)
+
+WORD = re.compile(r"[a-z][a-z']*[a-z]|[a-z]")
+
+
+def words(text: str) -> List[str]:
+    return WORD.findall(str(text).lower())
+
+
+def osa_distance(a: str, b: str, limit: int) -> int:
+    """Damerau-Levenshtein (optimal string alignment) distance, or limit + 1 once it exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class SymSpell:
+    """Symmetric-delete spelling corrector over a word -> frequency dictionary."""
+
+    def __init__(self, frequencies: Dict[str, int], max_edit_distance: int = 2, min_word_length: int = 4,
+                 cache_size: int = 10000):
+        self.frequencies = dict(frequencies)
+        self.max_edit_distance = max_edit_distance
+        self.min_word_length = min_word_length
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self.deletes: Dict[str, List[str]] = {}
+        for word in self.frequencies:
+            for variant in self._deletes(word, self._max_distance(word)):
+                self.deletes.setdefault(variant, []).append(word)
+
+    def _max_distance(self, word: str) -> int:
+        """One edit for short words, where two would turn them into other words"""
+        return min(self.max_edit_distance, 1 if len(word) < 7 else 2)
+
+    @staticmethod
+    def _deletes(word: str, distance: int) -> Set[str]:
+        found = {word}
+        frontier = {word}
+        for _ in range(distance):
+            frontier = {w[:i] + w[i + 1:] for w in frontier if len(w) > 1 for i in range(len(w))} - found
+            found |= frontier
+        return found
+
+    def correct(self, token: str) -> str:
+        """Closest dictionary word to token, or token itself if it is known, too short or too far off."""
+        word = token.lower()
+        if (word in self.frequencies or len(word) < self.min_word_length
+                or not word.isalpha()):
+            return token
+        cached = self._cache.get(word)
+        if cached is None:
+            cached = self._lookup(word)
+            self._cache[word] = cached
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(word)
+        return cached if cached != word else token
+
+    def _lookup(self, word: str) -> str:
+        limit = self._max_distance(word)
+        best, best_key = word, None
+        checked = set()
+        for variant in self._deletes(word, limit):
+            for candidate in self.deletes.get(variant, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                distance = osa_distance(word, candidate, limit)
+                if distance > limit:
+                    continue
+                key = (distance, -self.frequencies[candidate], candidate)
+                if best_key is None or key < best_key:
+                    best, best_key = candidate, key
+                    limit = distance  # nothing further off can win now
+        return best
+
+
+@DefaultV1Recipe.register(
+    [DefaultV1Recipe.ComponentType.MESSAGE_FEATURIZER], is_trainable=True
+)
+class TypoCorrectorComponent(GraphComponent):
+    """Corrects misspelt tokens against the training vocabulary before featurization."""
+
+    VOCABULARY_FILE = "vocabulary.json"
+
+    @staticmethod
+    def get_default_config() -> Dict[str, Any]:
+        return {
+            # Up to this many edits (insert, delete, substitute, transpose); 1 for words under 7 letters
+            "max_edit_distance": 2,
+            # Shorter tokens (ids, "scf", "kyc", ...) are never corrected
+            "min_word_length": 4,
+            # Words that must be in the dictionary even before they appear in the data
+            "product_names": ["billmart", "gigcash", "empcash", "imark", "nach", "nbfc", "msme"],
+            # Domain files whose intents, entities, slots and response texts join the vocabulary
+            "vocabulary_files": ["domain.yml"],
+        }
+
+    def __init__(self, config: Dict[str, Any], model_storage: ModelStorage, resource: Resource,
+                 frequencies: Optional[Dict[str, int]] = None) -> None:
+        self._config = config
+        self._model_storage = model_storage
+        self._resource = resource
+        self.corrector = SymSpell(
+            frequencies or {}, config["max_edit_distance"], config["min_word_length"]
+        )
+
+    @classmethod
+    def create(cls, config: Dict[str, Any], model_storage: ModelStorage, resource: Resource,
+               execution_context: ExecutionContext) -> GraphComponent:
+        return cls(config, model_storage, resource)
+
+    @classmethod
+    def load(cls, config: Dict[str, Any], model_storage: ModelStorage, resource: Resource,
+             execution_context: ExecutionContext, **kwargs: Any) -> GraphComponent:
+        try:
+            with model_storage.read_from(resource) as directory:
+                with open(os.path.join(directory, cls.VOCABULARY_FILE), "r", encoding="utf-8") as f:
+                    frequencies = json.load(f)
+        except (ValueError, FileNotFoundError):
+            logger.warning(f"No vocabulary stored for {cls.__name__}; typos will not be corrected")
+            frequencies = {}
+        return cls(config, model_storage, resource, frequencies)
+
+    # ----- training -----
+    def train(self, training_data: TrainingData) -> Resource:
+        frequencies = Counter()
+        for text in self._training_texts(training_data):
+            frequencies.update(words(text))
+        for path in self._config["vocabulary_files"]:
+            frequencies.update(self._domain_words(path))
+        for name in self._config["product_names"]:
+            frequencies.update(words(name))
+
+        with self._model_storage.write_to(self._resource) as directory:
+            with open(os.path.join(directory, self.VOCABULARY_FILE), "w", encoding="utf-8") as f:
+                json.dump(dict(frequencies), f)
+        self.corrector = SymSpell(frequencies, self._config["max_edit_distance"], self._config["min_word_length"])
+        logger.info(f"Typo corrector vocabulary: {len(frequencies)} words")
+        return self._resource
+
+    @staticmethod
+    def _training_texts(training_data: TrainingData) -> Iterator[str]:
+        for message in training_data.training_examples:
+            if message.get(TEXT):
+                yield message.get(TEXT)
+        for synonym, value in training_data.entity_synonyms.items():
+            yield synonym
+            yield value
+        for table in training_data.lookup_tables:
+            elements = table.get("elements")
+            if isinstance(elements, list):
+                yield from (str(element) for element in elements)
+
+    @staticmethod
+    def _domain_words(path: str) -> Counter:
+        """Words of a domain file's intent, entity and slot names and its response texts"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                domain = yaml.safe_load(f) or {}
+        except FileNotFoundError:
+            logger.warning(f"Vocabulary file {path} not found, skipping")
+            return Counter()
+
+        found = Counter()
+        for key in ("intents", "entities", "slots"):
+            section = domain.get(key) or []
+            names = section.keys() if isinstance(section, dict) else section
+            for name in names:
+                name = next(iter(name)) if isinstance(name, dict) else name
+                found.update(words(str(name).replace("_", " ")))
+        for variants in (domain.get("responses") or {}).values():
+            for variant in variants or []:
+                if isinstance(variant, dict) and variant.get("text"):
+                    found.update(words(variant["text"]))
+        return found
+
+    # ----- inference -----
+    def process_training_data(self, training_data: TrainingData) -> TrainingData:
+        self.process(training_data.training_examples)
+        return training_data
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        for message in messages:
+            corrections = self._correct_tokens(message.get(TOKENS_NAMES[TEXT]) or [])
+            if corrections:
+                message.set("typo_corrections", corrections, add_to_output=True)
+        return messages
+
+    def _correct_tokens(self, tokens: Iterable[Any]) -> List[Dict[str, str]]:
+        corrections = []
+        for token in tokens:
+            corrected = self.corrector.correct(token.text)
+            if corrected != token.text:
+                corrections.append({"original": token.text, "corrected": corrected})
+                token.text = corrected
+                token.lemma = corrected
+        return corrections
@@ -5,16 +5,26 @@ load_dotenv()
 import os
 import requests
 import time
+import asyncio
+import logging
 from typing import List, Dict, Any
-from sarvamai import SarvamAI
+
+from .async_utils import iterate_once, shed_to
+from .llm_client import chat_completion, achat_completion, astream_chat_completion
+from .fallback_config import LLM_TIMEOUT_SECONDS, DYNAMIC_LLM_CONTEXT_TOKENS
+from .prompt_builder import pack_passages, count_message_tokens, log_usage
+from .metrics import stage_timer
+from .extractive import enhanced_rag_response
+from .rate_limiter import LoadShedError
+
+logger = logging.getLogger(__name__)
 
 class DynamicLLMSystem:
     def __init__(self):
-        print("🚀 Initializing Dynamic LLM System...")
-        self.sarvam_client = SarvamAI(api_subscription_key=os.getenv('SARVAM_API_KEY'))
+        logger.debug("🚀 Initializing Dynamic LLM System...")
         self.google_api_key = os.getenv('GOOGLE_SEARCH_API_KEY')
         self.search_engine_id = os.getenv('GOOGLE_SEARCH_ENGINE_ID')
-        print("✅ Dynamic LLM System initialized!")
+        logger.debug("✅ Dynamic LLM System initialized!")
         
     def is_out_of_domain(self, query: str) -> bool:
         """Check if query is outside BillMart domain"""
@@ -28,7 +38,7 @@ class DynamicLLMSystem:
     
     def search_regulatory_sources(self, query: str) -> List[Dict[str, str]]:
         """Search for regulatory information - FILTERED FOR RELEVANCE"""
-        print(f"🔍 Searching regulatory sources for: {query}")
+        logger.debug(f"🔍 Searching regulatory sources for: {query}")
         
         # Check if SEBI is actually needed (only for securities/listed companies)
         needs_sebi = any(term in query.lower() for term in ['securities', 'listed', 'stock exchange', 'ipo', 'mutual fund'])
@@ -61,15 +71,68 @@ class DynamicLLMSystem:
                 'date_accessed': time.strftime('%Y-%m-%d')
             })
         
-        print(f"📡 Found {len(base_results)} relevant regulatory sources")
+        logger.debug(f"📡 Found {len(base_results)} relevant regulatory sources")
         return base_results
     
     def generate_response_with_live_sources(self, query: str) -> Dict[str, Any]:
         """Generate response - OPTIMIZED FOR CLARITY"""
-        print(f"\n{'='*60}")
-        print(f"🎯 QUERY: {query}")
-        print(f"{'='*60}")
+        logger.debug(f"🎯 QUERY: {query}")
         
+        early_result, system_prompt, formatted_sources, context = self._prepare_live_sources(query)
+        if early_result:
+            return early_result
+
+        try:
+            response = chat_completion(
+                messages=self._live_messages(query, system_prompt),
+                temperature=0.1,  # Very low for consistency
+                max_tokens=250    # Reduced from 500
+            )
+            return self._live_result(query, response, formatted_sources)
+            
+        except LoadShedError:
+            return self._shed_result(query, context, formatted_sources)
+        except Exception as e:
+            return self._live_error_result(query, e, formatted_sources)
+    
+    async def agenerate_response_with_live_sources(self, query: str) -> Dict[str, Any]:
+        """Async generate_response_with_live_sources - awaitable LLM call with timeout"""
+        early_result, system_prompt, formatted_sources, context = self._prepare_live_sources(query)
+        if early_result:
+            return early_result
+
+        try:
+            response = await self._achat(self._live_messages(query, system_prompt))
+            return self._live_result(query, response, formatted_sources)
+            
+        except asyncio.TimeoutError:
+            return self._live_error_result(query, f"LLM timed out after {LLM_TIMEOUT_SECONDS}s", formatted_sources)
+        except LoadShedError:
+            return self._shed_result(query, context, formatted_sources)
+        except Exception as e:
+            return self._live_error_result(query, e, formatted_sources)
+    
+    def astream_response_with_live_sources(self, query: str):
+        """Streaming variant: returns (formatted_sources, async iterator of answer text)"""
+        early_result, system_prompt, formatted_sources, context = self._prepare_live_sources(query)
+        if early_result:
+            return early_result['sources'], iterate_once(early_result['answer'])
+        
+        return formatted_sources, shed_to(astream_chat_completion(
+            messages=self._live_messages(query, system_prompt),
+            temperature=0.1,
+            max_tokens=250
+        ), lambda: enhanced_rag_response(query, context))
+    
+    async def _achat(self, messages):
+        return await achat_completion(
+            messages=messages,
+            temperature=0.1,
+            max_tokens=250
+        )
+    
+    def _prepare_live_sources(self, query: str):
+        """Returns (early_result, system_prompt, formatted_sources, context); early_result short-circuits the LLM"""
         # Step 1: Early rejection for out-of-domain topics
         if self.is_out_of_domain(query):
             return {
@@ -77,26 +140,30 @@ class DynamicLLMSystem:
                 'sources': [],
                 'query': query,
                 'rejected': True
-            }
+            }, None, [], ""
         
         # Step 2: Get relevant sources only
-        sources = self.search_regulatory_sources(query)
+        with stage_timer('retrieve'):
+            sources = self.search_regulatory_sources(query)
         
         if not sources:
             return {
                 'answer': "I couldn't find relevant regulatory information. Please contact BillMart support.",
                 'sources': [],
                 'query': query
-            }
+            }, None, [], ""
         
         # Step 3: Build concise context (SHORTENED)
         context_parts = []
         formatted_sources = []
         
-        for i, source in enumerate(sources, 1):
-            # Limit snippet to 100 characters max
-            short_snippet = source['snippet'][:100] + "..." if len(source['snippet']) > 100 else source['snippet']
-            context_parts.append(f"[Source {i}] {short_snippet}")
+        # Keep snippets within the (small) context budget, cut at sentence boundaries
+        with stage_timer('prompt_build'):
+            packed = pack_passages([source['snippet'] for source in sources], DYNAMIC_LLM_CONTEXT_TOKENS)
+        
+        for i, (index, snippet) in enumerate(packed.items, 1):
+            source = sources[index]
+            context_parts.append(f"[Source {i}] {snippet}")
             
             formatted_sources.append({
                 'id': i,
@@ -122,35 +189,45 @@ Context: {context}
 
 Answer the query clearly and concisely."""
 
-        try:
-            response = self.sarvam_client.chat.completions(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": query}
-                ],
-                temperature=0.1,  # Very low for consistency
-                max_tokens=250    # Reduced from 500
-            )
-            
-            answer = response.choices[0].message.content.strip()
-            
-            # Post-process: Ensure it's not too long
-            if len(answer) > 800:
-                answer = answer[:800] + "..."
-            
-            return {
-                'answer': answer,
-                'sources': formatted_sources,
-                'query': query,
-                'generated_at': time.strftime('%Y-%m-%d %H:%M:%S')
-            }
-            
-        except Exception as e:
-            return {
-                'answer': f"Error: {e}",
-                'sources': formatted_sources,
-                'query': query
-            }
+        log_usage('dynamic_llm', packed, count_message_tokens(self._live_messages(query, system_prompt)))
+        return None, system_prompt, formatted_sources, context
+    
+    def _live_messages(self, query: str, system_prompt: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": query}
+        ]
+    
+    def _live_result(self, query: str, response, formatted_sources) -> Dict[str, Any]:
+        answer = response.choices[0].message.content.strip()
+        
+        # Post-process: Ensure it's not too long
+        if len(answer) > 800:
+            answer = answer[:800] + "..."
+        
+        return {
+            'answer': answer,
+            'sources': formatted_sources,
+            'query': query,
+            'generated_at': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+    
+    def _shed_result(self, query: str, context: str, formatted_sources) -> Dict[str, Any]:
+        """Extractive answer from the source snippets when the LLM call was shed"""
+        return {
+            'answer': enhanced_rag_response(query, context),
+            'sources': formatted_sources,
+            'query': query,
+            'shed': True
+        }
+    
+    def _live_error_result(self, query: str, error, formatted_sources) -> Dict[str, Any]:
+        return {
+            'answer': f"Error: {error}",
+            'sources': formatted_sources,
+            'query': query,
+            'error': str(error)
+        }
     
     def identify_regulatory_body(self, domain: str) -> str:
         """Map domain to regulatory body"""
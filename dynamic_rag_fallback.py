@@ -2,15 +2,29 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-import os
 import json
 import requests
 import chromadb
 import time
+import itertools
+import asyncio
+import logging
 from typing import List, Dict, Any
 from dataclasses import dataclass
-from sentence_transformers import SentenceTransformer
-from sarvamai import SarvamAI
+
+from .embedding_service import get_embedder
+from .kb_chunker import chunk_knowledge
+from .async_utils import run_blocking, iterate_once, shed_to
+from .llm_client import chat_completion, achat_completion, astream_chat_completion
+from .fallback_config import KNOWLEDGE_FILES, INGEST_BATCH_SIZE, LLM_TIMEOUT_SECONDS, DYNAMIC_RAG_CONTEXT_TOKENS
+from .prompt_builder import pack_passages, count_message_tokens, log_usage
+from .metrics import stage_timer, count_error
+from .extractive import enhanced_rag_response
+from .rate_limiter import LoadShedError
+from .vector_store import content_hash
+from .kb_reloader import KnowledgeDiff, diff_documents
+
+logger = logging.getLogger(__name__)
 
 @dataclass
 class DocumentSource:
@@ -26,9 +40,8 @@ class DynamicRAGSystem:
         print("🚀 Initializing Dynamic RAG System...")
         
         # Initialize components
-        self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
+        self.embedder = get_embedder()  # shared with the other fallback engines
         self.chroma_client = chromadb.Client()
-        self.sarvam_client = SarvamAI(api_subscription_key=os.getenv('SARVAM_API_KEY'))
         
         # Setup knowledge base
         self.setup_knowledge_base()
@@ -42,67 +55,161 @@ class DynamicRAGSystem:
         except:
             self.collection = self.chroma_client.create_collection("dynamic_billmart_kb")
             print("✅ Created new ChromaDB collection")
+        # Reloads build a new collection each and swap it in (see sync_static_documents)
+        self._generations = itertools.count(1)
+        self._retired_collection = None
             
         # Load existing knowledge
         self.load_static_documents()
     
     def load_static_documents(self):
         """Load existing BillMart knowledge base"""
-        knowledge_files = [
-            'data/billmart_complete_knowledge.json', 
-            'data/knowledge_base.json'
-        ]
-        
-        total_docs = 0
-        for file in knowledge_files:
+        # doc_id -> content hash of the internal documents in the collection
+        self.static_hashes = {}
+        try:
+            self.sync_static_documents(self.read_static_documents())
+        except RuntimeError as e:
+            print(f"❌ Knowledge base only partly indexed, retried on the next reload: {e}")
+        print(f"📚 Total documents in knowledge base: {len(self.static_hashes)}")
+    
+    def read_static_documents(self, strict: bool = False) -> List[Dict[str, str]]:
+        """Chunk KNOWLEDGE_FILES into internal documents; strict raises instead of skipping a bad file"""
+        documents = []
+        for file in KNOWLEDGE_FILES:
             try:
                 with open(file, 'r', encoding='utf-8') as f:
                     docs = json.load(f)
                     
-                if isinstance(docs, dict):
-                    for doc_id, content in docs.items():
-                        self.add_document_to_db(
-                            content=json.dumps(content, ensure_ascii=False),
-                            title=f"BillMart: {doc_id}",
-                            url="internal://billmart",
-                            doc_type="internal",
-                            doc_id=f"internal_{doc_id}"
-                        )
-                        total_docs += 1
+                # Path-labelled, token-bounded passages instead of whole sections
+                chunks = chunk_knowledge(docs, file)
+                for chunk in chunks:
+                    documents.append({
+                        'content': chunk.text,
+                        'title': f"BillMart: {chunk.path}",
+                        'url': "internal://billmart",
+                        'doc_type': "internal",
+                        'doc_id': f"internal_{chunk.id}"
+                    })
                         
-                print(f"✅ Loaded {file}: {total_docs} documents")
+                print(f"✅ Loaded {file}: {len(chunks)} chunks")
                         
             except FileNotFoundError:
+                if strict:
+                    raise
                 print(f"⚠️ {file} not found, skipping...")
             except Exception as e:
+                if strict:
+                    raise
                 print(f"❌ Error loading {file}: {e}")
+        return documents
+    
+    def reload_knowledge_base(self) -> KnowledgeDiff:
+        """Re-read the knowledge files and re-index what changed (called by kb_reloader)"""
+        return self.sync_static_documents(self.read_static_documents(strict=True))
+    
+    def sync_static_documents(self, documents: List[Dict[str, str]]) -> KnowledgeDiff:
+        """
+        Serve ``documents`` as the internal knowledge. A new collection is
+        built on the side - new or edited documents embedded, unchanged ones
+        copied over with their stored vectors, removed ones left out - and
+        swapped in with one reference assignment, so a query searches either
+        the old or the new knowledge base, never a half-synced one. Returns
+        the KnowledgeDiff applied.
+        """
+        hashes = {doc['doc_id']: content_hash(doc['content']) for doc in documents}
+        diff = diff_documents(self.static_hashes, hashes)
+        if not diff:
+            return diff
+        
+        collection = self.chroma_client.create_collection(f"dynamic_billmart_kb_{next(self._generations)}")
+        changed = set(diff.changed)
+        self._copy_documents([doc_id for doc_id in hashes if doc_id not in changed], collection)
+        upserts = [doc for doc in documents if doc['doc_id'] in changed]
+        written = self.add_documents_batch(upserts, collection=collection)
+        if written < len(upserts) and self.static_hashes:
+            # Keep serving the previous version; the next reload writes them again
+            self.chroma_client.delete_collection(collection.name)
+            raise RuntimeError(f"only {written} of {len(upserts)} changed documents were written")
+        
+        previous, self.collection = self.collection, collection
+        # Queries that read the previous collection may still be running, so it is dropped at the next swap
+        if self._retired_collection is not None:
+            self.chroma_client.delete_collection(self._retired_collection.name)
+        self._retired_collection = previous
+        if written < len(upserts):
+            # Nothing was served before, so part of the knowledge base beats none; hashes stay empty for a retry
+            raise RuntimeError(f"only {written} of {len(upserts)} changed documents were written")
+        self.static_hashes = hashes
+        return diff
+    
+    def _copy_documents(self, doc_ids: List[str], target, batch_size: int = INGEST_BATCH_SIZE):
+        """Copy documents, vectors included, from the served collection into ``target``"""
+        for start in range(0, len(doc_ids), batch_size):
+            stored = self.collection.get(
+                ids=doc_ids[start:start + batch_size],
+                include=['embeddings', 'documents', 'metadatas']
+            )
+            target.upsert(
+                ids=stored['ids'],
+                embeddings=stored['embeddings'],
+                documents=stored['documents'],
+                metadatas=stored['metadatas']
+            )
+    
+    def add_documents_batch(self, documents: List[Dict[str, str]], batch_size: int = INGEST_BATCH_SIZE,
+                            collection=None) -> int:
+        """
+        Embed and add documents to ChromaDB in batches: one model call and one
+        collection write per ``batch_size`` documents. Each document is a dict
+        with content, title, url, doc_type and doc_id; an existing doc_id is
+        overwritten. Writes to ``collection`` if given, else the served one.
+        Returns the number added.
+        """
+        if collection is None:
+            collection = self.collection
+        start_time = time.time()
+        date_added = time.strftime('%Y-%m-%d')
+        added = 0
+        
+        for start in range(0, len(documents), batch_size):
+            batch = documents[start:start + batch_size]
+            contents = [doc['content'] for doc in batch]
+            try:
+                embeddings = self.embedder.encode(contents, batch_size=batch_size)
+                collection.upsert(
+                    ids=[doc['doc_id'] for doc in batch],
+                    documents=contents,
+                    embeddings=embeddings.tolist(),
+                    metadatas=[{
+                        'title': doc['title'],
+                        'url': doc['url'],
+                        'doc_type': doc['doc_type'],
+                        'date_added': date_added
+                    } for doc in batch]
+                )
+                added += len(batch)
+            except Exception as e:
+                print(f"❌ Error adding batch {start // batch_size + 1} ({len(batch)} docs): {e}")
         
-        print(f"📚 Total documents in knowledge base: {total_docs}")
+        elapsed = time.time() - start_time
+        if added:
+            rate = added / elapsed if elapsed > 0 else float('inf')
+            print(f"⚡ Ingested {added} documents in {elapsed:.2f}s ({rate:.1f} docs/sec, batch size {batch_size})")
+        return added
     
     def add_document_to_db(self, content: str, title: str, url: str, doc_type: str, doc_id: str):
         """Add a document to ChromaDB with embeddings"""
-        try:
-            # Generate embedding
-            embedding = self.embedder.encode([content])
-            
-            # Add to collection
-            self.collection.add(
-                ids=[doc_id],
-                documents=[content],
-                embeddings=embedding.tolist(),
-                metadatas=[{
-                    'title': title,
-                    'url': url,
-                    'doc_type': doc_type,
-                    'date_added': time.strftime('%Y-%m-%d')
-                }]
-            )
-        except Exception as e:
-            print(f"❌ Error adding document {doc_id}: {e}")
+        self.add_documents_batch([{
+            'content': content,
+            'title': title,
+            'url': url,
+            'doc_type': doc_type,
+            'doc_id': doc_id
+        }])
     
     def search_regulatory_updates(self, query: str) -> List[DocumentSource]:
         """Search for recent regulatory updates online"""
-        print(f"🔍 Searching for regulatory updates: {query}")
+        logger.debug(f"🔍 Searching for regulatory updates: {query}")
         
         sources = []
         
@@ -134,29 +241,31 @@ class DynamicRAGSystem:
             )
         ]
         
-        print(f"📡 Found {len(simulated_updates)} regulatory updates")
+        logger.debug(f"📡 Found {len(simulated_updates)} regulatory updates")
         return simulated_updates
     
     def hybrid_retrieval(self, query: str, k: int = 5) -> List[DocumentSource]:
         """Combine static knowledge with dynamic regulatory updates"""
-        print(f"🔄 Performing hybrid retrieval for: {query}")
+        logger.debug(f"🔄 Performing hybrid retrieval for: {query}")
         
-        # Step 1: Search static knowledge base
-        static_sources = self.search_static_knowledge(query, k//2)
-        
-        # Step 2: Get dynamic regulatory updates
-        dynamic_sources = self.search_regulatory_updates(query)
+        with stage_timer('retrieve'):
+            # Step 1: Search static knowledge base
+            static_sources = self.search_static_knowledge(query, k//2)
+            
+            # Step 2: Get dynamic regulatory updates
+            dynamic_sources = self.search_regulatory_updates(query)
         
         # Step 3: Combine and return
         all_sources = static_sources + dynamic_sources
         
-        print(f"📋 Retrieved {len(static_sources)} static + {len(dynamic_sources)} dynamic sources")
+        logger.debug(f"📋 Retrieved {len(static_sources)} static + {len(dynamic_sources)} dynamic sources")
         return all_sources[:k]
     
     def search_static_knowledge(self, query: str, k: int) -> List[DocumentSource]:
         """Search existing ChromaDB knowledge base"""
         try:
-            query_embedding = self.embedder.encode([query])
+            with stage_timer('embed'):
+                query_embedding = self.embedder.encode([query])
             results = self.collection.query(
                 query_embeddings=query_embedding.tolist(),
                 n_results=k
@@ -176,9 +285,25 @@ class DynamicRAGSystem:
             return sources
             
         except Exception as e:
-            print(f"❌ Error searching static knowledge: {e}")
+            count_error('dynamic_rag', e)
+            logger.error(f"❌ Error searching static knowledge: {e}")
             return []
     
+    CITATION_SYSTEM_PROMPT = """You are BillMart FinTech's regulatory compliance assistant with access to both internal knowledge and latest regulatory updates.
+
+INSTRUCTIONS:
+1. Answer using ONLY the provided sources
+2. Include inline citations [Source X] for every factual claim
+3. Prioritize recent regulatory updates over older information
+4. Structure your response professionally
+5. If sources conflict, mention the discrepancy
+6. Keep response under 300 words
+
+CONTEXT WITH SOURCES:
+{context}
+
+Provide a comprehensive answer with proper citations."""
+
     def generate_response_with_citations(self, query: str) -> Dict[str, Any]:
         """Generate response with properly formatted citations"""
         print(f"\n{'='*80}")
@@ -189,20 +314,83 @@ class DynamicRAGSystem:
         sources = self.hybrid_retrieval(query, k=5)
         
         if not sources:
-            return {
-                'answer': "I couldn't find relevant information for this query. Please contact BillMart support.",
-                'sources': [],
-                'query': query
-            }
+            return self._no_sources_result(query)
         
         # Step 2: Build context with citation markers
+        context, citation_list = self._build_cited_context(sources)
+        messages = self._citation_messages(query, context)
+        
+        # Step 3: Generate response with Sarvam AI
+        try:
+            response = chat_completion(
+                messages=messages,
+                temperature=0.3,
+                max_tokens=400
+            )
+            
+            answer = response.choices[0].message.content.strip()
+            return self._cited_result(query, answer, citation_list, sources, messages)
+            
+        except LoadShedError:
+            return self._shed_result(query, context, citation_list)
+        except Exception as e:
+            return self._cited_error_result(query, e, citation_list)
+    
+    async def agenerate_response_with_citations(self, query: str) -> Dict[str, Any]:
+        """Async generate_response_with_citations - retrieval on the worker pool, awaitable LLM call"""
+        sources = await run_blocking(self.hybrid_retrieval, query, 5)
+        
+        if not sources:
+            return self._no_sources_result(query)
+        
+        context, citation_list = self._build_cited_context(sources)
+        messages = self._citation_messages(query, context)
+        
+        try:
+            response = await self._achat(messages)
+            answer = response.choices[0].message.content.strip()
+            return self._cited_result(query, answer, citation_list, sources, messages)
+            
+        except asyncio.TimeoutError:
+            return self._cited_error_result(query, f"LLM timed out after {LLM_TIMEOUT_SECONDS}s", citation_list)
+        except LoadShedError:
+            return self._shed_result(query, context, citation_list)
+        except Exception as e:
+            return self._cited_error_result(query, e, citation_list)
+    
+    async def astream_response_with_citations(self, query: str):
+        """Streaming variant: returns (citation_list, async iterator of answer text)"""
+        sources = await run_blocking(self.hybrid_retrieval, query, 5)
+        
+        if not sources:
+            return [], iterate_once(self._no_sources_result(query)['answer'])
+        
+        context, citation_list = self._build_cited_context(sources)
+        return citation_list, shed_to(astream_chat_completion(
+            messages=self._citation_messages(query, context),
+            temperature=0.3,
+            max_tokens=400
+        ), lambda: enhanced_rag_response(query, context))
+    
+    async def _achat(self, messages):
+        return await achat_completion(
+            messages=messages,
+            temperature=0.3,
+            max_tokens=400
+        )
+    
+    def _build_cited_context(self, sources: List[DocumentSource]):
+        """Context string with [Source N] markers, plus the matching citation list"""
         context_parts = []
         citation_list = []
         
-        for i, source in enumerate(sources, 1):
-            # Truncate content for context
-            content_preview = source.content[:300] + "..." if len(source.content) > 300 else source.content
-            context_parts.append(f"[Source {i}] {content_preview}")
+        # Pack sources (ranked) into the token budget; only packed sources get cited
+        with stage_timer('prompt_build'):
+            packed = pack_passages([source.content for source in sources], DYNAMIC_RAG_CONTEXT_TOKENS)
+        
+        for i, (index, content) in enumerate(packed.items, 1):
+            source = sources[index]
+            context_parts.append(f"[Source {i}] {content}")
             
             citation_list.append({
                 'id': i,
@@ -213,54 +401,52 @@ class DynamicRAGSystem:
             })
         
         context = "\n\n".join(context_parts)
-        
-        # Step 3: Generate response with Sarvam AI
-        system_prompt = """You are BillMart FinTech's regulatory compliance assistant with access to both internal knowledge and latest regulatory updates.
-
-INSTRUCTIONS:
-1. Answer using ONLY the provided sources
-2. Include inline citations [Source X] for every factual claim
-3. Prioritize recent regulatory updates over older information
-4. Structure your response professionally
-5. If sources conflict, mention the discrepancy
-6. Keep response under 300 words
-
-CONTEXT WITH SOURCES:
-{context}
-
-Provide a comprehensive answer with proper citations."""
-
-        try:
-            response = self.sarvam_client.chat.completions(
-                messages=[
-                    {"role": "system", "content": system_prompt.format(context=context)},
-                    {"role": "user", "content": query}
-                ],
-                temperature=0.3,
-                max_tokens=400
-            )
-            
-            answer = response.choices[0].message.content.strip()
-            
-            return {
-                'answer': answer,
-                'sources': citation_list,
-                'query': query,
-                'generated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'source_types': {
-                    'internal': len([s for s in sources if s.doc_type == 'internal']),
-                    'web': len([s for s in sources if s.doc_type == 'web']),
-                    'pdf': len([s for s in sources if s.doc_type == 'pdf'])
-                }
-            }
-            
-        except Exception as e:
-            return {
-                'answer': f"Error generating response: {e}",
-                'sources': citation_list,
-                'query': query,
-                'error': str(e)
+        log_usage('dynamic_rag', packed, count_message_tokens(self._citation_messages("", context)))
+        return context, citation_list
+    
+    def _citation_messages(self, query: str, context: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self.CITATION_SYSTEM_PROMPT.format(context=context)},
+            {"role": "user", "content": query}
+        ]
+    
+    def _no_sources_result(self, query: str) -> Dict[str, Any]:
+        return {
+            'answer': "I couldn't find relevant information for this query. Please contact BillMart support.",
+            'sources': [],
+            'query': query
+        }
+    
+    def _cited_result(self, query, answer, citation_list, sources, messages) -> Dict[str, Any]:
+        return {
+            'answer': answer,
+            'sources': citation_list,
+            'query': query,
+            'generated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'prompt_tokens': count_message_tokens(messages),
+            'source_types': {
+                'internal': len([s for s in sources if s.doc_type == 'internal']),
+                'web': len([s for s in sources if s.doc_type == 'web']),
+                'pdf': len([s for s in sources if s.doc_type == 'pdf'])
             }
+        }
+    
+    def _shed_result(self, query, context, citation_list) -> Dict[str, Any]:
+        """Extractive answer from the cited context when the LLM call was shed"""
+        return {
+            'answer': enhanced_rag_response(query, context),
+            'sources': citation_list,
+            'query': query,
+            'shed': True
+        }
+    
+    def _cited_error_result(self, query, error, citation_list) -> Dict[str, Any]:
+        return {
+            'answer': f"Error generating response: {error}",
+            'sources': citation_list,
+            'query': query,
+            'error': str(error)
+        }
 
 # Test the system
 if __name__ == "__main__":
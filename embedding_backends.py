@@ -0,0 +1,148 @@
+# actions/embedding_backends.py
+"""
+Embedding backends behind embedding_service.SharedEmbedder.
+
+- sentence_transformers: the PyTorch SentenceTransformer (default)
+- onnx:                  an int8-quantized ONNX export of the same model,
+                         run by onnxruntime with the fast tokenizer; no
+                         torch import at serve time, a fraction of the
+                         RSS and faster single-query encodes on CPU
+
+Build the ONNX export and check it against the PyTorch vectors with
+onnx_embedder.py. The backend is chosen with EMBEDDING_BACKEND (env
+BILLMART_EMBEDDING_BACKEND); others can be added with
+register_embedding_backend().
+"""
+import os
+import json
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from .fallback_config import EMBEDDING_BACKEND, ONNX_EMBEDDING_DIR, ONNX_INTRA_OP_THREADS
+
+
+class EmbeddingBackend(ABC):
+    """Turns a batch of texts into a float32 matrix, one row per text."""
+
+    name = None
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    @abstractmethod
+    def encode(self, texts: List[str], batch_size: int = 32, **kwargs) -> np.ndarray:
+        """Embeddings of texts, in order."""
+
+    @property
+    @abstractmethod
+    def dimension(self) -> int:
+        """Length of each embedding."""
+
+    @property
+    def model_id(self) -> str:
+        """Identifies the vectors produced; persisted indexes are rebuilt when it changes."""
+        return self.model_name
+
+
+# ===== PYTORCH =====
+class SentenceTransformerBackend(EmbeddingBackend):
+    name = 'sentence_transformers'
+
+    def __init__(self, model_name: str):
+        super().__init__(model_name)
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        return np.asarray(self.model.encode(texts, batch_size=batch_size, **kwargs), dtype=np.float32)
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+
+# ===== ONNX =====
+class OnnxBackend(EmbeddingBackend):
+    """
+    int8 ONNX export in ONNX_EMBEDDING_DIR:
+        model_int8.onnx   transformer graph, output last_hidden_state
+        tokenizer.json    the model's fast tokenizer
+        embedder.json     model name, max_length, pooling/normalize settings
+    Mean pooling and L2 normalization are done here, as in the
+    SentenceTransformer pipeline.
+    """
+
+    name = 'onnx'
+    MODEL_FILE = 'model_int8.onnx'
+    TOKENIZER_FILE = 'tokenizer.json'
+    CONFIG_FILE = 'embedder.json'
+
+    def __init__(self, model_name: str, model_dir: str = ONNX_EMBEDDING_DIR, threads: int = ONNX_INTRA_OP_THREADS):
+        super().__init__(model_name)
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, self.CONFIG_FILE), 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+        if self.config.get('model') != model_name:
+            raise ValueError(f"ONNX export in {model_dir} is of {self.config.get('model')}, not {model_name}")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, self.MODEL_FILE), options, providers=['CPUExecutionProvider']
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, self.TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.config['max_length'])
+        self.tokenizer.enable_padding(pad_id=self.config['pad_id'], pad_token=self.config['pad_token'])
+        print(f"✅ ONNX embedder loaded from {model_dir} ({threads} thread(s))")
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(list(texts[start:start + batch_size]))
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {
+                'input_ids': input_ids,
+                'attention_mask': attention_mask,
+                'token_type_ids': np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            hidden = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            if self.config.get('normalize', True):
+                pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+            batches.append(pooled.astype(np.float32))
+        return np.concatenate(batches) if batches else np.zeros((0, self.dimension), dtype=np.float32)
+
+    @property
+    def dimension(self) -> int:
+        return self.config['dimension']
+
+    @property
+    def model_id(self) -> str:
+        return f"{self.model_name}+onnx-{self.config.get('quantization', 'int8')}"
+
+
+# ===== REGISTRY =====
+_BACKENDS: Dict[str, Callable[[str], EmbeddingBackend]] = {
+    'sentence_transformers': SentenceTransformerBackend,
+    'onnx': OnnxBackend,
+}
+
+
+def register_embedding_backend(name: str, factory: Callable[[str], EmbeddingBackend]):
+    _BACKENDS[name] = factory
+
+
+def create_embedding_backend(model_name: str, name: str = EMBEDDING_BACKEND) -> EmbeddingBackend:
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{name}' (available: {', '.join(sorted(_BACKENDS))})")
+    return _BACKENDS[name](model_name)
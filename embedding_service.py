@@ -0,0 +1,111 @@
+# actions/embedding_service.py
+"""
+Process-wide sentence embedder shared by every fallback engine.
+
+A single embedding model is loaded per process and fronted by a bounded
+LRU cache keyed by normalized text, so static_rag and dynamic_rag share both
+the model weights and any query/document embeddings already computed. The
+model runs on the EMBEDDING_BACKEND of embedding_backends.py (PyTorch or
+int8 ONNX).
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Union
+
+import numpy as np
+
+from .async_utils import run_blocking
+from .metrics import get_metrics, cache_stats_collector
+from .embedding_backends import create_embedding_backend
+from .fallback_config import EMBEDDING_MODEL, EMBEDDING_CACHE_SIZE, EMBEDDING_BACKEND
+
+
+def normalize_text(text: str) -> str:
+    """Cache key for a text. all-MiniLM-L6-v2 is uncased, so this is lossless."""
+    return " ".join(text.lower().split())
+
+
+class SharedEmbedder:
+    """Thread-safe embedding model wrapper with an LRU embedding cache."""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, cache_size: int = EMBEDDING_CACHE_SIZE,
+                 backend: str = EMBEDDING_BACKEND):
+        print(f"🔄 Loading shared embedder: {model_name} ({backend})")
+        self.model_name = model_name
+        self.model = create_embedding_backend(model_name, backend)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, texts: Union[str, List[str]], **kwargs) -> np.ndarray:
+        """Drop-in for SentenceTransformer.encode that serves repeats from cache."""
+        if isinstance(texts, str):
+            return self.encode([texts], **kwargs)[0]
+
+        keys = [normalize_text(t) for t in texts]
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._cache.get(key)
+                if vector is not None:
+                    self._cache.move_to_end(key)
+                    found[key] = vector
+            missing = [k for k in dict.fromkeys(keys) if k not in found]
+            hit_count = sum(1 for k in keys if k in found)
+            self.hits += hit_count
+            self.misses += len(keys) - hit_count
+
+        if missing:
+            vectors = np.asarray(self.model.encode(missing, **kwargs), dtype=np.float32)
+            with self._lock:
+                for key, vector in zip(missing, vectors):
+                    vector.setflags(write=False)
+                    found[key] = vector
+                    self._cache[key] = vector
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        if not keys:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.stack([found[k] for k in keys])
+
+    async def aencode(self, texts: Union[str, List[str]], **kwargs) -> np.ndarray:
+        """encode() on the shared worker pool, for use from async actions."""
+        return await run_blocking(self.encode, texts, **kwargs)
+
+    @property
+    def dimension(self) -> int:
+        return self.model.dimension
+
+    @property
+    def model_id(self) -> str:
+        """Name persisted embedding indexes are built under (model + backend)."""
+        return self.model.model_id
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Cache hit/miss counters for logging."""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0
+        }
+
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder() -> SharedEmbedder:
+    """Return the process-wide embedder, loading the model on first use."""
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                _embedder = SharedEmbedder()
+                get_metrics().add_collector(cache_stats_collector('embedding', _embedder.stats))
+    return _embedder
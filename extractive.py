@@ -0,0 +1,160 @@
+# actions/extractive.py
+"""
+Extractive answers built from the knowledge base, no LLM involved.
+
+Used when the LLM is unavailable, failed, missed its answer deadline, or was
+shed because the request's deadline could not be met (see rate_limiter.py).
+
+SentenceIndex keeps one embedding per KB sentence as a normalized float16
+(or int8) matrix. Answering is a single matrix-vector product, a top-k
+partition and MMR over the candidates, so the most relevant - and not
+repetitive - sentences are found in a few milliseconds.
+"""
+import os
+import re
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from .vector_store import EmbeddingStore
+from .kb_chunker import humanize
+from .fallback_config import (
+    EMBEDDING_MODEL, VECTOR_INDEX_DIR, EXTRACTIVE_MATRIX_DTYPE, EXTRACTIVE_SENTENCES,
+    EXTRACTIVE_CANDIDATES, EXTRACTIVE_MMR_LAMBDA, EXTRACTIVE_MIN_SENTENCE_CHARS
+)
+
+# Sentence ends: . ! or ? followed by whitespace and a capital or digit
+# (keeps "www.billmart.com" and "Rs 2.5" in one piece)
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9])')
+
+
+def split_sentences(text: str, min_chars: int = EXTRACTIVE_MIN_SENTENCE_CHARS) -> List[str]:
+    sentences = []
+    for line in text.splitlines():
+        for sentence in SENTENCE_END.split(line):
+            sentence = sentence.strip(' -•\t')
+            if len(sentence) > min_chars:
+                sentences.append(sentence)
+    return sentences
+
+
+def mmr(query_scores: np.ndarray, vectors: np.ndarray, k: int, lambda_: float = EXTRACTIVE_MMR_LAMBDA) -> List[int]:
+    """
+    Maximal marginal relevance: positions of k rows, each maximising
+    lambda * relevance - (1 - lambda) * similarity to the rows already picked.
+    """
+    similarity = vectors @ vectors.T
+    picked: List[int] = []
+    redundancy = np.full(len(query_scores), -np.inf, dtype=np.float32)
+    for _ in range(min(k, len(query_scores))):
+        gain = lambda_ * query_scores - (1 - lambda_) * np.maximum(redundancy, 0)
+        gain[picked] = -np.inf
+        best = int(np.argmax(gain))
+        picked.append(best)
+        redundancy = np.maximum(redundancy, similarity[best])
+    return picked
+
+
+class SentenceIndex:
+    """Normalized sentence embeddings of the whole KB, for LLM-free answers."""
+
+    def __init__(self, model_id: str = EMBEDDING_MODEL, dtype: str = EXTRACTIVE_MATRIX_DTYPE):
+        if dtype not in ('float16', 'int8'):
+            raise ValueError(f"EXTRACTIVE_MATRIX_DTYPE must be 'float16' or 'int8', not '{dtype}'")
+        self.dtype = dtype
+        self.sentences: List[str] = []
+        self.matrix: Optional[np.ndarray] = None
+        self.store = EmbeddingStore(os.path.join(VECTOR_INDEX_DIR, 'sentences'), model_id)
+
+    def build(self, docs: Sequence[dict], encode: Callable[[List[str]], np.ndarray]):
+        """
+        Split docs ({'content': "Header > path\\nbody"}) into sentences and embed
+        each as "<section>: <sentence>" so short sentences keep their topic.
+        Only sentences not embedded on a previous run go through the model.
+        """
+        sentences, texts, seen = [], [], set()
+        for doc in docs:
+            header, _, body = doc['content'].partition('\n')
+            section = humanize(header.split(' > ')[-1]) if body else ""
+            for sentence in split_sentences(body or header):
+                if sentence in seen:
+                    continue
+                seen.add(sentence)
+                sentences.append(sentence)
+                texts.append(f"{section}: {sentence}" if section else sentence)
+
+        vectors = self.store.embed(texts, encode) if texts else np.zeros((0, 1), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+        if self.dtype == 'int8':
+            matrix = np.round(vectors * 127).astype(np.int8)
+        else:
+            matrix = vectors.astype(np.float16)
+        self.sentences, self.matrix = sentences, matrix
+        print(f"✅ Extractive index: {len(sentences)} sentences ({matrix.nbytes / 1024:.0f} KB {self.dtype})")
+
+    def top_sentences(self, query_vector: np.ndarray, k: int = EXTRACTIVE_SENTENCES,
+                      candidates: int = EXTRACTIVE_CANDIDATES) -> List[str]:
+        """The k most relevant, mutually diverse KB sentences for the query, in relevance order."""
+        if self.matrix is None or not len(self.sentences):
+            return []
+        query = np.asarray(query_vector, dtype=np.float32).ravel()
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        # One mixed-precision product; numpy upcasts the rows to float32 as it goes
+        scores = np.dot(self.matrix, query)
+        if self.dtype == 'int8':
+            scores = scores / 127
+
+        candidates = min(candidates, len(scores))
+        top = np.argpartition(-scores, candidates - 1)[:candidates]
+        top = top[np.argsort(-scores[top])]
+        vectors = self.matrix[top].astype(np.float32)
+        if self.dtype == 'int8':
+            vectors /= 127
+        picked = mmr(scores[top].astype(np.float32), vectors, k)
+        return [self.sentences[top[i]] for i in picked]
+
+
+def enhanced_rag_response(query, context, sentences=None):
+    """Enhanced RAG response generator - Always works as fallback
+
+    sentences: key points already chosen (e.g. by SentenceIndex); by default
+    the first sentences of the context are used.
+    """
+    query_lower = query.lower()
+    
+    if 'rbi' in query_lower and 'scf' in query_lower:
+        intro = "🏛️ RBI Regulations for Supply Chain Finance:"
+    elif 'empcash' in query_lower or 'gigcash' in query_lower:
+        intro = "💰 Employee & Gig Worker Financing:"
+    elif 'eligibility' in query_lower:
+        intro = "✅ Eligibility Requirements:"
+    elif 'loan' in query_lower:
+        intro = "🏦 Loan Information:"
+    else:
+        intro = "📋 BillMart Financial Services:"
+    
+    # Extract key sentences from context
+    if sentences is None:
+        sentences = [s.strip() for s in context.split('.') if s.strip() and len(s.strip()) > 20]
+    
+    response_parts = [
+        intro,
+        ""
+    ]
+    
+    # Add top 3 most relevant points
+    for i, info in enumerate(sentences[:3], 1):
+        info = info.strip()
+        response_parts.append(f"{i}. {info}" if info.endswith(('.', '!', '?')) else f"{i}. {info}.")
+    
+    response_parts.extend([
+        "",
+        "💬 Need personalized assistance?",
+        "📧 care@billmart.com",
+        "📞 +91 93269 46663",
+        "🌐 www.billmart.com"
+    ])
+    
+    return "\n".join(response_parts)
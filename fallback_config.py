@@ -13,3 +13,166 @@ CONFIDENCE_THRESHOLD = 0.6
 
 # Master on/off switch
 FALLBACK_ENABLED = True
+
+# ===== KNOWLEDGE BASE / INDEX =====
+# JSON knowledge files indexed by the RAG fallbacks
+KNOWLEDGE_FILES = [
+    'data/billmart_complete_knowledge.json',
+    'data/knowledge_base.json'
+]
+
+# Sentence embedding model used for the knowledge base and queries
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+
+# How it is run: 'sentence_transformers' (PyTorch) or 'onnx' (int8 export run
+# by onnxruntime, no torch at serve time; see embedding_backends.py). Build the
+# export with: python -m actions.onnx_embedder export
+EMBEDDING_BACKEND = os.getenv('BILLMART_EMBEDDING_BACKEND', 'sentence_transformers')
+ONNX_EMBEDDING_DIR = os.getenv('BILLMART_ONNX_EMBEDDING_DIR', '.onnx/all-MiniLM-L6-v2-int8')
+ONNX_INTRA_OP_THREADS = 1         # per encode call; the worker pool runs calls in parallel
+
+# Where content-hashed document embeddings are persisted between restarts
+VECTOR_INDEX_DIR = os.getenv('BILLMART_VECTOR_INDEX_DIR', '.vector_index')
+
+# Max query/document embeddings kept in the shared embedder's LRU cache
+EMBEDDING_CACHE_SIZE = 10000
+
+# Documents embedded and written to the vector store per batch at startup
+INGEST_BATCH_SIZE = 64
+
+# Knowledge files are split into path-labelled chunks of at most this many
+# (estimated) tokens, with some overlap when a single field has to be split
+KB_CHUNK_TOKENS = 200
+KB_CHUNK_OVERLAP = 30
+
+# ===== KNOWLEDGE BASE HOT RELOAD =====
+# Watch KNOWLEDGE_FILES and re-index only the chunks that changed into the
+# running engines, so KB edits go live without restarting (kb_reloader.py)
+KB_RELOAD_ENABLED = os.getenv('BILLMART_KB_RELOAD', '1') == '1'
+KB_RELOAD_CHECK_SECONDS = float(os.getenv('BILLMART_KB_RELOAD_SECONDS', '2'))
+
+# ===== PROMPT CONTEXT BUDGETS =====
+# Estimated tokens of retrieved context packed into each engine's prompt
+STATIC_RAG_CONTEXT_TOKENS = 400
+DYNAMIC_RAG_CONTEXT_TOKENS = 500
+DYNAMIC_LLM_CONTEXT_TOKENS = 120
+# Passages this similar (term Jaccard) to an already packed one are skipped
+PROMPT_DEDUP_OVERLAP = 0.8
+# Don't bother trimming a passage into less than this many leftover tokens
+PROMPT_MIN_TRIM_TOKENS = 24
+
+# ===== HYBRID RETRIEVAL (static_rag) =====
+# Fuse BM25 keyword hits with vector hits; False = vector search only
+HYBRID_RETRIEVAL_ENABLED = True
+RETRIEVAL_TOP_K = 3               # documents put into the prompt
+LEXICAL_CANDIDATES = 10           # BM25 hits considered for fusion
+VECTOR_CANDIDATES = 10            # vector hits considered for fusion
+RRF_K = 60                        # reciprocal rank fusion constant
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# ===== EXTRACTIVE ANSWERS (static_rag) =====
+# Answers given without the LLM are picked from a precomputed sentence
+# embedding matrix over the whole KB (see extractive.SentenceIndex)
+EXTRACTIVE_INDEX_ENABLED = True
+EXTRACTIVE_MATRIX_DTYPE = 'float16'  # 'float16' or 'int8'
+EXTRACTIVE_SENTENCES = 3             # sentences in the answer
+EXTRACTIVE_CANDIDATES = 20           # top-scoring sentences MMR picks from
+EXTRACTIVE_MMR_LAMBDA = 0.7          # 1 = relevance only, 0 = diversity only
+EXTRACTIVE_MIN_SENTENCE_CHARS = 20
+
+# ===== INTENT RESCUE =====
+# Before the LLM fallback, a message close enough to one intent's NLU
+# examples (nearest neighbours by embedding) runs that intent's rule action
+# instead (see intent_rescue.py). Only runs while the fallback itself is on
+# (FALLBACK_ENABLED and ACTIVE_FALLBACK != 'none')
+INTENT_RESCUE_ENABLED = True
+# Directory with nlu.yml, enhanced_nlu.yml, rules.yml and stories.yml
+NLU_DATA_DIR = os.getenv('BILLMART_NLU_DATA_DIR', os.path.dirname(os.path.abspath(__file__)))
+INTENT_RESCUE_NEIGHBOURS = 5         # examples that vote
+INTENT_RESCUE_THRESHOLD = 0.80       # cosine a neighbour needs to vote
+INTENT_RESCUE_MIN_AGREEMENT = 0.7    # share of the votes (similarity-weighted) the winning intent needs
+# Context-dependent or open-ended intents are never rescued to
+INTENT_RESCUE_EXCLUDED_INTENTS = ('nlu_fallback', 'affirm', 'deny', 'complex_query')
+
+# ===== PRODUCT RESPONSES =====
+# Copy for the action_provide_*_info actions; reloaded when the file changes
+RESPONSE_REGISTRY_FILE = os.getenv(
+    'BILLMART_RESPONSES_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'product_responses.json')
+)
+RESPONSE_RELOAD_CHECK_SECONDS = 2
+
+# ===== SEMANTIC ANSWER CACHE =====
+# Serve near-identical fallback questions from cache instead of the LLM
+SEMANTIC_CACHE_ENABLED = True
+SEMANTIC_CACHE_THRESHOLD = 0.92      # cosine similarity needed for a hit
+SEMANTIC_CACHE_TTL_SECONDS = 3600
+SEMANTIC_CACHE_MAX_ENTRIES = 2000
+
+# ===== ASYNC FALLBACK PATH =====
+# Seconds allowed for a single LLM call before it is cancelled
+LLM_TIMEOUT_SECONDS = 20
+# Seconds allowed for the whole fallback turn (retrieval + retries + LLM)
+FALLBACK_TIMEOUT_SECONDS = 30
+# Threads used for blocking embedding / vector-store work
+BLOCKING_WORKERS = 4
+# Concurrent identical queries (same mode, same normalized text) share one
+# retrieval + LLM computation instead of each making their own (single_flight.py)
+FALLBACK_COALESCING_ENABLED = True
+
+# ===== LATENCY SLO (static_rag) =====
+# Answer within ANSWER_DEADLINE_SECONDS of the question: if the LLM isn't done
+# by then the extractive answer is sent, and the LLM answer only warms the
+# semantic cache when it lands
+LATENCY_SLO_ENABLED = os.getenv('BILLMART_LATENCY_SLO', '0') == '1'
+ANSWER_DEADLINE_SECONDS = float(os.getenv('BILLMART_ANSWER_DEADLINE', '4'))
+
+# ===== LLM BACKEND =====
+# 'sarvam' (live API) or 'mock' (mock_llm_server.py, for offline load tests); see llm_backends.py
+LLM_BACKEND = os.getenv('BILLMART_LLM_BACKEND', 'sarvam')
+MOCK_LLM_URL = os.getenv('BILLMART_MOCK_LLM_URL', 'http://127.0.0.1:8765')
+
+# ===== LLM RATE LIMITING =====
+# Provider quota the scheduler paces calls to (see rate_limiter.py)
+LLM_RATE_LIMIT_RPS = float(os.getenv('BILLMART_LLM_RPS', '2'))
+LLM_RATE_BURST = 4                 # calls allowed back to back
+LLM_MIN_RATE_RPS = 0.2             # floor after repeated 429s
+LLM_MAX_ATTEMPTS = 4               # per call, first try included
+LLM_BACKOFF_BASE_SECONDS = 0.5     # full-jitter backoff: up to base * 2^attempt
+LLM_BACKOFF_CAP_SECONDS = 8
+# Deadline for LLM calls made outside a fallback turn (tests, scripts)
+LLM_DEADLINE_SECONDS = 25
+# A fallback turn gives the LLM its budget minus this, leaving time to answer extractively
+LLM_SHED_MARGIN_SECONDS = 2
+
+# ===== SARVAM CLIENT POOL =====
+LLM_MAX_CONNECTIONS = 20          # open HTTP connections to the LLM API
+LLM_MAX_KEEPALIVE = 10            # idle connections kept warm for reuse
+LLM_KEEPALIVE_EXPIRY = 30         # seconds an idle connection is kept
+LLM_MAX_CONCURRENCY = 8           # in-flight LLM calls per worker
+
+# ===== METRICS =====
+# Latency histograms, cache hit rates and error counts (see metrics.py)
+METRICS_ENABLED = True
+# GET http://METRICS_HOST:METRICS_PORT/metrics ; off unless BILLMART_METRICS_PORT
+# is set. Set it for the action server only, not for the Rasa server, the
+# benchmark or CLI tests that import the same modules
+METRICS_PORT = int(os.getenv('BILLMART_METRICS_PORT', '0'))
+METRICS_HOST = os.getenv('BILLMART_METRICS_HOST', '127.0.0.1')
+# Also write the same text to this file every METRICS_EXPORT_SECONDS (unset = off)
+METRICS_FILE = os.getenv('BILLMART_METRICS_FILE')
+METRICS_EXPORT_SECONDS = 15
+# Latency histogram bucket bounds, seconds
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30)
+
+# ===== STREAMING =====
+# Stream fallback answers token-by-token to clients of the streaming channel
+STREAMING_ENABLED = True
+# input_channel name of streaming_channel.StreamingRestInput
+STREAM_CHANNEL_NAME = 'stream'
+# Streamed answers are generated by the action server on this route
+# (stream_endpoint.py); the channel in the Rasa server relays them from
+# STREAM_ENDPOINT_URL, next to action_endpoint in endpoints.yml
+STREAM_ENDPOINT_PATH = '/stream_fallback'
+STREAM_ENDPOINT_URL = os.getenv('BILLMART_STREAM_ENDPOINT_URL', 'http://localhost:5055' + STREAM_ENDPOINT_PATH)
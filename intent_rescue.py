@@ -0,0 +1,121 @@
+# actions/intent_rescue.py
+"""
+Nearest-neighbour intent rescue for messages the NLU gave up on.
+
+Many messages that trip the FallbackClassifier are paraphrases of NLU
+training examples. Every example of an intent that a rule answers (see
+nlu_data.load_rule_actions) is embedded once into a normalized matrix; a
+fallback message is scored against it with one matrix-vector product. Of
+its INTENT_RESCUE_NEIGHBOURS nearest examples, those within
+INTENT_RESCUE_THRESHOLD vote, weighted by similarity; if one intent holds
+INTENT_RESCUE_MIN_AGREEMENT of that vote, ActionLLMFallback runs the
+intent's action instead of calling the LLM.
+"""
+import os
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .embedding_service import get_embedder
+from .vector_store import EmbeddingStore
+from .nlu_data import load_examples, load_rule_actions
+from .metrics import get_metrics, cache_stats_collector
+from .fallback_config import (
+    VECTOR_INDEX_DIR, NLU_DATA_DIR, INTENT_RESCUE_NEIGHBOURS, INTENT_RESCUE_THRESHOLD,
+    INTENT_RESCUE_MIN_AGREEMENT, INTENT_RESCUE_EXCLUDED_INTENTS
+)
+
+logger = logging.getLogger(__name__)
+
+
+class IntentRescuer:
+    """kNN index over the NLU examples of rule-answered intents."""
+
+    def __init__(self, data_dir: str = NLU_DATA_DIR):
+        self.embedder = get_embedder()
+        self.actions = {
+            intent: action for intent, action in load_rule_actions(data_dir).items()
+            if intent not in INTENT_RESCUE_EXCLUDED_INTENTS and action != 'action_llm_fallback'
+        }
+
+        texts, intents = [], []
+        for intent, examples in load_examples(data_dir).items():
+            if intent not in self.actions:
+                continue
+            for text, _ in examples:
+                texts.append(text)
+                intents.append(intent)
+        self.intents = np.array(intents)
+
+        store = EmbeddingStore(os.path.join(VECTOR_INDEX_DIR, 'nlu_examples'), self.embedder.model_id)
+        vectors = store.embed(texts, self.embedder.encode) if texts else np.zeros((0, 1), dtype=np.float32)
+        self.matrix = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+        self.hits = 0      # fallback messages rescued (LLM calls avoided)
+        self.misses = 0    # passed on to the LLM
+        # Nothing to vote with: every fallback goes to the LLM as before
+        self.enabled = bool(texts)
+        if self.enabled:
+            print(f"✅ Intent rescue index: {len(texts)} examples of {len(set(intents))} intents")
+        else:
+            logger.warning(f"⚠️ Intent rescue disabled: no rule-answered NLU examples found in {data_dir} "
+                           f"({len(self.actions)} rule intents; set BILLMART_NLU_DATA_DIR)")
+
+    def classify(self, query_vector: np.ndarray) -> Optional[Tuple[str, float]]:
+        """(intent, similarity of its nearest example) if the neighbours agree on one, else None"""
+        if not len(self.intents):
+            return None
+        query = np.asarray(query_vector, dtype=np.float32).ravel()
+        scores = self.matrix @ (query / max(float(np.linalg.norm(query)), 1e-12))
+
+        k = min(INTENT_RESCUE_NEIGHBOURS, len(scores))
+        nearest = np.argpartition(-scores, k - 1)[:k]
+        # Only close neighbours vote; far ones say nothing about the message
+        nearest = nearest[scores[nearest] >= INTENT_RESCUE_THRESHOLD]
+        if not len(nearest):
+            return None
+
+        votes: Dict[str, float] = {}
+        for i in nearest:
+            votes[self.intents[i]] = votes.get(self.intents[i], 0.0) + float(scores[i])
+        intent, weight = max(votes.items(), key=lambda item: item[1])
+        if weight < INTENT_RESCUE_MIN_AGREEMENT * sum(votes.values()):
+            return None
+        return intent, float(max(scores[i] for i in nearest if self.intents[i] == intent))
+
+    def rescue(self, query: str) -> Optional[Tuple[str, str, float]]:
+        """(intent, action, confidence) to run instead of the LLM fallback, or None"""
+        if not self.enabled:
+            return None
+        match = self.classify(self.embedder.encode(query))
+        if match is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        get_metrics().inc('billmart_llm_calls_avoided_total', reason='intent_rescue', intent=match[0])
+        return match[0], self.actions[match[0]], match[1]
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0
+        }
+
+
+_rescuer = None
+_rescuer_lock = threading.Lock()
+
+
+def get_intent_rescuer() -> IntentRescuer:
+    """Return the process-wide rescue index, embedding the NLU examples on first use."""
+    global _rescuer
+    if _rescuer is None:
+        with _rescuer_lock:
+            if _rescuer is None:
+                _rescuer = IntentRescuer()
+                get_metrics().add_collector(cache_stats_collector('intent_rescue', _rescuer.stats))
+    return _rescuer
@@ -0,0 +1,160 @@
+# actions/kb_chunker.py
+"""
+Structure-aware chunker for the JSON knowledge files.
+
+Instead of json.dumps-ing whole top-level sections (all of "products" as a
+single document), the nested JSON is walked and every node that fits the
+token budget becomes one chunk. Larger nodes are split along their
+structure: the node's own plain fields become one chunk and each nested
+object/list is chunked on its own. Every chunk starts with its path
+("Products > Vendor Finance > Faqs") so it still makes sense on its own, and
+text that is too long even for one field is windowed with token overlap.
+"""
+import os
+import re
+from dataclasses import dataclass
+from typing import Any, Iterator, List, Sequence
+
+from .fallback_config import KB_CHUNK_TOKENS, KB_CHUNK_OVERLAP
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+PIECE_PATTERN = re.compile(r"\S+\s*")
+
+# Keys that name a list item rather than describe it
+LABEL_KEYS = ('name', 'title', 'id')
+# Keys whose value is rendered without a "Key:" prefix
+BODY_KEYS = ('content', 'text')
+
+
+@dataclass
+class Chunk:
+    id: str       # stable, unique within the source file
+    path: str     # human readable location, e.g. "Products > Vendor Finance"
+    text: str     # path header + rendered content
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate: words and punctuation marks."""
+    return len(TOKEN_PATTERN.findall(text))
+
+
+def humanize(key: str) -> str:
+    """'rbiGuidelines' -> 'Rbi Guidelines', 'term_loan' -> 'Term Loan'"""
+    words = re.sub(r"([a-z])([A-Z])", r"\1 \2", str(key)).replace('_', ' ').split()
+    return " ".join(w[:1].upper() + w[1:] for w in words)
+
+
+def _is_plain(value: Any) -> bool:
+    """Scalar or list of scalars - rendered on a single line"""
+    if isinstance(value, list):
+        return all(not isinstance(v, (dict, list)) for v in value)
+    return not isinstance(value, dict)
+
+
+def _plain_text(value: Any) -> str:
+    if isinstance(value, list):
+        return "; ".join(str(v) for v in value)
+    return str(value)
+
+
+def _item_label(item: Any, index: int) -> str:
+    if isinstance(item, dict):
+        for key in LABEL_KEYS:
+            if isinstance(item.get(key), str) and item[key].strip():
+                return item[key].strip()
+    return f"#{index + 1}"
+
+
+def render(value: Any, indent: int = 0) -> List[str]:
+    """Render a JSON node as indented 'Key: value' lines."""
+    pad = "  " * indent
+    if isinstance(value, dict):
+        lines = []
+        for key, sub in value.items():
+            if key == 'id':
+                continue
+            if key in BODY_KEYS and _is_plain(sub):
+                lines.append(f"{pad}{_plain_text(sub)}")
+            elif _is_plain(sub):
+                lines.append(f"{pad}{humanize(key)}: {_plain_text(sub)}")
+            else:
+                lines.append(f"{pad}{humanize(key)}:")
+                lines.extend(render(sub, indent + 1))
+        return lines
+    if isinstance(value, list):
+        lines = []
+        for item in value:
+            sub = render(item, indent + 1)
+            if sub:
+                sub[0] = f"{pad}- {sub[0].lstrip()}"
+                lines.extend(sub)
+        return lines
+    return [f"{pad}{value}"]
+
+
+def split_tokens(text: str, max_tokens: int, overlap: int) -> List[str]:
+    """Window text into pieces of at most max_tokens, repeating `overlap` tokens between windows."""
+    pieces = PIECE_PATTERN.findall(text)
+    costs = [estimate_tokens(p) for p in pieces]
+    windows, start = [], 0
+    while start < len(pieces):
+        end, used = start, 0
+        while end < len(pieces) and (used + costs[end] <= max_tokens or end == start):
+            used += costs[end]
+            end += 1
+        windows.append("".join(pieces[start:end]).strip())
+        if end >= len(pieces):
+            break
+        # Step back over up to `overlap` tokens so context carries into the next window
+        back, carried = end, 0
+        while back > start + 1 and carried + costs[back - 1] <= overlap:
+            carried += costs[back - 1]
+            back -= 1
+        start = back
+    return windows
+
+
+class KnowledgeChunker:
+    """Walks a parsed knowledge file into path-labelled, token-bounded chunks."""
+
+    def __init__(self, max_tokens: int = KB_CHUNK_TOKENS, overlap: int = KB_CHUNK_OVERLAP):
+        self.max_tokens = max_tokens
+        self.overlap = min(overlap, max_tokens // 2)
+
+    def chunk(self, data: Any, source: str) -> List[Chunk]:
+        """Chunks for one parsed JSON file; `source` prefixes chunk ids."""
+        stem = os.path.splitext(os.path.basename(source))[0]
+        return list(self._walk(data, [humanize(stem)], [stem]))
+
+    def _walk(self, value: Any, labels: List[str], keys: List[str]) -> Iterator[Chunk]:
+        header = " > ".join(labels)
+        body = "\n".join(render(value))
+        if _is_plain(value) or estimate_tokens(header) + estimate_tokens(body) <= self.max_tokens:
+            yield from self._emit(header, body, keys)
+            return
+
+        if isinstance(value, dict):
+            plain = {k: v for k, v in value.items() if _is_plain(v)}
+            if plain:
+                yield from self._emit(header, "\n".join(render(plain)), keys)
+            for key, sub in value.items():
+                if key not in plain:
+                    yield from self._walk(sub, labels + [humanize(key)], keys + [str(key)])
+        else:
+            for index, item in enumerate(value):
+                yield from self._walk(item, labels + [_item_label(item, index)], keys + [str(index)])
+
+    def _emit(self, header: str, body: str, keys: Sequence[str]) -> Iterator[Chunk]:
+        if not body.strip():
+            return
+        budget = max(self.max_tokens - estimate_tokens(header), self.overlap + 1)
+        parts = split_tokens(body, budget, self.overlap)
+        base_id = ".".join(keys)
+        for n, part in enumerate(parts):
+            chunk_id = base_id if len(parts) == 1 else f"{base_id}#{n + 1}"
+            yield Chunk(id=chunk_id, path=header, text=f"{header}\n{part}")
+
+
+def chunk_knowledge(data: Any, source: str) -> List[Chunk]:
+    """Chunk a parsed knowledge file with the configured token budget."""
+    return KnowledgeChunker().chunk(data, source)
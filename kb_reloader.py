@@ -0,0 +1,133 @@
+# actions/kb_reloader.py
+"""
+Hot reload of the knowledge files behind the RAG fallbacks.
+
+A daemon thread stats KNOWLEDGE_FILES every KB_RELOAD_CHECK_SECONDS. When one
+of them changes, every watched engine re-reads and re-chunks the files and
+diffs the chunks against what it has indexed, by chunk id and content hash:
+only new or edited chunks are embedded and upserted into its vector
+collection, and chunks that disappeared are deleted. Queries are never
+paused - an engine builds its new state on the side and swaps it in with a
+single reference assignment. Once the served knowledge has changed the
+semantic answer cache is cleared. A broken edit (invalid JSON, file
+mid-rename) is reported and the previous knowledge keeps serving.
+"""
+import os
+import time
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from .fallback_config import KNOWLEDGE_FILES, KB_RELOAD_CHECK_SECONDS
+from .metrics import count_error, get_metrics
+from .semantic_cache import get_response_cache
+
+
+@dataclass
+class KnowledgeDiff:
+    """Chunk ids to (re)index and to drop, going from one KB version to the next."""
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(self.changed or self.removed)
+
+
+def diff_documents(indexed: Mapping[str, str], current: Mapping[str, str]) -> KnowledgeDiff:
+    """Compare {chunk id: content hash} of the indexed and the current KB."""
+    return KnowledgeDiff(
+        changed=[doc_id for doc_id, digest in current.items() if indexed.get(doc_id) != digest],
+        removed=[doc_id for doc_id in indexed if doc_id not in current]
+    )
+
+
+def knowledge_fingerprint(files: Sequence[str] = KNOWLEDGE_FILES) -> Tuple:
+    """(path, mtime, size) of every knowledge file; changes when any is edited."""
+    fingerprint = []
+    for path in files:
+        try:
+            stat = os.stat(path)
+            fingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            fingerprint.append((path, None, None))
+    return tuple(fingerprint)
+
+
+class KnowledgeWatcher:
+    """
+    Polls the knowledge files and calls reload_knowledge_base() on each
+    watched engine when they change. Engines return the KnowledgeDiff they
+    applied and raise to keep their previous knowledge. Create it before
+    loading an engine, so an edit made while the engine loads is picked up.
+    """
+
+    def __init__(self, files: Sequence[str] = KNOWLEDGE_FILES, check_interval: float = KB_RELOAD_CHECK_SECONDS):
+        self.files = list(files)
+        self.check_interval = check_interval
+        self._engines: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._fingerprint = knowledge_fingerprint(self.files)
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, name: str, engine):
+        """Keep engine's knowledge in sync with the files from now on."""
+        with self._lock:
+            self._engines[name] = engine
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='kb-reloader', daemon=True)
+                self._thread.start()
+                print(f"👀 Watching {len(self.files)} knowledge files for changes (every {self.check_interval:g}s)")
+
+    def _run(self):
+        while True:
+            time.sleep(self.check_interval)
+            try:
+                self.check()
+            except Exception as e:
+                print(f"❌ Knowledge base watcher error: {e}")
+
+    def check(self) -> bool:
+        """Reload the watched engines if a knowledge file changed; True if one did."""
+        with self._lock:
+            fingerprint = knowledge_fingerprint(self.files)
+            if fingerprint == self._fingerprint:
+                return False
+            changed_files = [new[0] for new, old in zip(fingerprint, self._fingerprint) if new != old]
+            # Recorded up front: a broken edit is retried on the next save, not every tick
+            self._fingerprint = fingerprint
+            engines = list(self._engines.items())
+
+        print(f"🔄 Knowledge files changed, re-indexing {len(engines)} engine(s)...")
+        reindexed = False
+        for name, engine in engines:
+            started = time.perf_counter()
+            try:
+                diff = engine.reload_knowledge_base()
+            except Exception as e:
+                count_error('kb_reload', e)
+                print(f"❌ Keeping previous {name} knowledge base, reload of {', '.join(changed_files)} failed: {e}")
+                continue
+            reindexed = reindexed or bool(diff)
+            get_metrics().inc('billmart_kb_reindexed_total', len(diff.changed), engine=name, op='upsert')
+            get_metrics().inc('billmart_kb_reindexed_total', len(diff.removed), engine=name, op='delete')
+            print(f"✅ {name} knowledge base reloaded: {len(diff.changed)} chunks upserted, "
+                  f"{len(diff.removed)} deleted in {(time.perf_counter() - started) * 1000:.0f} ms")
+        if reindexed:
+            # Cached answers were built from the old knowledge
+            get_response_cache().invalidate()
+            print("🔄 Knowledge base changed, cleared the semantic answer cache")
+        return True
+
+
+_watcher: Optional[KnowledgeWatcher] = None
+_watcher_lock = threading.Lock()
+
+
+def get_kb_watcher() -> KnowledgeWatcher:
+    """Process-wide watcher of KNOWLEDGE_FILES."""
+    global _watcher
+    if _watcher is None:
+        with _watcher_lock:
+            if _watcher is None:
+                _watcher = KnowledgeWatcher()
+    return _watcher
@@ -0,0 +1,102 @@
+# actions/keyword_matcher.py
+"""
+Aho-Corasick multi-keyword matcher used for product / user-type detection.
+
+All keywords of all categories are compiled into one automaton, so a message
+is scanned once no matter how many keywords there are. Matches only count on
+word boundaries: "gig" matches "gig worker" but not "gigabyte", and "rent"
+does not match "parent".
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+
+class KeywordMatcher:
+    """Compiled automaton over {category: [keywords]}; case-insensitive, word-bounded."""
+
+    def __init__(self, keyword_map: Dict[str, Iterable[str]]):
+        self.categories: List[str] = list(keyword_map)
+        # keyword -> categories it belongs to (a keyword may be listed under several)
+        self.keywords: List[str] = []
+        self.keyword_categories: List[Tuple[int, ...]] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        self._build(keyword_map)
+
+    def _build(self, keyword_map: Dict[str, Iterable[str]]):
+        owners: Dict[str, List[int]] = {}
+        for cat_idx, category in enumerate(self.categories):
+            for keyword in keyword_map[category]:
+                keyword = keyword.lower().strip()
+                if keyword and cat_idx not in owners.setdefault(keyword, []):
+                    owners[keyword].append(cat_idx)
+
+        for keyword, cats in owners.items():
+            kw_idx = len(self.keywords)
+            self.keywords.append(keyword)
+            self.keyword_categories.append(tuple(cats))
+            state = 0
+            for ch in keyword:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = nxt
+            self._output[state].append(kw_idx)
+
+        # Breadth-first failure links; outputs inherit the failure state's matches
+        # (depth-1 states fail to the root, which the list already holds)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._output[nxt].extend(self._output[self._fail[nxt]])
+
+    def find(self, text: str) -> Set[int]:
+        """Indices (into self.keywords) of keywords found in text on word boundaries."""
+        text = text.lower()
+        found: Set[int] = set()
+        state = 0
+        goto, fail, output, keywords = self._goto, self._fail, self._output, self.keywords
+        for pos, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for kw_idx in output[state]:
+                if kw_idx in found:
+                    continue
+                end = pos + 1
+                start = end - len(keywords[kw_idx])
+                if (start == 0 or not _is_word_char(text[start - 1])) and \
+                        (end == len(text) or not _is_word_char(text[end])):
+                    found.add(kw_idx)
+        return found
+
+    def scores(self, text: str) -> Dict[str, int]:
+        """{category: number of distinct keywords matched} for categories with at least one match."""
+        counts: Dict[int, int] = {}
+        for kw_idx in self.find(text):
+            for cat_idx in self.keyword_categories[kw_idx]:
+                counts[cat_idx] = counts.get(cat_idx, 0) + 1
+        # Keep definition order so ties resolve the same way as the keyword dict
+        return {self.categories[i]: counts[i] for i in sorted(counts)}
+
+    def best(self, text: str) -> Optional[str]:
+        """Highest scoring category (first defined wins ties), or None."""
+        scores = self.scores(text)
+        if not scores:
+            return None
+        return max(scores.items(), key=lambda x: x[1])[0]
@@ -0,0 +1,73 @@
+# actions/lexical_index.py
+"""
+Inverted BM25 index over the knowledge-base documents, plus reciprocal rank
+fusion for combining it with dense (embedding) results.
+
+MiniLM embeddings blur product acronyms such as SCF, ICF, LRD and NACH; an
+exact-term index catches those. BM25 weights are query independent, so they
+are computed once per (term, document) when the index is built and a search
+is just a sum over the posting lists of the query terms.
+"""
+import re
+import math
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Very common words that only add noise to the posting lists
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from how i in is it its me my of on
+or our the this to what when which who why will with you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased alphanumeric tokens without stopwords."""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """Precomputed Okapi BM25 inverted index."""
+
+    def __init__(self, texts: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.size = len(texts)
+        # term -> [(doc index, precomputed BM25 weight)]
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+        self._build(texts)
+
+    def _build(self, texts: Sequence[str]):
+        term_freqs = [Counter(tokenize(text)) for text in texts]
+        doc_lengths = [sum(tf.values()) for tf in term_freqs]
+        avg_length = (sum(doc_lengths) / self.size) if self.size else 0.0
+
+        doc_freq = Counter()
+        for tf in term_freqs:
+            doc_freq.update(tf.keys())
+
+        postings = defaultdict(list)
+        for doc_idx, tf in enumerate(term_freqs):
+            norm = self.k1 * (1 - self.b + self.b * doc_lengths[doc_idx] / avg_length) if avg_length else self.k1
+            for term, freq in tf.items():
+                idf = math.log(1 + (self.size - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+                postings[term].append((doc_idx, idf * freq * (self.k1 + 1) / (freq + norm)))
+        self.postings = dict(postings)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+        """Top-k (doc index, score) pairs for the query, best first."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term, count in Counter(tokenize(query)).items():
+            for doc_idx, weight in self.postings.get(term, ()):
+                scores[doc_idx] += weight * count
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """Fuse ranked lists of doc indices: score = sum of 1 / (k + rank)."""
+    fused: Dict[int, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_idx in enumerate(ranking, start=1):
+            fused[doc_idx] += 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,227 @@
+# actions/llm_backends.py
+"""
+LLM backends behind llm_client.
+
+A backend wraps the pooled httpx clients llm_client owns (and closes) in
+blocking and async clients. Both expose the part of the Sarvam SDK the
+engines use:
+
+    client.chat.completions(messages=..., temperature=..., max_tokens=..., stream=...)
+
+returning an object with .choices[0].message.content, or, with
+stream=True, an iterator of chunks carrying .choices[0].delta.content (an
+async iterator on the async client).
+
+- sarvam: the Sarvam API (default)
+- mock:   mock_llm_server.py at MOCK_LLM_URL, for offline load tests
+
+The backend is chosen with LLM_BACKEND (env BILLMART_LLM_BACKEND). Other
+backends can be added with register_backend().
+"""
+import os
+import json
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+import httpx
+
+from .fallback_config import LLM_BACKEND, MOCK_LLM_URL
+
+
+class LLMHTTPError(Exception):
+    """Non-2xx answer from an HTTP backend; status_code 429 is treated as a rate limit."""
+
+    def __init__(self, status_code: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(f"{status_code}: {message}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class LLMBackend(ABC):
+    """Factory for the clients llm_client keeps in its pools."""
+
+    name = None
+
+    @abstractmethod
+    def create_client(self, http: httpx.Client, timeout: float):
+        """Blocking client sending its requests through http."""
+
+    @abstractmethod
+    def create_async_client(self, http: httpx.AsyncClient, timeout: float):
+        """Async client sending its requests through http; created once per event loop."""
+
+    def is_configured(self) -> bool:
+        """False if calls cannot succeed (e.g. missing API key); engines then skip the LLM."""
+        return True
+
+
+# ===== SARVAM =====
+class SarvamBackend(LLMBackend):
+    name = 'sarvam'
+
+    def _api_key(self) -> str:
+        api_key = os.getenv("SARVAM_API_KEY")
+        if not api_key:
+            raise EnvironmentError("SARVAM_API_KEY not set in your environment.")
+        return api_key
+
+    def create_client(self, http, timeout):
+        from sarvamai import SarvamAI
+        return SarvamAI(
+            api_subscription_key=self._api_key(),
+            timeout=timeout,
+            httpx_client=http
+        )
+
+    def create_async_client(self, http, timeout):
+        from sarvamai import AsyncSarvamAI
+        return AsyncSarvamAI(
+            api_subscription_key=self._api_key(),
+            timeout=timeout,
+            httpx_client=http
+        )
+
+    def is_configured(self) -> bool:
+        return bool(os.getenv("SARVAM_API_KEY"))
+
+
+# ===== MOCK SERVER =====
+def _to_namespace(value: Any) -> Any:
+    """JSON -> attribute access, so responses look like SDK objects."""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _to_namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_to_namespace(v) for v in value]
+    return value
+
+
+def _raise_for_status(response: httpx.Response, body: str):
+    if response.status_code < 400:
+        return
+    retry_after = response.headers.get('Retry-After')
+    raise LLMHTTPError(
+        response.status_code,
+        "rate limit exceeded" if response.status_code == 429 else (body[:200] or response.reason_phrase),
+        float(retry_after) if retry_after else None
+    )
+
+
+def _payload(messages: List[Dict[str, str]], temperature: float, max_tokens: int, stream: bool) -> Dict[str, Any]:
+    return {'messages': messages, 'temperature': temperature, 'max_tokens': max_tokens, 'stream': stream}
+
+
+_DONE = object()
+
+
+def _sse_chunk(line: str) -> Any:
+    """Chunk in a server-sent events line 'data: {...}'; _DONE at 'data: [DONE]', None for other lines"""
+    if not line.startswith('data:'):
+        return None
+    data = line[5:].strip()
+    if data == '[DONE]':
+        return _DONE
+    event = json.loads(data)
+    if 'error' in event:
+        raise LLMHTTPError(event['error'].get('code', 500), event['error'].get('message', 'stream failed'))
+    return _to_namespace(event)
+
+
+class _MockCompletions:
+    def __init__(self, http: httpx.Client, url: str):
+        self._http = http
+        self._url = url
+
+    def __call__(self, messages, temperature=0.3, max_tokens=150, stream=False, request_options=None, **kwargs):
+        timeout = (request_options or {}).get('timeout_in_seconds')
+        request = self._http.build_request('POST', self._url, json=_payload(messages, temperature, max_tokens, stream),
+                                           **({'timeout': timeout} if timeout else {}))
+        if not stream:
+            response = self._http.send(request)
+            _raise_for_status(response, response.text)
+            return _to_namespace(response.json())
+
+        # Like the SDK: errors surface on the call, chunks while iterating
+        response = self._http.send(request, stream=True)
+        if response.status_code >= 400:
+            body = response.read().decode('utf-8', 'replace')
+            response.close()
+            _raise_for_status(response, body)
+        return self._chunks(response)
+
+    @staticmethod
+    def _chunks(response: httpx.Response) -> Iterator[Any]:
+        try:
+            for line in response.iter_lines():
+                chunk = _sse_chunk(line)
+                if chunk is _DONE:
+                    break
+                if chunk is not None:
+                    yield chunk
+        finally:
+            response.close()
+
+
+class _AsyncMockCompletions:
+    def __init__(self, http: httpx.AsyncClient, url: str):
+        self._http = http
+        self._url = url
+
+    async def __call__(self, messages, temperature=0.3, max_tokens=150, stream=False, **kwargs):
+        payload = _payload(messages, temperature, max_tokens, stream)
+        if not stream:
+            response = await self._http.post(self._url, json=payload)
+            _raise_for_status(response, response.text)
+            return _to_namespace(response.json())
+
+        # Like the SDK: errors surface when the call is awaited, chunks afterwards
+        response = await self._http.send(self._http.build_request('POST', self._url, json=payload), stream=True)
+        if response.status_code >= 400:
+            body = (await response.aread()).decode('utf-8', 'replace')
+            await response.aclose()
+            _raise_for_status(response, body)
+        return self._chunks(response)
+
+    @staticmethod
+    async def _chunks(response: httpx.Response) -> AsyncIterator[Any]:
+        try:
+            async for line in response.aiter_lines():
+                chunk = _sse_chunk(line)
+                if chunk is _DONE:
+                    break
+                if chunk is not None:
+                    yield chunk
+        finally:
+            await response.aclose()
+
+
+class MockBackend(LLMBackend):
+    """Talks to mock_llm_server.py (OpenAI-style /v1/chat/completions, SSE streaming)."""
+
+    name = 'mock'
+
+    def __init__(self, base_url: str = MOCK_LLM_URL):
+        self.url = base_url.rstrip('/') + '/v1/chat/completions'
+
+    def create_client(self, http, timeout):
+        return SimpleNamespace(chat=SimpleNamespace(completions=_MockCompletions(http, self.url)))
+
+    def create_async_client(self, http, timeout):
+        return SimpleNamespace(chat=SimpleNamespace(completions=_AsyncMockCompletions(http, self.url)))
+
+
+# ===== REGISTRY =====
+_BACKENDS: Dict[str, Callable[[], LLMBackend]] = {
+    'sarvam': SarvamBackend,
+    'mock': MockBackend,
+}
+
+
+def register_backend(name: str, factory: Callable[[], LLMBackend]):
+    _BACKENDS[name] = factory
+
+
+def create_backend(name: str = LLM_BACKEND) -> LLMBackend:
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{name}' (available: {', '.join(sorted(_BACKENDS))})")
+    return _BACKENDS[name]()
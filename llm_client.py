@@ -0,0 +1,227 @@
+# actions/llm_client.py
+"""
+Process-wide LLM client layer shared by every fallback mode.
+
+One sync client of the configured backend (Sarvam by default, see
+llm_backends.py) is kept per process and one async client per event loop,
+each on a pooled httpx client owned here, so HTTP keep-alive connections and
+TLS sessions are reused across requests. A loop's async client is closed by
+aclose_async_llm_client() (call it before an asyncio.run() ends), or dropped
+with the loop.
+Calls go through chat_completion / achat_completion, which queue for the
+provider quota (rate_limiter.py), then apply a concurrency limit and a
+per-call timeout capped by the request's deadline.
+"""
+import time
+import asyncio
+import weakref
+import threading
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional
+
+import httpx
+
+from .metrics import stage_timer, count_error
+from .llm_backends import LLMBackend, create_backend
+from .rate_limiter import get_scheduler, current_deadline, is_rate_limit_error
+from .fallback_config import (
+    LLM_TIMEOUT_SECONDS,
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_KEEPALIVE,
+    LLM_KEEPALIVE_EXPIRY,
+    LLM_MAX_CONCURRENCY
+)
+
+_client_lock = threading.Lock()
+_backend: Optional[LLMBackend] = None
+_sync_client: Any = None
+_sync_http: Optional[httpx.Client] = None
+_sync_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+
+
+class _AsyncPool(NamedTuple):
+    client: Any
+    http: httpx.AsyncClient
+    slots: asyncio.Semaphore
+
+
+# httpx.AsyncClient and asyncio.Semaphore are bound to the loop they are used on
+_async_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _AsyncPool]" = weakref.WeakKeyDictionary()
+
+
+def get_backend() -> LLMBackend:
+    """The LLM_BACKEND backend, created on first use."""
+    global _backend
+    if _backend is None:
+        with _client_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend: LLMBackend):
+    """Switch backend (benchmarks, load tests); pooled clients are closed and rebuilt on next use."""
+    global _backend, _sync_client, _sync_http
+    with _client_lock:
+        _backend = backend
+        if _sync_http is not None:
+            _sync_http.close()
+        _sync_client = _sync_http = None
+        pools = list(_async_pools.items())
+        _async_pools.clear()
+    for loop, pool in pools:
+        # Closed on the loop its connections belong to; one that has already ended can't be closed
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(pool.http.aclose(), loop)
+
+
+def llm_configured() -> bool:
+    """True if the backend can be called (for Sarvam: SARVAM_API_KEY is set)."""
+    return get_backend().is_configured()
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY
+    )
+
+
+def get_llm_client():
+    """Shared blocking client with a keep-alive connection pool."""
+    global _sync_client, _sync_http
+    backend = get_backend()
+    if _sync_client is None:
+        with _client_lock:
+            if _sync_client is None:
+                _sync_http = httpx.Client(limits=_pool_limits(), timeout=LLM_TIMEOUT_SECONDS)
+                _sync_client = backend.create_client(_sync_http, LLM_TIMEOUT_SECONDS)
+    return _sync_client
+
+
+def _async_pool() -> _AsyncPool:
+    """The running event loop's async client and concurrency slots."""
+    backend = get_backend()
+    loop = asyncio.get_running_loop()
+    pool = _async_pools.get(loop)
+    if pool is None:
+        with _client_lock:
+            pool = _async_pools.get(loop)
+            if pool is None:
+                http = httpx.AsyncClient(limits=_pool_limits(), timeout=LLM_TIMEOUT_SECONDS)
+                pool = _AsyncPool(backend.create_async_client(http, LLM_TIMEOUT_SECONDS), http,
+                                  asyncio.Semaphore(LLM_MAX_CONCURRENCY))
+                _async_pools[loop] = pool
+    return pool
+
+
+def get_async_llm_client():
+    """Shared async client for the running event loop."""
+    return _async_pool().client
+
+
+async def aclose_async_llm_client():
+    """Close the running loop's async client and its connections (e.g. at the end of an asyncio.run())."""
+    with _client_lock:
+        pool = _async_pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.http.aclose()
+
+
+def chat_completion(messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                    timeout: float = LLM_TIMEOUT_SECONDS):
+    """Blocking chat completion through the shared pool."""
+    client = get_llm_client()
+
+    def attempt(seconds_left: float):
+        with _sync_slots, stage_timer('llm'):
+            try:
+                return client.chat.completions(
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    request_options={"timeout_in_seconds": max(1, int(min(timeout, seconds_left)))}
+                )
+            except Exception as e:
+                count_error('llm', e)
+                raise
+
+    return get_scheduler().call(attempt)
+
+
+async def achat_completion(messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                           timeout: float = LLM_TIMEOUT_SECONDS):
+    """
+    Awaitable chat completion through the shared pool. Waits for the quota and
+    one of LLM_MAX_CONCURRENCY slots, then cancels the call after ``timeout``
+    seconds (or at the request's deadline, if sooner). 429s are retried by
+    the scheduler; rate_limiter.LoadShedError means the deadline can't be met.
+    """
+    pool = _async_pool()
+
+    async def attempt(seconds_left: float):
+        async with pool.slots:
+            with stage_timer('llm'):
+                try:
+                    return await asyncio.wait_for(
+                        pool.client.chat.completions(
+                            messages=messages,
+                            temperature=temperature,
+                            max_tokens=max_tokens
+                        ),
+                        timeout=min(timeout, seconds_left)
+                    )
+                except Exception as e:
+                    count_error('llm', e)
+                    raise
+
+    return await get_scheduler().acall(attempt)
+
+
+async def astream_chat_completion(messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                                  timeout: float = LLM_TIMEOUT_SECONDS) -> AsyncIterator[str]:
+    """
+    Stream a chat completion as text deltas. ``timeout`` bounds the wait for
+    the first chunk and for every chunk after it, not the whole answer.
+    A 429 on opening the stream is retried like achat_completion; once text
+    has been sent nothing is retried.
+    """
+    pool = _async_pool()
+    scheduler = get_scheduler()
+    deadline = current_deadline()
+    for attempt in range(scheduler.max_attempts):
+        await scheduler.acquire(deadline)
+        first = True
+        async with pool.slots:
+            with stage_timer('llm'):
+                try:
+                    started = time.monotonic()
+                    stream = await asyncio.wait_for(
+                        pool.client.chat.completions(
+                            messages=messages,
+                            temperature=temperature,
+                            max_tokens=max_tokens,
+                            stream=True
+                        ),
+                        timeout=timeout
+                    )
+                    chunks = stream.__aiter__()
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), timeout=timeout)
+                        except StopAsyncIteration:
+                            break
+                        if first:
+                            scheduler.on_success(time.monotonic() - started)
+                            first = False
+                        if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                            yield chunk.choices[0].delta.content
+                    return
+                except Exception as e:
+                    count_error('llm', e)
+                    if not first or not is_rate_limit_error(e):
+                        raise
+                    scheduler.on_rate_limited(e)
+                    backoff = scheduler.backoff(attempt, deadline)
+        # Back off outside the concurrency slot
+        await asyncio.sleep(backoff)
@@ -1,141 +1,241 @@
 import os
 import json
 import chromadb
-from sentence_transformers import SentenceTransformer
 import time
+import asyncio
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from dotenv import load_dotenv
-from sarvamai import SarvamAI
-from functools import wraps
+
+from .async_utils import run_blocking, FallbackText
+from .llm_client import chat_completion, achat_completion, astream_chat_completion, llm_configured
+from .fallback_config import (
+    KNOWLEDGE_FILES, VECTOR_INDEX_DIR, LLM_TIMEOUT_SECONDS,
+    HYBRID_RETRIEVAL_ENABLED, RETRIEVAL_TOP_K, LEXICAL_CANDIDATES, VECTOR_CANDIDATES,
+    RRF_K, BM25_K1, BM25_B, STATIC_RAG_CONTEXT_TOKENS,
+    LATENCY_SLO_ENABLED, ANSWER_DEADLINE_SECONDS, LLM_MAX_CONCURRENCY, EXTRACTIVE_INDEX_ENABLED
+)
+from .vector_store import EmbeddingStore, content_hash
+from .lexical_index import BM25Index, reciprocal_rank_fusion
+from .kb_chunker import chunk_knowledge
+from .prompt_builder import pack_passages, count_message_tokens, log_usage
+from .embedding_service import get_embedder
+from .extractive import enhanced_rag_response, SentenceIndex
+from .rate_limiter import LoadShedError
+from .metrics import stage_timer, observe_stage, count_error
+from .kb_reloader import diff_documents
 # Load API keys
 load_dotenv()
 
-def retry_on_rate_limit(max_retries=5, initial_wait=15):
-    """Decorator to handle rate limit errors with exponential backoff"""
-    def decorator_retry(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            wait_time = initial_wait
-            for attempt in range(max_retries):
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    error_str = str(e).lower()
-                    if 'rate limit' in error_str or '429' in error_str:
-                        print(f"⚠️ Rate limit hit! Retrying in {wait_time}s... (attempt {attempt+1}/{max_retries})")
-                        time.sleep(wait_time)
-                        wait_time *= 4  # Exponential backoff
-                    else:
-                        raise e
-            raise Exception(f"Max retries ({max_retries}) exceeded due to rate limiting")
-        return wrapper
-    return decorator_retry
+logger = logging.getLogger(__name__)
+
+
+def _answer_deadline(answer_deadline):
+    """Explicit deadline, else ANSWER_DEADLINE_SECONDS when the latency SLO is on, else None"""
+    if answer_deadline is None and LATENCY_SLO_ENABLED:
+        return ANSWER_DEADLINE_SECONDS
+    return answer_deadline
+
+
+class KnowledgeSnapshot:
+    """One indexed version of the knowledge base; never modified once built."""
+
+    __slots__ = ('docs', 'hashes', 'doc_positions', 'lexical_index', 'sentence_index')
+
+    def __init__(self, docs, hashes, sentence_index=None):
+        self.docs = docs
+        self.hashes = hashes      # chunk id -> content hash, diffed on reload
+        self.doc_positions = {doc['id']: idx for idx, doc in enumerate(docs)}
+        # Keyword index for acronyms/exact terms the embeddings miss
+        self.lexical_index = BM25Index([doc['content'] for doc in docs], k1=BM25_K1, b=BM25_B)
+        self.sentence_index = sentence_index
 
 class BillMartRAGFallback:
+    NO_CONTEXT_MESSAGE = "I can only provide information about BillMart's financial products. Please ask about our services like SCF, EmpCash, GigCash, ICF, or Term Loans."
+
     def __init__(self):
         load_dotenv()
         print(f"🔑 Sarvam Key loaded: {bool(os.getenv('SARVAM_API_KEY'))}")
         
-        self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
+        self.embedder = get_embedder()
+        self.embedding_store = EmbeddingStore(os.path.join(VECTOR_INDEX_DIR, 'static_rag'), self.embedder.model_id)
         self.client = chromadb.Client()
+        # LLM calls still running after their answer deadline (see generate_fallback_result)
+        self._late_answers = set()
+        self._llm_pool = None
+        self.kb = None
         self.setup_knowledge_base()
         self.setup_apis()
 
+    # Current snapshot's parts, for callers that read one at a time
+    @property
+    def docs(self):
+        return self.kb.docs
+
+    @property
+    def doc_positions(self):
+        return self.kb.doc_positions
+
+    @property
+    def lexical_index(self):
+        return self.kb.lexical_index
+
+    @property
+    def sentence_index(self):
+        return self.kb.sentence_index
+
     def setup_knowledge_base(self):
         """Load and index knowledge bases"""
-        knowledge_files = ['data/billmart_complete_knowledge.json', 'data/knowledge_base.json']
-        self.docs = []
-        
-        for file in knowledge_files:
+        try:
+            self.collection = self.client.get_collection("billmart_kb")
+            print("✅ Using existing ChromaDB collection")
+        except:
+            self.collection = self.client.create_collection("billmart_kb")
+            print("✅ Created new ChromaDB collection")
+
+        self.index_documents(self.load_documents())
+        if self.docs:
+            print("✅ Knowledge base indexed successfully")
+        print(f"✅ Lexical index built ({len(self.lexical_index.postings)} terms)")
+
+    def load_documents(self, strict=False):
+        """Chunk KNOWLEDGE_FILES into {"id", "content"} docs; strict raises instead of skipping a bad file"""
+        docs = []
+        for file in KNOWLEDGE_FILES:
             try:
                 with open(file, 'r', encoding='utf-8') as f:
-                    file_docs = json.load(f)
-                
-                prefix = file.split('/')[-1].split('.')
-                
-                if isinstance(file_docs, dict):
-                    normalized_docs = []
-                    for key, value in file_docs.items():
-                        if isinstance(value, list):
-                            for idx, item in enumerate(value):
-                                doc_id = f"{key}_{idx}"
-                                doc_content = json.dumps(item, ensure_ascii=False)
-                                normalized_docs.append({"id": doc_id, "content": doc_content})
-                        else:
-                            doc_content = json.dumps(value, ensure_ascii=False)
-                            normalized_docs.append({"id": key, "content": doc_content})
-                    file_docs = normalized_docs
+                    data = json.load(f)
                 
-                for doc in file_docs:
-                    doc['id'] = f"{prefix}_{doc['id']}"
+                # Path-labelled, token-bounded passages instead of whole sections
+                file_docs = [{"id": chunk.id, "content": chunk.text} for chunk in chunk_knowledge(data, file)]
                 
-                self.docs.extend(file_docs)
-                print(f"✅ Loaded {file} with {len(file_docs)} docs")
+                docs.extend(file_docs)
+                print(f"✅ Loaded {file} with {len(file_docs)} chunks")
                 
             except Exception as e:
+                if strict:
+                    raise
                 print(f"ERROR loading {file}: {e}")
+        return docs
 
-        try:
-            self.collection = self.client.get_collection("billmart_kb")
-            print("✅ Using existing ChromaDB collection")
-        except:
-            self.collection = self.client.create_collection("billmart_kb")
-            print("✅ Created new ChromaDB collection")
+    def reload_knowledge_base(self):
+        """Re-read the knowledge files and re-index what changed (called by kb_reloader)"""
+        return self.index_documents(self.load_documents(strict=True))
 
-        if self.docs:
-            texts = [doc['content'] for doc in self.docs]
-            embeddings = self.embedder.encode(texts)
-            self.collection.add(
-                embeddings=embeddings.tolist(),
-                documents=texts,
-                metadatas=[{"id": doc['id']} for doc in self.docs],
-                ids=[doc['id'] for doc in self.docs]
+    def index_documents(self, docs):
+        """
+        Make docs the served knowledge base. Only chunks that are new or whose
+        content changed are upserted into the collection; queries keep using
+        the previous snapshot until the new one is swapped in, and chunks that
+        are gone are deleted after the swap. Returns the KnowledgeDiff applied.
+        """
+        hashes = {doc['id']: content_hash(doc['content']) for doc in docs}
+        diff = diff_documents(self.kb.hashes if self.kb is not None else {}, hashes)
+        if self.kb is not None and not diff:
+            return diff
+
+        # All docs go to the store, also when chunks were only removed, so it
+        # drops what is gone; only content it hasn't seen before hits the model
+        embeddings = self.embedding_store.embed([doc['content'] for doc in docs], self.embedder.encode)
+        if diff.changed:
+            changed = set(diff.changed)
+            rows = [idx for idx, doc in enumerate(docs) if doc['id'] in changed]
+            self.collection.upsert(
+                embeddings=embeddings[rows].tolist(),
+                documents=[docs[idx]['content'] for idx in rows],
+                metadatas=[{"id": docs[idx]['id']} for idx in rows],
+                ids=[docs[idx]['id'] for idx in rows]
             )
-            print("✅ Knowledge base indexed successfully")
+
+        sentence_index = None
+        if EXTRACTIVE_INDEX_ENABLED and docs:
+            sentence_index = SentenceIndex(self.embedder.model_id)
+            sentence_index.build(docs, self.embedder.encode)
+
+        # One reference assignment: a query sees either the old or the new knowledge base
+        self.kb = KnowledgeSnapshot(docs, hashes, sentence_index)
+
+        if diff.removed:
+            self.collection.delete(ids=diff.removed)
+        return diff
 
     def setup_apis(self):
         """Setup Sarvam AI configuration"""
         # Get your Sarvam AI API subscription key here: https://dashboard.sarvam.ai/admin
         self.api_key = os.getenv('SARVAM_API_KEY')
+        # False without a key on the Sarvam backend; the mock backend needs none
+        self.llm_ready = llm_configured()
 
-    def retrieve_context(self, query, n_results=3):
+    def retrieve_context(self, query, n_results=None):
         """✅ FIXED: Retrieve relevant documents using RAG"""
-        query_embedding = self.embedder.encode([query])
+        return self.retrieve_with_timings(query, n_results)['context']
+
+    def retrieve_with_timings(self, query, n_results=None):
+        """Hybrid retrieval: BM25 + vector hits fused by reciprocal rank.
+
+        Returns the joined context, the chosen documents and per-stage
+        timings in milliseconds.
+        """
+        n_results = n_results or RETRIEVAL_TOP_K
+        timings = {}
+        started = time.perf_counter()
+        kb = self.kb  # the whole query reads one snapshot, even if a reload swaps it meanwhile
+
+        if not kb.docs:
+            return {'context': "", 'documents': [], 'timings': {'total_ms': 0.0}}
+
+        stage = time.perf_counter()
+        vector_ranking = self._vector_search(query, VECTOR_CANDIDATES if HYBRID_RETRIEVAL_ENABLED else n_results, kb)
+        timings['vector_ms'] = (time.perf_counter() - stage) * 1000
+
+        if HYBRID_RETRIEVAL_ENABLED:
+            stage = time.perf_counter()
+            lexical_ranking = [idx for idx, _ in kb.lexical_index.search(query, LEXICAL_CANDIDATES)]
+            timings['lexical_ms'] = (time.perf_counter() - stage) * 1000
+
+            stage = time.perf_counter()
+            fused = reciprocal_rank_fusion([lexical_ranking, vector_ranking], k=RRF_K)
+            ranking = [idx for idx, _ in fused[:n_results]]
+            timings['fusion_ms'] = (time.perf_counter() - stage) * 1000
+        else:
+            ranking = vector_ranking[:n_results]
+
+        documents = [kb.docs[idx]['content'] for idx in ranking]
+        timings['total_ms'] = (time.perf_counter() - started) * 1000
+        observe_stage('retrieve', timings['total_ms'] / 1000)
+        return {'context': "\n\n".join(documents), 'documents': documents, 'timings': timings}
+
+    def _vector_search(self, query, n_results, kb):
+        """Positions in kb.docs of the nearest documents in the vector collection"""
+        with stage_timer('embed'):
+            query_embedding = self.embedder.encode([query])
         results = self.collection.query(
             query_embeddings=query_embedding.tolist(),
-            n_results=n_results
+            n_results=min(n_results, len(kb.docs))
         )
         
-        # ✅ FIX: Handle nested lists in documents
-        flattened_docs = []
-        for doc in results['documents']:
-            if isinstance(doc, list):
-                flattened_docs.extend(doc)
-            else:
-                flattened_docs.append(doc)
-        
-        context = "\n\n".join(flattened_docs)
-        return context
+        # ✅ FIX: Handle nested lists in ids
+        # Ids mid-reload (upserted but not yet in kb, or deleted from it) are skipped
+        ranking = []
+        for doc_id in results['ids']:
+            for single_id in (doc_id if isinstance(doc_id, list) else [doc_id]):
+                if single_id in kb.doc_positions:
+                    ranking.append(kb.doc_positions[single_id])
+        return ranking
 
-    @retry_on_rate_limit(max_retries=5, initial_wait=15)
-    
     def generate_with_sarvam_chat(self, prompt):
         
         try:
-            from sarvamai import SarvamAI
-            
-            if not self.api_key:
-                print("❌ SARVAM_API_KEY not found in environment variables")
+            if not self.llm_ready:
+                count_error('static_rag', 'llm_not_configured')
+                logger.warning("❌ SARVAM_API_KEY not found in environment variables")
                 return None
             
-            # Initialize client
-            client = SarvamAI(api_subscription_key=self.api_key)
-            
+            # Shared pooled client (llm_client) - no per-request construction
             # ✅ CORRECT: Using only supported parameters from official docs
-            response = client.chat.completions(
-                messages=[
-                    {"role": "system", "content": "You are BillMart FinTech's expert assistant. Provide helpful responses about financial products and RBI regulations. Keep responses under 150 words unless abosultely required for a more complex query."},
-                    {"role": "user", "content": prompt}
-                ],
+            response = chat_completion(
+                messages=self._chat_messages(prompt),
                 max_tokens=150,           # ✅ Use max_tokens (not max_completion_tokens)
                 temperature=0.3,          # ✅ Supported
                 
@@ -147,71 +247,100 @@ class BillMartRAGFallback:
             
             return None
             
-        except ImportError:
-            print("❌ Sarvam AI SDK not installed. Install with: pip install sarvamai")
+        except LoadShedError as e:
+            count_error('static_rag', 'shed')
+            logger.warning(f"⏳ Sarvam AI call shed, answering extractively: {e}")
             return None
         except Exception as e:
-            print(f"❌ Sarvam AI Error: {e}")
+            count_error('static_rag', e)
+            logger.error(f"❌ Sarvam AI Error: {e}")
             return None
 
+    def _chat_messages(self, prompt):
+        return [
+            {"role": "system", "content": "You are BillMart FinTech's expert assistant. Provide helpful responses about financial products and RBI regulations. Keep responses under 150 words unless abosultely required for a more complex query."},
+            {"role": "user", "content": prompt}
+        ]
+
+    async def aretrieve_context(self, query, n_results=None):
+        """Async retrieve_context - embedding and Chroma query run on the worker pool"""
+        return await run_blocking(self.retrieve_context, query, n_results)
+
+    async def _achat(self, prompt):
+        response = await achat_completion(
+            messages=self._chat_messages(prompt),
+            max_tokens=150,
+            temperature=0.3,
+        )
+        if response and hasattr(response, 'choices') and len(response.choices) > 0:
+            return response.choices[0].message.content.strip()
+        return None
+
+    async def agenerate_with_sarvam_chat(self, prompt):
+        """Awaitable generate_with_sarvam_chat; returns None on failure or timeout"""
+        if not self.llm_ready:
+            count_error('static_rag', 'llm_not_configured')
+            logger.warning("❌ SARVAM_API_KEY not found in environment variables")
+            return None
+        try:
+            return await self._achat(prompt)
+        except asyncio.TimeoutError:
+            count_error('static_rag', 'timeout')
+            logger.error(f"❌ Sarvam AI timed out after {LLM_TIMEOUT_SECONDS}s")
+            return None
+        except LoadShedError as e:
+            count_error('static_rag', 'shed')
+            logger.warning(f"⏳ Sarvam AI call shed, answering extractively: {e}")
+            return None
+        except Exception as e:
+            count_error('static_rag', e)
+            logger.error(f"❌ Sarvam AI Error: {e}")
+            return None
     
     def generate_enhanced_rag_response(self, query, context):
-        """Enhanced RAG response generator - Always works as fallback"""
-        query_lower = query.lower()
-        
-        if 'rbi' in query_lower and 'scf' in query_lower:
-            intro = "🏛️ RBI Regulations for Supply Chain Finance:"
-        elif 'empcash' in query_lower or 'gigcash' in query_lower:
-            intro = "💰 Employee & Gig Worker Financing:"
-        elif 'eligibility' in query_lower:
-            intro = "✅ Eligibility Requirements:"
-        elif 'loan' in query_lower:
-            intro = "🏦 Loan Information:"
-        else:
-            intro = "📋 BillMart Financial Services:"
-        
-        # Extract key sentences from context
-        context_sentences = [s.strip() for s in context.split('.') if s.strip() and len(s.strip()) > 20]
-        
-        response_parts = [
-            intro,
-            ""
-        ]
-        
-        # Add top 3 most relevant points
-        for i, info in enumerate(context_sentences[:3], 1):
-            response_parts.append(f"{i}. {info.strip()}.")
-        
-        response_parts.extend([
-            "",
-            "💬 Need personalized assistance?",
-            "📧 care@billmart.com",
-            "📞 +91 93269 46663",
-            "🌐 www.billmart.com"
-        ])
-        
-        return "\n".join(response_parts)
+        """Enhanced RAG response generator - Always works as fallback
+
+        Key points are the KB sentences closest to the query (the query
+        embedding is already in the embedder cache from retrieval).
+        """
+        sentences = None
+        sentence_index = self.sentence_index
+        if sentence_index is not None:
+            with stage_timer('post_process'):
+                sentences = sentence_index.top_sentences(self.embedder.encode(query)) or None
+        return enhanced_rag_response(query, context, sentences)
 
     def create_domain_limited_prompt(self, query, context):
         """Create direct, no-thinking prompt for Sarvam AI"""
+        return self.build_prompt(query, context)[0]
+
+    def build_prompt(self, query, context):
+        """Prompt with retrieved passages packed into the context token budget; returns (prompt, prompt_tokens)"""
+        with stage_timer('prompt_build'):
+            packed = pack_passages(context.split("\n\n"), STATIC_RAG_CONTEXT_TOKENS)
+        packed_context = "\n\n".join(packed.texts)
         prompt = f"""You are BillMart FinTech's expert assistant.
     Answer directly and concisely using the following context.
     Do NOT include internal thoughts, explanations, or step-by-step reasoning.
     Keep your answer under 150 words as much as possible -and focus on BillMart products and RBI regulations.
 
     CONTEXT:
-    {context[:800]}
+    {packed_context}
 
     QUERY: {query}
     Provide a helpful, professional response focusing on BillMart products and services and their compliance and regulations"""
-        return prompt
+        prompt_tokens = count_message_tokens(self._chat_messages(prompt))
+        log_usage('static_rag', packed, prompt_tokens)
+        return prompt, prompt_tokens
 
     def test_sarvam_chat(self, query):
         """Test Sarvam AI Chat Completion specifically"""
         print(f"🔍 Testing query: {query}")
         print("=" * 60)
         
-        context = self.retrieve_context(query)
+        retrieval = self.retrieve_with_timings(query)
+        context = retrieval['context']
+        print(f"🔎 Retrieval timings (ms): " + ", ".join(f"{k}={v:.1f}" for k, v in retrieval['timings'].items()))
         prompt = self.create_domain_limited_prompt(query, context)
         
         results = []
@@ -260,22 +389,161 @@ class BillMartRAGFallback:
         
         return results
 
-    def generate_fallback_response(self, query):
-        """Production method - Always returns intelligent response"""
+    def generate_fallback_result(self, query, answer_deadline=None, on_late_answer=None):
+        """Production method - answer plus where it came from ('llm', 'extractive' or 'no_context')
+
+        With an answer deadline (seconds from now; ANSWER_DEADLINE_SECONDS when
+        LATENCY_SLO_ENABLED) the extractive answer is built while the LLM runs
+        and returned if the LLM misses the deadline. The LLM call carries on
+        and on_late_answer(result) is called with its answer when it lands.
+        """
+        answer_deadline = _answer_deadline(answer_deadline)
+        started = time.monotonic()
         context = self.retrieve_context(query)
         
         if not context:
-            return "I can only provide information about BillMart's financial products. Please ask about our services like SCF, EmpCash, GigCash, ICF, or Term Loans."
+            return {
+                'answer': self.NO_CONTEXT_MESSAGE,
+                'source': 'no_context'
+            }
         
         # Try Sarvam AI Chat first
-        prompt = self.create_domain_limited_prompt(query, context)
-        chat_response = self.generate_with_sarvam_chat(prompt)
+        prompt, prompt_tokens = self.build_prompt(query, context)
+        if answer_deadline is None:
+            chat_response = self.generate_with_sarvam_chat(prompt)
+        else:
+            call = contextvars.copy_context().run
+            future = self._get_llm_pool().submit(call, self.generate_with_sarvam_chat, prompt)
+            extractive = self.generate_enhanced_rag_response(query, context)
+            try:
+                chat_response = future.result(timeout=max(0.0, answer_deadline - (time.monotonic() - started)))
+            except FutureTimeoutError:
+                self._finish_late(future, future.result, prompt_tokens, on_late_answer)
+                return {'answer': extractive, 'source': 'extractive', 'deadline_missed': True}
         
         if chat_response:
-            return chat_response
+            return {'answer': chat_response, 'source': 'llm', 'prompt_tokens': prompt_tokens}
         
         # Fall back to enhanced RAG (always works)
-        return self.generate_enhanced_rag_response(query, context)
+        return {'answer': self.generate_enhanced_rag_response(query, context), 'source': 'extractive'}
+
+    async def agenerate_fallback_result(self, query, answer_deadline=None, on_late_answer=None):
+        """Async generate_fallback_result - never blocks the event loop"""
+        answer_deadline = _answer_deadline(answer_deadline)
+        started = time.monotonic()
+        context = await self.aretrieve_context(query)
+        
+        if not context:
+            return {
+                'answer': self.NO_CONTEXT_MESSAGE,
+                'source': 'no_context'
+            }
+        
+        prompt, prompt_tokens = self.build_prompt(query, context)
+        if answer_deadline is None:
+            chat_response = await self.agenerate_with_sarvam_chat(prompt)
+        else:
+            # Own task: the LLM call outlives this turn if it misses the deadline
+            llm_task = asyncio.ensure_future(self.agenerate_with_sarvam_chat(prompt))
+            extractive = self.generate_enhanced_rag_response(query, context)
+            done, _ = await asyncio.wait({llm_task}, timeout=max(0.0, answer_deadline - (time.monotonic() - started)))
+            if not done:
+                self._finish_late(llm_task, llm_task.result, prompt_tokens, on_late_answer)
+                return {'answer': extractive, 'source': 'extractive', 'deadline_missed': True}
+            chat_response = llm_task.result()
+        
+        if chat_response:
+            return {'answer': chat_response, 'source': 'llm', 'prompt_tokens': prompt_tokens}
+        
+        return {'answer': self.generate_enhanced_rag_response(query, context), 'source': 'extractive'}
+
+    def _get_llm_pool(self):
+        if self._llm_pool is None:
+            self._llm_pool = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix='static-rag-llm')
+        return self._llm_pool
+
+    def _finish_late(self, pending, result, prompt_tokens, on_late_answer):
+        """Hand the LLM answer of a call that missed its deadline to on_late_answer once it lands"""
+        count_error('static_rag', 'answer_deadline')
+        self._late_answers.add(pending)
+
+        def landed(done):
+            self._late_answers.discard(done)
+            if done.cancelled() or done.exception() is not None:
+                return
+            answer = result()
+            logger.debug(f"🐢 Late LLM answer landed: {bool(answer)}")
+            if answer and on_late_answer:
+                try:
+                    on_late_answer({'answer': answer, 'source': 'llm', 'prompt_tokens': prompt_tokens})
+                except Exception as e:
+                    logger.warning(f"❌ Late answer callback failed: {e}")
+
+        pending.add_done_callback(landed)
+
+    async def astream_fallback_response(self, query, answer_deadline=None, on_late_answer=None):
+        """Streaming generate_fallback_response - yields LLM text as it arrives, extractive answer if the LLM fails
+
+        With an answer deadline the first LLM token has to arrive in time,
+        otherwise the extractive answer is sent; the LLM stream is read to the
+        end in the background and on_late_answer(result) gets the full text,
+        as in generate_fallback_result.
+        """
+        answer_deadline = _answer_deadline(answer_deadline)
+        started = time.monotonic()
+        context = await self.aretrieve_context(query)
+        
+        if not context:
+            yield FallbackText(self.NO_CONTEXT_MESSAGE)
+            return
+        
+        prompt, prompt_tokens = self.build_prompt(query, context)
+        streamed = False
+        if self.llm_ready:
+            stream = astream_chat_completion(self._chat_messages(prompt), temperature=0.3, max_tokens=150)
+            try:
+                in_time = True
+                if answer_deadline is not None:
+                    first = asyncio.ensure_future(stream.__anext__())
+                    done, _ = await asyncio.wait({first}, timeout=max(0.0, answer_deadline - (time.monotonic() - started)))
+                    in_time = bool(done)
+                    if in_time:
+                        streamed = True
+                        yield first.result()
+                    else:
+                        logger.warning(f"⏳ No Sarvam AI token within {answer_deadline}s, answering extractively")
+                        late = asyncio.ensure_future(self._read_rest(first, stream))
+                        self._finish_late(late, late.result, prompt_tokens, on_late_answer)
+                if in_time:
+                    async for delta in stream:
+                        streamed = True
+                        yield delta
+            except StopAsyncIteration:
+                pass
+            except Exception as e:
+                count_error('static_rag', e)
+                logger.error(f"❌ Sarvam AI stream error: {e}")
+                if streamed:
+                    # Nothing to add, but the cut-off answer must not be cached
+                    yield FallbackText("")
+        
+        if not streamed:
+            yield FallbackText(self.generate_enhanced_rag_response(query, context))
+
+    @staticmethod
+    async def _read_rest(first, stream):
+        """Full text of a stream whose first chunk is still pending in `first`"""
+        try:
+            parts = [await first]
+        except StopAsyncIteration:
+            return None
+        async for delta in stream:
+            parts.append(delta)
+        return "".join(parts).strip()
+
+    def generate_fallback_response(self, query):
+        """Production method - Always returns intelligent response"""
+        return self.generate_fallback_result(query)['answer']
 
 # Test the system
 if __name__ == "__main__":
@@ -1,31 +1,53 @@
 from dotenv import load_dotenv
 load_dotenv()
-import os
-from sarvamai import SarvamAI
+
+from .llm_client import chat_completion, achat_completion, astream_chat_completion
+from .async_utils import shed_to
+
+# Sent instead of an answer when the LLM call is shed (rate_limiter.LoadShedError)
+BUSY_MESSAGE = "We're handling a lot of questions right now. Please try again in a moment, or contact BillMart support at care@billmart.com."
+
+DEFAULT_SYSTEM_MESSAGE = (
+    "You are BillMart FinTech's expert assistant. You will provide clear and facutally correct answers to user querries"
+    "Be concise, factual, and comply with RBI guidelines.Give reply as per billmart's polices and guidlines as per their website and other banking or nbfc related RBI rules and regulations "
+    "If you don't know, say so—do not guess.Do not provide any investment advice.Do not provide vague or generic responses"
+    "If the question is not related to BillMart's products or services, politely inform the user that you can only assist with queries related to BillMart."
+    "do not show you internal thinking steps"
+)
+
+def _build_messages(user_query, system_message):
+    return [
+        {"role": "system", "content": DEFAULT_SYSTEM_MESSAGE if system_message is None else system_message},
+        {"role": "user", "content": user_query}
+    ]
 
 def llm_only_fallback(user_query, system_message=None, temperature=0.3, max_tokens=300):
-    api_key = os.getenv("SARVAM_API_KEY")
-    if not api_key:
-        raise EnvironmentError("SARVAM_API_KEY not set in your environment.")
-    client = SarvamAI(api_subscription_key=api_key)
-    if system_message is None:
-        system_message = (
-            "You are BillMart FinTech's expert assistant. You will provide clear and facutally correct answers to user querries"
-            "Be concise, factual, and comply with RBI guidelines.Give reply as per billmart's polices and guidlines as per their website and other banking or nbfc related RBI rules and regulations "
-            "If you don't know, say so—do not guess.Do not provide any investment advice.Do not provide vague or generic responses"
-            "If the question is not related to BillMart's products or services, politely inform the user that you can only assist with queries related to BillMart."
-            "do not show you internal thinking steps"
-        )
-    response = client.chat.completions(
-        messages=[
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": user_query}
-        ],
+    response = chat_completion(
+        messages=_build_messages(user_query, system_message),
         temperature=temperature,
         max_tokens=max_tokens
     )
     return response.choices[0].message.content.strip()
 
+async def allm_only_fallback(user_query, system_message=None, temperature=0.3, max_tokens=300):
+    """Awaitable llm_only_fallback; the LLM call is cancelled after LLM_TIMEOUT_SECONDS.
+    Rate limits are retried by llm_client; raises rate_limiter.LoadShedError if the deadline can't be met."""
+    response = await achat_completion(
+        messages=_build_messages(user_query, system_message),
+        temperature=temperature,
+        max_tokens=max_tokens
+    )
+    return response.choices[0].message.content.strip()
+
+async def astream_llm_only_fallback(user_query, system_message=None, temperature=0.3, max_tokens=300):
+    """Streaming llm_only_fallback - yields the answer as it is generated, BUSY_MESSAGE if the call is shed"""
+    async for delta in shed_to(astream_chat_completion(
+        messages=_build_messages(user_query, system_message),
+        temperature=temperature,
+        max_tokens=max_tokens
+    ), lambda: BUSY_MESSAGE):
+        yield delta
+
 if __name__ == "__main__":
     test_queries = [
     "What are the interest rates and eligibility criteria for BillMart's Term Loan product?",
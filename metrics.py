@@ -0,0 +1,274 @@
+# actions/metrics.py
+"""
+In-process metrics for the action server, exported in Prometheus text format.
+
+- billmart_action_seconds{action}              latency histogram per action
+- billmart_stage_seconds{stage,engine}         latency histogram per fallback
+                                               stage (embed, retrieve,
+                                               prompt_build, llm, post_process)
+- billmart_errors_total{component,kind}        error counter
+- billmart_cache_{hits,misses}_total{cache}    hit/miss counters; the
+                                               embedding and semantic answer
+                                               caches are read at export time
+- billmart_llm_calls_avoided_total{reason,intent}
+                                               fallbacks answered without the
+                                               LLM (e.g. intent_rescue)
+- billmart_kb_reindexed_total{engine,op}       knowledge chunks upserted or
+                                               deleted by hot reloads
+- billmart_llm_rate_rps                        gauge: the LLM scheduler's
+                                               current adaptive request rate
+
+Recording is a dict update under a lock - nothing is printed or written on the
+request path. The text is served on METRICS_HOST:METRICS_PORT (GET /metrics)
+and/or written to METRICS_FILE every METRICS_EXPORT_SECONDS by a daemon
+thread; both are off unless configured (BILLMART_METRICS_PORT /
+BILLMART_METRICS_FILE), so importing this module starts nothing.
+"""
+import os
+import time
+import bisect
+import inspect
+import logging
+import functools
+import threading
+import contextlib
+import contextvars
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .fallback_config import (
+    METRICS_ENABLED, METRICS_PORT, METRICS_HOST, METRICS_FILE, METRICS_EXPORT_SECONDS, METRICS_BUCKETS
+)
+
+logger = logging.getLogger(__name__)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Fallback engine handling the current request; set by ActionLLMFallback so
+# shared code (llm_client, embedder) can label its stages
+current_engine: contextvars.ContextVar = contextvars.ContextVar('current_engine', default='none')
+
+
+def _labels(**labels) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics)."""
+
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # last slot = +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self, buckets: Iterable[float] = METRICS_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._help: Dict[str, str] = {}
+        self._kinds: Dict[str, str] = {}    # metric name -> 'gauge' for collector-read gauges
+        # Callables returning [(metric name, {label: value}, value)], read at export time
+        self._collectors: List[Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]] = []
+
+    def describe(self, name: str, help_text: str, kind: str = 'counter'):
+        self._help[name] = help_text
+        self._kinds[name] = kind
+
+    def observe(self, name: str, value: float, **labels):
+        key = _labels(**labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = Histogram(self.buckets)
+            hist.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = _labels(**labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]):
+        self._collectors.append(collector)
+
+    def export_text(self) -> str:
+        """Everything recorded so far in Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                lines += self._header(name, 'histogram')
+                for key, hist in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(list(hist.buckets) + [float('inf')], hist.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f"{name}_bucket{_format_labels(key, ('le', le))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {hist.total:.6f}")
+                    lines.append(f"{name}_count{_format_labels(key)} {hist.count}")
+            counters = {name: dict(series) for name, series in self._counters.items()}
+
+        for collector in self._collectors:
+            try:
+                for name, labels, value in collector():
+                    counters.setdefault(name, {})[_labels(**labels)] = value
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+
+        for name, series in sorted(counters.items()):
+            lines += self._header(name, self._kinds.get(name, 'counter'))
+            for key, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(key)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, name: str, kind: str) -> List[str]:
+        header = [f"# HELP {name} {self._help[name]}"] if name in self._help else []
+        return header + [f"# TYPE {name} {kind}"]
+
+
+_registry = MetricsRegistry()
+_registry.describe('billmart_action_seconds', 'Custom action run() latency')
+_registry.describe('billmart_stage_seconds', 'Fallback pipeline stage latency')
+_registry.describe('billmart_errors_total', 'Errors by component and kind')
+_registry.describe('billmart_cache_hits_total', 'Cache hits by cache')
+_registry.describe('billmart_cache_misses_total', 'Cache misses by cache')
+_registry.describe('billmart_llm_calls_avoided_total', 'Fallback turns answered without calling the LLM')
+_registry.describe('billmart_kb_reindexed_total', 'Knowledge base chunks re-indexed by hot reload')
+_registry.describe('billmart_llm_rate_rps', 'Current adaptive LLM request rate', kind='gauge')
+
+
+def get_metrics() -> MetricsRegistry:
+    _start_exporters()
+    return _registry
+
+
+def observe_stage(stage: str, seconds: float, engine: Optional[str] = None):
+    if METRICS_ENABLED:
+        get_metrics().observe('billmart_stage_seconds', seconds, stage=stage, engine=engine or current_engine.get())
+
+
+@contextlib.contextmanager
+def stage_timer(stage: str, engine: Optional[str] = None):
+    """Time a block (sync or around awaits) as one fallback stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started, engine)
+
+
+def count_error(component: str, error) -> None:
+    if METRICS_ENABLED:
+        kind = error if isinstance(error, str) else type(error).__name__
+        get_metrics().inc('billmart_errors_total', component=component, kind=kind)
+
+
+def cache_stats_collector(cache: str, stats: Callable[[], Dict[str, float]]):
+    """Collector exporting a cache's own stats() hit/miss counters."""
+    def collect():
+        current = stats()
+        return [
+            ('billmart_cache_hits_total', {'cache': cache}, current['hits']),
+            ('billmart_cache_misses_total', {'cache': cache}, current['misses']),
+        ]
+    return collect
+
+
+def timed_action(run):
+    """Decorator for Action.run (sync or async): records billmart_action_seconds{action}."""
+    if inspect.iscoroutinefunction(run):
+        @functools.wraps(run)
+        async def async_wrapper(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await run(self, *args, **kwargs)
+            finally:
+                _observe_action(self, started)
+        return async_wrapper
+
+    @functools.wraps(run)
+    def wrapper(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return run(self, *args, **kwargs)
+        finally:
+            _observe_action(self, started)
+    return wrapper
+
+
+def _observe_action(action, started: float):
+    if METRICS_ENABLED:
+        get_metrics().observe('billmart_action_seconds', time.perf_counter() - started, action=action.name())
+
+
+# ===== EXPORT =====
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = _registry.export_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # keep scrapes out of the action server log
+
+
+def _write_file_forever(path: str, interval: float):
+    while True:
+        time.sleep(interval)
+        try:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(_registry.export_text())
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Writing metrics to {path} failed: {e}")
+
+
+def _start_exporters():
+    """Start the configured /metrics endpoint and file writer once per process (on first use)."""
+    global _exporters_started
+    if _exporters_started or not METRICS_ENABLED or not (METRICS_PORT or METRICS_FILE):
+        return
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+        if METRICS_PORT:
+            try:
+                server = ThreadingHTTPServer((METRICS_HOST, METRICS_PORT), _MetricsHandler)
+                threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+                logger.info(f"📈 Metrics at http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+            except OSError as e:
+                logger.warning(f"⚠️ Metrics endpoint not started on {METRICS_HOST}:{METRICS_PORT}: {e}")
+        if METRICS_FILE:
+            threading.Thread(target=_write_file_forever, args=(METRICS_FILE, METRICS_EXPORT_SECONDS),
+                             name='metrics-file', daemon=True).start()
+            logger.info(f"📈 Writing metrics to {METRICS_FILE} every {METRICS_EXPORT_SECONDS}s")
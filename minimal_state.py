@@ -1,12 +1,15 @@
 # actions/minimal_state.py
 from typing import Dict, Text, Any, Optional, List
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from enum import Enum 
 import json 
 from rasa_sdk import Tracker, Action  # Fixed: Action not action
 from rasa_sdk.executor import CollectingDispatcher 
 from rasa_sdk.events import SlotSet, FollowupAction
 
+from .keyword_matcher import KeywordMatcher
+from .metrics import timed_action
+
 class UserType(Enum):
     """Enumeration for user categories."""
     INDIVIDUAL = "individual"
@@ -163,6 +166,10 @@ class ConversationStateManager:
         ]
     }
     
+    # Compiled once at import - one pass over the message scores every category
+    PRODUCT_MATCHER = KeywordMatcher(PRODUCT_KEYWORDS)
+    USER_TYPE_MATCHER = KeywordMatcher(USER_TYPE_KEYWORDS)
+    
     INTENT_PHASE_MAP = {
         "ask_process": ConversationPhase.PROCESS,
         "ask_eligibility": ConversationPhase.FOCUSED,
@@ -170,74 +177,60 @@ class ConversationStateManager:
         "ask_info": ConversationPhase.EXPLORING,
     }
     
-    def __init__(self):
-        """Initialize with default state."""
-        self.current_state = MinimalConversationState()
+    def __init__(self, state: Optional[MinimalConversationState] = None):
+        """Wrap one conversation's state (default: fresh state)."""
+        self.current_state = state or MinimalConversationState()
     
-    def update_from_intent(self, intent_name: str, entities: List[Dict], user_message: str) -> MinimalConversationState:
-        """Update state based on intent and entities."""
+    @staticmethod
+    def load_state(tracker: Tracker) -> MinimalConversationState:
+        """State stored in the tracker's conversation_state slot, or a fresh one."""
+        existing_state_data = tracker.get_slot("conversation_state") or {}
+        if existing_state_data:
+            return MinimalConversationState.from_dict(existing_state_data)
+        return MinimalConversationState()
+    
+    @classmethod
+    def transition(cls, state: MinimalConversationState, intent_name: str,
+                   entities: List[Dict], user_message: str) -> MinimalConversationState:
+        """Pure state transition: returns a new state and never mutates ``state``."""
+        user_type = state.user_type
         
         # Handle explicit declarations
         if intent_name.startswith("declare_"):
             user_type_str = intent_name.replace("declare_", "")
             try:
-                self.current_state.user_type = UserType(user_type_str)
+                user_type = UserType(user_type_str)
             except ValueError:
-                self.current_state.user_type = UserType.UNKNOWN
+                user_type = UserType.UNKNOWN
         
         # ✅ FIX: Reset user_type for loan requests (they need clarification)
         elif intent_name == "ask_loan_need":
-            self.current_state.user_type = UserType.UNKNOWN  # Force clarification
-        
-        # Product detection (this part is fine)
-        detected_product = self._detect_product_from_message(user_message)
-        if detected_product:
-            self.current_state.product_focus = detected_product
-        
-        # Update conversation phase
-        if intent_name in self.INTENT_PHASE_MAP:
-            self.current_state.conversation_phase = self.INTENT_PHASE_MAP[intent_name]
-        
-        # Track last intent
-        self.current_state.last_intent = intent_name
-        
+            user_type = UserType.UNKNOWN  # Force clarification
+        
+        return replace(
+            state,
+            user_type=user_type,
+            product_focus=cls.PRODUCT_MATCHER.best(user_message) or state.product_focus,
+            conversation_phase=cls.INTENT_PHASE_MAP.get(intent_name, state.conversation_phase),
+            last_intent=intent_name
+        )
+    
+    def update_from_intent(self, intent_name: str, entities: List[Dict], user_message: str) -> MinimalConversationState:
+        """Update state based on intent and entities."""
+        self.current_state = self.transition(self.current_state, intent_name, entities, user_message)
         return self.current_state
 
 
     
     def _detect_product_from_message(self, message: str) -> Optional[str]:
         """Detect product interest from user message using keyword matching."""
-        message_lower = message.lower()
-        
-        # Score each product based on keyword matches
-        product_scores = {}
-        for product, keywords in self.PRODUCT_KEYWORDS.items():
-            score = sum(1 for keyword in keywords if keyword in message_lower)
-            if score > 0:
-                product_scores[product] = score
-        
-        # Return product with highest score, if any
-        if product_scores:
-            return max(product_scores.items(), key=lambda x: x[1])[0]
-        
-        return None
+        # Product with the most keyword matches (whole words only), if any
+        return self.PRODUCT_MATCHER.best(message)
     
     def _detect_user_type_from_message(self, message: str) -> Optional[str]:
         """Detect user type from message content."""
-        message_lower = message.lower()
-        
-        # Score each user type based on keyword matches
-        type_scores = {}
-        for user_type, keywords in self.USER_TYPE_KEYWORDS.items():
-            score = sum(1 for keyword in keywords if keyword.lower() in message_lower)
-            if score > 0:
-                type_scores[user_type] = score
-        
-        # Return user type with highest score, if any
-        if type_scores:
-            return max(type_scores.items(), key=lambda x: x[1])[0]
-        
-        return None
+        # User type with the most keyword matches (whole words only), if any
+        return self.USER_TYPE_MATCHER.best(message)
     
     def get_context_for_response(self) -> Dict[str, str]:
         """Generate context information for response selection."""
@@ -278,9 +271,7 @@ class ActionProcessWithMinimalState(Action):
     def name(self) -> Text:
         return "action_process_with_minimal_state"
     
-    def __init__(self):
-        self.state_manager = ConversationStateManager()
-    
+    @timed_action
     def run(self, dispatcher: CollectingDispatcher, 
            tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         """Main action execution logic."""
@@ -291,19 +282,18 @@ class ActionProcessWithMinimalState(Action):
         entities = latest_message.get("entities", [])
         user_message = latest_message.get("text", "")
         
-        # Load existing state from tracker (if any)
-        existing_state_data = tracker.get_slot("conversation_state") or {}
-        if existing_state_data:
-            self.state_manager.current_state = MinimalConversationState.from_dict(existing_state_data)
+        # Load existing state from tracker (if any) - nothing is kept on the action instance,
+        # which is shared by every conversation on the action server
+        state_manager = ConversationStateManager(ConversationStateManager.load_state(tracker))
         
         # Update state based on current input
-        updated_state = self.state_manager.update_from_intent(
+        updated_state = state_manager.update_from_intent(
             intent_name, entities, user_message
         )
         
         # Generate response based on state
-        if self.state_manager.should_ask_for_clarification():
-            response_text = self.state_manager.get_clarification_question()
+        if state_manager.should_ask_for_clarification():
+            response_text = state_manager.get_clarification_question()
         else:
             response_text = self._generate_contextual_response(updated_state, intent_name)
         
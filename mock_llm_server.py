@@ -0,0 +1,272 @@
+# actions/mock_llm_server.py
+"""
+Local stand-in for the Sarvam chat API, for load testing the fallback modes
+offline and without spending quota.
+
+Serves POST /v1/chat/completions (the protocol llm_backends.MockBackend
+speaks) and simulates:
+- latency: fixed, uniform, normal or lognormal time to first token
+- token streaming: server-sent events at --tokens-per-sec
+- 429s: a requests/sec token bucket, a concurrency cap and/or a random share
+- failures: random 500s, mid-stream errors and hung requests
+Answers are derived from the prompt, so the same question always gets the
+same text. GET /stats returns request counters as JSON.
+
+Usage (from the project root):
+    python -m actions.mock_llm_server --latency lognormal:800:0.4 --rate-limit 10 --error-rate 0.02
+    BILLMART_LLM_BACKEND=mock rasa run actions
+"""
+import re
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List
+
+# Vocabulary for the generated answers
+FILLER = ("BillMart offers working capital through supply chain finance, EmpCash salary advances, "
+          "GigCash for gig workers and insurance claim finance for hospitals, with KYC as per RBI "
+          "guidelines and disbursal through regulated NBFC and bank partners").split()
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Latency distribution in ms -> sampler returning seconds.
+    'fixed:300', 'uniform:200:800', 'normal:500:150', 'lognormal:600:0.5' (median ms, sigma)
+    """
+    kind, *params = spec.split(':')
+    values = [float(p) for p in params]
+    if kind == 'fixed' and len(values) == 1:
+        return lambda rng: values[0] / 1000
+    if kind == 'uniform' and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == 'normal' and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1])) / 1000
+    if kind == 'lognormal' and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1]) / 1000
+    raise argparse.ArgumentTypeError(f"bad latency spec '{spec}'")
+
+
+def mock_answer(messages: List[Dict[str, str]], max_tokens: int) -> str:
+    """Deterministic answer of up to max_tokens words, seeded by the prompt."""
+    prompt = messages[-1].get('content', '') if messages else ''
+    digest = hashlib.sha1(prompt.encode('utf-8')).hexdigest()
+    rng = random.Random(digest)
+    query_words = re.findall(r"\w+", prompt)[-12:]
+    length = min(max_tokens, 40 + rng.randint(0, 60))
+    words = [f"[mock {digest[:8]}]"] + query_words + [rng.choice(FILLER) for _ in range(length - len(query_words))]
+    return " ".join(words[:max(1, length)]) + "."
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> float:
+        """0 if a request may go now, else seconds until one may"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+class MockLLM:
+    """Behaviour and counters shared by all handler threads."""
+
+    def __init__(self, args):
+        self.args = args
+        self.latency = parse_latency(args.latency)
+        self.rng = random.Random(args.seed)
+        self.rng_lock = threading.Lock()
+        self.bucket = TokenBucket(args.rate_limit, args.burst or args.rate_limit) if args.rate_limit else None
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.stats = {'requests': 0, 'ok': 0, 'streamed': 0, 'rate_limited': 0, 'errors': 0,
+                      'hung': 0, 'peak_in_flight': 0}
+
+    def count(self, key: str):
+        with self.lock:
+            self.stats[key] += 1
+
+    def draw(self) -> Dict[str, float]:
+        """All random decisions for one request, under one lock so runs replay with --seed"""
+        with self.rng_lock:
+            return {
+                'latency': self.latency(self.rng),
+                'reject': self.rng.random(),
+                'fail': self.rng.random(),
+                'hang': self.rng.random(),
+                'midstream': self.rng.random(),
+            }
+
+    def admit(self) -> float:
+        """Start a request: 0 if admitted, else Retry-After seconds for a 429"""
+        with self.lock:
+            self.stats['requests'] += 1
+            if self.args.max_concurrency and self.in_flight >= self.args.max_concurrency:
+                return 1.0
+        if self.bucket:
+            wait = self.bucket.take()
+            if wait:
+                return wait
+        with self.lock:
+            self.in_flight += 1
+            self.stats['peak_in_flight'] = max(self.stats['peak_in_flight'], self.in_flight)
+        return 0.0
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # keep-alive, like the real API
+    llm: MockLLM = None
+
+    def log_message(self, format, *args):
+        if self.llm.args.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, body: dict, headers: Dict[str, str] = None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            with self.llm.lock:
+                self._send_json(200, dict(self.llm.stats, in_flight=self.llm.in_flight))
+        else:
+            self._send_json(404, {'error': {'code': 404, 'message': 'not found'}})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        if self.path != '/v1/chat/completions':
+            self._send_json(404, {'error': {'code': 404, 'message': 'not found'}})
+            return
+
+        llm, args = self.llm, self.llm.args
+        draw = llm.draw()
+        retry_after = llm.admit()
+        if not retry_after and draw['reject'] < args.rate_429:
+            llm.release()
+            retry_after = 1.0
+        if retry_after:
+            llm.count('rate_limited')
+            self._send_json(429, {'error': {'code': 429, 'message': 'rate limit exceeded'}},
+                            {'Retry-After': f"{retry_after:.2f}"})
+            return
+
+        try:
+            if draw['hang'] < args.hang_rate:
+                llm.count('hung')
+                time.sleep(args.hang_seconds)
+            time.sleep(draw['latency'])
+            if draw['fail'] < args.error_rate:
+                llm.count('errors')
+                self._send_json(500, {'error': {'code': 500, 'message': 'simulated upstream failure'}})
+                return
+
+            answer = mock_answer(body.get('messages', []), int(body.get('max_tokens') or 150))
+            if body.get('stream'):
+                self._stream(answer, draw['midstream'] < args.stream_error_rate)
+            else:
+                time.sleep(len(answer.split()) / args.tokens_per_sec if args.tokens_per_sec else 0)
+                llm.count('ok')
+                self._send_json(200, {
+                    'id': f"mock-{hashlib.sha1(answer.encode('utf-8')).hexdigest()[:12]}",
+                    'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': answer},
+                                 'finish_reason': 'stop'}],
+                    'usage': {'completion_tokens': len(answer.split())},
+                })
+        finally:
+            llm.release()
+
+    def _stream(self, answer: str, fail_midway: bool):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')   # no Content-Length: the body ends with the connection
+        self.end_headers()
+        self.close_connection = True
+
+        words = answer.split(' ')
+        delay = 1 / self.llm.args.tokens_per_sec if self.llm.args.tokens_per_sec else 0
+        for i, word in enumerate(words):
+            if fail_midway and i == len(words) // 2:
+                self.llm.count('errors')
+                self._event({'error': {'code': 500, 'message': 'simulated stream failure'}})
+                return
+            self._event({'choices': [{'index': 0, 'delta': {'content': word if i == 0 else ' ' + word}}]})
+            time.sleep(delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.llm.count('streamed')
+
+    def _event(self, payload: dict):
+        self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+
+def serve(args) -> ThreadingHTTPServer:
+    MockHandler.llm = MockLLM(args)
+    server = ThreadingHTTPServer((args.host, args.port), MockHandler)
+    server.daemon_threads = True
+    return server
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', default='lognormal:600:0.5',
+                        help="time to first token: fixed:MS | uniform:MIN:MAX | normal:MEAN:SD | lognormal:MEDIAN:SIGMA")
+    parser.add_argument('--tokens-per-sec', type=float, default=60.0, help="generation speed after the first token (0 = instant)")
+    parser.add_argument('--rate-limit', type=float, default=0.0, help="requests/sec allowed before 429s (0 = unlimited)")
+    parser.add_argument('--burst', type=float, default=0.0, help="token bucket size (default: --rate-limit)")
+    parser.add_argument('--max-concurrency', type=int, default=0, help="in-flight requests before 429s (0 = unlimited)")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="share of admitted requests answered 429 anyway")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests failing with 500")
+    parser.add_argument('--stream-error-rate', type=float, default=0.0, help="share of streams failing half way")
+    parser.add_argument('--hang-rate', type=float, default=0.0, help="share of requests stalled by --hang-seconds")
+    parser.add_argument('--hang-seconds', type=float, default=60.0)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    server = serve(args)
+    print(f"🧪 Mock LLM on http://{args.host}:{args.port}/v1/chat/completions "
+          f"(latency {args.latency}, {args.tokens_per_sec:g} tok/s, rate limit {args.rate_limit or 'off'}, "
+          f"errors {args.error_rate:.0%})")
+    print(f"   Point the action server at it with BILLMART_LLM_BACKEND=mock")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"📊 {json.dumps(MockHandler.llm.stats)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# actions/nlu_data.py
+"""
+Readers for the Rasa training data (nlu.yml, enhanced_nlu.yml, rules.yml),
+shared by the benchmark, the embedder parity check and the intent rescue
+index.
+"""
+import os
+import re
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+NLU_FILES = ("nlu.yml", "enhanced_nlu.yml")
+RULE_FILES = ("rules.yml",)
+
+# [text](entity), [text](entity:value) and [text]{"entity": ..., "value": ...}
+ANNOTATION = re.compile(r"\[([^\]]+)\](?:\((\w+)(?::([^)]+))?\)|(\{[^}]*\}))")
+
+
+def load_yaml(data_dir: str, name: str) -> Dict[str, Any]:
+    path = os.path.join(data_dir, name)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def parse_example(example: str, synonyms: Dict[str, str]) -> Tuple[str, List[Dict[str, str]]]:
+    """'fees for [empcash](product_name)' -> ('fees for empcash', [{'entity': 'product_name', 'value': 'empcash'}])"""
+    entities = []
+
+    def plain(match):
+        text, entity, value, json_spec = match.groups()
+        if json_spec:
+            try:
+                spec = json.loads(json_spec)
+                entity, value = spec.get("entity"), spec.get("value")
+            except ValueError:
+                entity = None
+        if entity:
+            value = value or synonyms.get(text.lower(), text.lower())
+            entities.append({"entity": entity, "value": value})
+        return text
+
+    return ANNOTATION.sub(plain, example).strip(), entities
+
+
+def _example_lines(entry: Dict[str, Any]) -> List[str]:
+    """Examples of an NLU entry, whether written as a '- ...' block or a YAML list."""
+    examples = entry.get("examples") or ""
+    if isinstance(examples, list):
+        return [str(example).strip() for example in examples]
+    return [line.strip()[2:].strip() for line in examples.splitlines() if line.strip().startswith("- ")]
+
+
+def load_examples(data_dir: str) -> Dict[str, List[Tuple[str, List[Dict[str, str]]]]]:
+    """{intent: [(text, entities)]} from the NLU training files."""
+    entries = [entry for name in NLU_FILES for entry in load_yaml(data_dir, name).get("nlu", [])]
+    synonyms = {}
+    for entry in entries:
+        if "synonym" in entry:
+            for example in _example_lines(entry):
+                synonyms[example.lower()] = entry["synonym"]
+
+    examples: Dict[str, List[Tuple[str, List[Dict[str, str]]]]] = {}
+    for entry in entries:
+        if "intent" not in entry:
+            continue
+        for example in _example_lines(entry):
+            examples.setdefault(entry["intent"], []).append(parse_example(example, synonyms))
+    return examples
+
+
+def load_rule_actions(data_dir: str) -> Dict[str, str]:
+    """
+    {intent: action} for rules that answer an intent unconditionally: the
+    first action after the intent. Intents whose rules disagree are left out.
+    """
+    actions: Dict[str, Optional[str]] = {}
+    for name in RULE_FILES:
+        for rule in load_yaml(data_dir, name).get("rules", []):
+            if rule.get("condition") or rule.get("conversation_start"):
+                continue
+            steps = rule.get("steps", [])
+            if len(steps) < 2 or "intent" not in steps[0] or "action" not in steps[1]:
+                continue
+            intent, action = steps[0]["intent"], steps[1]["action"]
+            actions[intent] = action if actions.get(intent, action) == action else None
+    return {intent: action for intent, action in actions.items() if action}
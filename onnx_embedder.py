@@ -0,0 +1,174 @@
+# actions/onnx_embedder.py
+"""
+Build and check the int8 ONNX export used by the 'onnx' embedding backend.
+
+export: traces the SentenceTransformer's transformer to ONNX, applies
+        dynamic int8 weight quantization (onnxruntime.quantization) and
+        writes model_int8.onnx, tokenizer.json and embedder.json to
+        ONNX_EMBEDDING_DIR. Needs torch, sentence-transformers and onnx -
+        on the build machine only.
+parity: embeds the knowledge base chunks and the NLU examples with both
+        backends and compares them: per-text cosine between the PyTorch and
+        ONNX vectors, agreement of the top-k KB chunks retrieved for each
+        example, and single-query encode latency. Exits 1 if the export
+        drifts further than --min-cosine / --min-agreement allow.
+
+Usage (from the project root):
+    python -m actions.onnx_embedder export
+    python -m actions.onnx_embedder parity
+    BILLMART_EMBEDDING_BACKEND=onnx rasa run actions
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from typing import List
+
+import numpy as np
+
+from .fallback_config import EMBEDDING_MODEL, ONNX_EMBEDDING_DIR, KNOWLEDGE_FILES, NLU_DATA_DIR
+from .embedding_backends import OnnxBackend, SentenceTransformerBackend
+
+
+def export(model_name: str, out_dir: str, opset: int = 14, keep_fp32: bool = False):
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    st = SentenceTransformer(model_name, device='cpu')
+    transformer, pooling = st[0], st[1]
+    if not isinstance(pooling, models.Pooling) or not pooling.pooling_mode_mean_tokens:
+        raise ValueError(f"{model_name} does not use mean pooling; OnnxBackend only implements mean pooling")
+    tokenizer = transformer.tokenizer
+
+    class LastHiddenState(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(*inputs)[0]
+
+    sample = tokenizer(["What is BillMart supply chain finance?"], return_tensors='pt')
+    input_names = [n for n in ('input_ids', 'attention_mask', 'token_type_ids') if n in sample]
+    dynamic_axes = {n: {0: 'batch', 1: 'sequence'} for n in input_names + ['last_hidden_state']}
+
+    os.makedirs(out_dir, exist_ok=True)
+    fp32_path = os.path.join(out_dir, 'model_fp32.onnx')
+    int8_path = os.path.join(out_dir, OnnxBackend.MODEL_FILE)
+    print(f"🔄 Exporting {model_name} to {fp32_path}")
+    with torch.no_grad():
+        torch.onnx.export(
+            LastHiddenState(transformer.auto_model.eval()),
+            tuple(sample[n] for n in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset
+        )
+
+    print(f"🔄 Quantizing weights to int8: {int8_path}")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    if not keep_fp32:
+        os.remove(fp32_path)
+
+    tokenizer.save_pretrained(out_dir)
+    config = {
+        'model': model_name,
+        'max_length': st.max_seq_length,
+        'dimension': st.get_sentence_embedding_dimension(),
+        'normalize': any(isinstance(module, models.Normalize) for module in st),
+        'pad_id': tokenizer.pad_token_id,
+        'pad_token': tokenizer.pad_token,
+        'quantization': 'int8',
+    }
+    with open(os.path.join(out_dir, OnnxBackend.CONFIG_FILE), 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+    size_mb = os.path.getsize(int8_path) / 1e6
+    print(f"✅ ONNX embedder written to {out_dir} ({size_mb:.1f} MB)")
+
+
+def load_texts(data_dir: str):
+    """(KB chunk texts, NLU example texts)"""
+    from .kb_chunker import chunk_knowledge
+    from .nlu_data import load_examples
+
+    documents = []
+    for file in KNOWLEDGE_FILES:
+        try:
+            with open(file, 'r', encoding='utf-8') as f:
+                documents.extend(chunk.text for chunk in chunk_knowledge(json.load(f), file))
+        except FileNotFoundError:
+            print(f"⚠️ {file} not found, skipping...")
+    queries = sorted({text for examples in load_examples(data_dir).values() for text, _ in examples})
+    return documents, queries
+
+
+def _normalized(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def _single_query_ms(backend, queries: List[str], limit: int = 200) -> float:
+    """Median latency of encoding one query at a time, like a fallback turn"""
+    timings = []
+    for query in queries[:limit]:
+        started = time.perf_counter()
+        backend.encode([query])
+        timings.append((time.perf_counter() - started) * 1000)
+    return float(np.median(timings)) if timings else 0.0
+
+
+def parity(model_name: str, model_dir: str, data_dir: str, top_k: int, min_cosine: float, min_agreement: float) -> bool:
+    documents, queries = load_texts(data_dir)
+    print(f"📚 {len(documents)} KB chunks, {len(queries)} NLU examples")
+
+    reference = SentenceTransformerBackend(model_name)
+    candidate = OnnxBackend(model_name, model_dir)
+
+    ok = True
+    for label, texts in (('kb', documents), ('nlu', queries)):
+        cosines = np.sum(_normalized(reference.encode(texts)) * _normalized(candidate.encode(texts)), axis=1)
+        worst = texts[int(np.argmin(cosines))]
+        print(f"   {label:<4} cosine mean {cosines.mean():.4f}  min {cosines.min():.4f}  (worst: {worst[:60]!r})")
+        ok &= bool(cosines.min() >= min_cosine)
+
+    # Same KB chunks retrieved for each example?
+    k = min(top_k, len(documents))
+    rankings = []
+    for backend in (reference, candidate):
+        scores = _normalized(backend.encode(queries)) @ _normalized(backend.encode(documents)).T
+        rankings.append(np.argsort(-scores, axis=1)[:, :k])
+    top1 = float(np.mean(rankings[0][:, 0] == rankings[1][:, 0]))
+    overlap = float(np.mean([len(set(a) & set(b)) / k for a, b in zip(*rankings)]))
+    print(f"   retrieval top-1 agreement {top1:.3f}, top-{k} overlap {overlap:.3f}")
+    ok &= top1 >= min_agreement
+
+    print(f"   single-query encode: torch {_single_query_ms(reference, queries):.2f} ms, "
+          f"onnx int8 {_single_query_ms(candidate, queries):.2f} ms (median)")
+    print("✅ ONNX embedder matches the PyTorch model" if ok else "❌ ONNX embedder drifted from the PyTorch model")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=('export', 'parity'))
+    parser.add_argument('--model', default=EMBEDDING_MODEL)
+    parser.add_argument('--out-dir', default=ONNX_EMBEDDING_DIR, help="where the export is written / read")
+    parser.add_argument('--opset', type=int, default=14)
+    parser.add_argument('--keep-fp32', action='store_true', help="also keep the unquantized model_fp32.onnx")
+    parser.add_argument('--data-dir', default=NLU_DATA_DIR, help="directory with nlu.yml for the parity queries")
+    parser.add_argument('--top-k', type=int, default=3)
+    parser.add_argument('--min-cosine', type=float, default=0.98, help="lowest allowed per-text cosine")
+    parser.add_argument('--min-agreement', type=float, default=0.95, help="lowest allowed top-1 retrieval agreement")
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        export(args.model, args.out_dir, args.opset, args.keep_fp32)
+    elif not parity(args.model, args.out_dir, args.data_dir, args.top_k, args.min_cosine, args.min_agreement):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+# actions/prompt_builder.py
+"""
+Token-budgeted prompt context assembly shared by the fallback engines.
+
+Passages arrive ranked (best first). They are packed greedily into a token
+budget: near-duplicates of an already packed passage are skipped, a passage
+that does not fit is trimmed at a sentence boundary when enough budget is
+left (otherwise the next, possibly shorter, passage is tried). Token counts
+use the same cheap estimator as the knowledge chunker, so no tokenizer has
+to be loaded.
+"""
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+from .kb_chunker import estimate_tokens
+from .lexical_index import tokenize
+from .fallback_config import PROMPT_DEDUP_OVERLAP, PROMPT_MIN_TRIM_TOKENS
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class PackedContext:
+    """Result of packing: the passages used, in rank order, and token accounting."""
+    items: List[Tuple[int, str]] = field(default_factory=list)   # (index in input, text used)
+    tokens: int = 0
+    budget: int = 0
+    duplicates: int = 0
+    dropped: int = 0
+    trimmed: int = 0
+
+    @property
+    def texts(self) -> List[str]:
+        return [text for _, text in self.items]
+
+    @property
+    def indices(self) -> List[int]:
+        return [index for index, _ in self.items]
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Longest prefix of whole sentences within max_tokens (whole words if one sentence is too long)."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    kept, used = [], 0
+    for sentence in SENTENCE_SPLIT.split(text):
+        cost = estimate_tokens(sentence)
+        if used + cost > max_tokens:
+            break
+        kept.append(sentence)
+        used += cost
+    if kept:
+        return " ".join(kept)
+    words, used = [], 0
+    for word in text.split():
+        cost = estimate_tokens(word)
+        if used + cost > max_tokens:
+            break
+        words.append(word)
+        used += cost
+    return " ".join(words) + "..." if words else ""
+
+
+def _overlap(a: frozenset, b: frozenset) -> float:
+    """Jaccard similarity of two passages' term sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def pack_passages(passages: Sequence[str], budget: int, separator_tokens: int = 2) -> PackedContext:
+    """Greedily pack ranked passages into `budget` tokens, skipping near-duplicates."""
+    packed = PackedContext(budget=budget)
+    seen: List[frozenset] = []
+
+    for index, passage in enumerate(passages):
+        passage = (passage or "").strip()
+        if not passage:
+            continue
+        terms = frozenset(tokenize(passage))
+        if any(_overlap(terms, other) >= PROMPT_DEDUP_OVERLAP for other in seen):
+            packed.duplicates += 1
+            continue
+
+        remaining = budget - packed.tokens - (separator_tokens if packed.items else 0)
+        cost = estimate_tokens(passage)
+        if cost > remaining:
+            if remaining < PROMPT_MIN_TRIM_TOKENS and packed.items:
+                packed.dropped += 1
+                continue
+            passage = trim_to_tokens(passage, remaining)
+            if not passage:
+                packed.dropped += 1
+                continue
+            cost = estimate_tokens(passage)
+            packed.trimmed += 1
+
+        packed.tokens += cost + (separator_tokens if packed.items else 0)
+        packed.items.append((index, passage))
+        seen.append(terms)
+
+    return packed
+
+
+def count_message_tokens(messages: Sequence[Dict[str, str]]) -> int:
+    """Estimated prompt tokens for a chat message list (content plus a small per-message overhead)."""
+    return sum(estimate_tokens(m.get('content', '')) + 4 for m in messages)
+
+
+def log_usage(engine: str, packed: PackedContext, prompt_tokens: int):
+    logger.debug(f"🧮 [{engine}] context {packed.tokens}/{packed.budget} tokens, "
+                 f"{len(packed.items)} passages ({packed.duplicates} duplicate, {packed.dropped} dropped, "
+                 f"{packed.trimmed} trimmed), prompt ~{prompt_tokens} tokens")
@@ -0,0 +1,208 @@
+# actions/rate_limiter.py
+"""
+Rate-limit aware scheduling of LLM calls.
+
+Every call made through llm_client first reserves a slot from a token bucket
+that tracks the provider's quota (GCRA: requests are spaced 1/rate apart,
+with up to LLM_RATE_BURST let through back to back). Reservations are served
+in arrival order and waited for with asyncio.sleep, so a queued or
+backing-off conversation never holds a worker thread or blocks the others.
+
+Each request carries a deadline (the fallback turn's budget, see
+llm_deadline). If its slot - or a retry after a 429 - would land too late to
+get an answer before the deadline, LoadShedError is raised straight away and
+the engine answers extractively instead of waiting.
+
+The bucket adapts: a 429 halves the rate (down to LLM_MIN_RATE_RPS) and
+honours Retry-After; each success adds a little back up to LLM_RATE_LIMIT_RPS.
+429s for a burst of calls sent together arrive together, so the rate is
+halved at most once per send interval / call latency, not once per 429.
+Retries use full-jitter exponential backoff.
+"""
+import time
+import random
+import asyncio
+import threading
+import contextvars
+from typing import Any, Awaitable, Callable, Optional
+
+from .metrics import count_error, get_metrics
+from .fallback_config import (
+    LLM_RATE_LIMIT_RPS, LLM_RATE_BURST, LLM_MIN_RATE_RPS, LLM_MAX_ATTEMPTS,
+    LLM_BACKOFF_BASE_SECONDS, LLM_BACKOFF_CAP_SECONDS, LLM_DEADLINE_SECONDS
+)
+
+
+class LoadShedError(Exception):
+    """The LLM answer cannot arrive before the request's deadline."""
+
+
+# time.monotonic() by which the current request needs its LLM answer
+llm_deadline: contextvars.ContextVar = contextvars.ContextVar('llm_deadline', default=None)
+
+
+def set_llm_deadline(seconds: float):
+    """Give LLM calls made from the current context (and tasks it starts) `seconds` from now."""
+    return llm_deadline.set(time.monotonic() + seconds)
+
+
+def current_deadline() -> float:
+    deadline = llm_deadline.get()
+    return deadline if deadline is not None else time.monotonic() + LLM_DEADLINE_SECONDS
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True if the provider rejected the call with a 429 / rate limit."""
+    status = getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    if status is not None:
+        return status == 429
+    # SDK errors without a status code: fall back to the message
+    error_str = str(error).lower()
+    return 'rate limit' in error_str or '429' in error_str
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Retry-After the provider sent with a 429, if any"""
+    value = getattr(error, 'retry_after', None)
+    if value is None:
+        headers = getattr(error, 'headers', None) or getattr(getattr(error, 'response', None), 'headers', None) or {}
+        value = headers.get('retry-after') or headers.get('Retry-After')
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimitScheduler:
+    """Adaptive token bucket plus deadline-aware retry loop around LLM calls."""
+
+    def __init__(self, rate: float = LLM_RATE_LIMIT_RPS, burst: float = LLM_RATE_BURST,
+                 min_rate: float = LLM_MIN_RATE_RPS, max_attempts: int = LLM_MAX_ATTEMPTS,
+                 backoff_base: float = LLM_BACKOFF_BASE_SECONDS, backoff_cap: float = LLM_BACKOFF_CAP_SECONDS):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._lock = threading.Lock()
+        self._tat = 0.0               # GCRA theoretical arrival time of the next request
+        self._paused_until = 0.0      # Retry-After from the provider
+        self._latency = 1.0           # EWMA of successful call duration, seconds
+        self._last_decrease = float('-inf')
+        self.shed = 0
+        self.rate_limited = 0
+
+    # ----- bucket -----
+    def reserve(self, deadline: float) -> float:
+        """Claim the next send slot; returns its monotonic time, or raises LoadShedError if too late."""
+        with self._lock:
+            now = time.monotonic()
+            interval = 1.0 / self.rate
+            start = max(now, self._tat - (self.burst - 1) * interval, self._paused_until)
+            if start + self._latency > deadline:
+                self.shed += 1
+                count_error('llm_scheduler', 'shed')
+                raise LoadShedError(f"LLM slot in {start - now:.1f}s, deadline in {deadline - now:.1f}s")
+            self._tat = max(self._tat, start) + interval
+            return start
+
+    def on_success(self, duration: float):
+        with self._lock:
+            self._latency = 0.8 * self._latency + 0.2 * duration
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def on_rate_limited(self, error: Exception):
+        with self._lock:
+            self.rate_limited += 1
+            now = time.monotonic()
+            # One decrease per window: the other 429s of the same burst were sent at the old rate
+            if now - self._last_decrease >= max(1.0 / self.rate, self._latency):
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._last_decrease = now
+            retry_after = retry_after_seconds(error)
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+        count_error('llm_scheduler', 'rate_limited')
+
+    def backoff(self, attempt: int, deadline: float) -> float:
+        """Jittered delay before retry `attempt` (0-based); LoadShedError if no retry can make the deadline."""
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+        if attempt + 1 >= self.max_attempts or time.monotonic() + delay + self._latency > deadline:
+            with self._lock:
+                self.shed += 1
+            count_error('llm_scheduler', 'shed')
+            raise LoadShedError(f"rate limited, no retry fits the deadline (attempt {attempt + 1})")
+        return delay
+
+    # ----- calls -----
+    async def acquire(self, deadline: float):
+        delay = self.reserve(deadline) - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def acall(self, attempt: Callable[[float], Awaitable[Any]], deadline: Optional[float] = None) -> Any:
+        """
+        await attempt(seconds_left) under the quota, retrying 429s until the
+        deadline. Other errors propagate unchanged.
+        """
+        deadline = deadline or current_deadline()
+        for number in range(self.max_attempts):
+            await self.acquire(deadline)
+            started = time.monotonic()
+            try:
+                result = await attempt(deadline - started)
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                self.on_rate_limited(e)
+                await asyncio.sleep(self.backoff(number, deadline))
+                continue
+            self.on_success(time.monotonic() - started)
+            return result
+        raise LoadShedError("no attempts left")
+
+    def call(self, attempt: Callable[[float], Any], deadline: Optional[float] = None) -> Any:
+        """Blocking twin of acall for the synchronous code paths."""
+        deadline = deadline or current_deadline()
+        for number in range(self.max_attempts):
+            delay = self.reserve(deadline) - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            started = time.monotonic()
+            try:
+                result = attempt(deadline - started)
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                self.on_rate_limited(e)
+                time.sleep(self.backoff(number, deadline))
+                continue
+            self.on_success(time.monotonic() - started)
+            return result
+        raise LoadShedError("no attempts left")
+
+    def stats(self):
+        return {'rate': round(self.rate, 3), 'shed': self.shed, 'rate_limited': self.rate_limited}
+
+
+def _rate_collector(scheduler: RateLimitScheduler):
+    def collect():
+        return [('billmart_llm_rate_rps', {}, round(scheduler.rate, 3))]
+    return collect
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RateLimitScheduler:
+    """Return the process-wide LLM scheduler."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = RateLimitScheduler()
+                get_metrics().add_collector(_rate_collector(_scheduler))
+    return _scheduler
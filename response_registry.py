@@ -0,0 +1,112 @@
+# actions/response_registry.py
+"""
+Product answer registry for the action_provide_*_info actions.
+
+Copy lives in product_responses.json, not in code. The file is compiled once
+into an immutable (product, topic) -> message index plus a single alias
+table (so "Supply Chain Finance", "B-SCF" and "scf" all resolve to "scf").
+The file's mtime is checked at most every RESPONSE_RELOAD_CHECK_SECONDS; when
+it changes a new snapshot is built and swapped in, so editors can change
+copy without restarting the action server. A broken edit is reported and
+the previous snapshot keeps serving.
+"""
+import os
+import json
+import time
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from .fallback_config import RESPONSE_REGISTRY_FILE, RESPONSE_RELOAD_CHECK_SECONDS
+
+
+def normalize_product(name: str) -> str:
+    """'Short_Term  Loan' -> 'short term loan'"""
+    return " ".join(str(name).lower().replace('_', ' ').split())
+
+
+class ResponseSnapshot:
+    """One compiled, read-only version of the registry file."""
+
+    __slots__ = ('messages', 'aliases', 'missing_product', 'mtime')
+
+    def __init__(self, data: Dict[str, Any], mtime: float):
+        aliases: Dict[str, str] = {}
+        for product, names in data.get('aliases', {}).items():
+            aliases[normalize_product(product)] = product
+            for alias in names:
+                aliases[normalize_product(alias)] = product
+
+        messages: Dict[Tuple[str, str], str] = {}
+        missing: Dict[str, str] = {}
+        for topic, entry in data['topics'].items():
+            missing[topic] = entry['missing_product']
+            for product, text in entry['products'].items():
+                aliases.setdefault(normalize_product(product), product)
+                messages[(product, topic)] = "\n".join(text) if isinstance(text, list) else text
+
+        self.messages: Mapping[Tuple[str, str], str] = MappingProxyType(messages)
+        self.aliases: Mapping[str, str] = MappingProxyType(aliases)
+        self.missing_product: Mapping[str, str] = MappingProxyType(missing)
+        self.mtime = mtime
+
+    def resolve(self, product: Optional[str]) -> Optional[str]:
+        """Canonical product id for any known name/alias, else None."""
+        if not product:
+            return None
+        return self.aliases.get(normalize_product(product))
+
+    def get(self, product: Optional[str], topic: str) -> Optional[str]:
+        canonical = self.resolve(product)
+        return self.messages.get((canonical, topic)) if canonical else None
+
+
+class ResponseRegistry:
+    """Hot-reloading holder of the current ResponseSnapshot."""
+
+    def __init__(self, path: str = RESPONSE_REGISTRY_FILE, check_interval: float = RESPONSE_RELOAD_CHECK_SECONDS):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._snapshot = self._load()
+
+    def _load(self) -> ResponseSnapshot:
+        mtime = os.path.getmtime(self.path)
+        with open(self.path, 'r', encoding='utf-8') as f:
+            snapshot = ResponseSnapshot(json.load(f), mtime)
+        print(f"✅ Loaded {len(snapshot.messages)} product responses from {self.path}")
+        return snapshot
+
+    def snapshot(self) -> ResponseSnapshot:
+        """Current snapshot, reloading first if the file changed."""
+        now = time.monotonic()
+        if now >= self._next_check and self._lock.acquire(blocking=False):
+            try:
+                self._next_check = now + self.check_interval
+                if os.path.getmtime(self.path) != self._snapshot.mtime:
+                    self._snapshot = self._load()
+            except Exception as e:
+                print(f"❌ Keeping previous product responses, reload of {self.path} failed: {e}")
+            finally:
+                self._lock.release()
+        return self._snapshot
+
+    def message(self, product: Optional[str], topic: str) -> str:
+        """Prebuilt answer for (product, topic), or the topic's 'which product?' prompt."""
+        snapshot = self.snapshot()
+        return snapshot.get(product, topic) or snapshot.missing_product[topic]
+
+
+_registry: Optional[ResponseRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_response_registry() -> ResponseRegistry:
+    """Process-wide registry, loaded on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ResponseRegistry()
+    return _registry
@@ -0,0 +1,155 @@
+# actions/semantic_cache.py
+"""
+Semantic answer cache for the LLM fallback.
+
+Answers are stored per fallback mode together with the unit-normalized
+embedding of the query that produced them. A new query is served from cache
+when its cosine similarity to a stored query clears the threshold. Entries
+expire after a TTL, the cache is LRU-bounded, and everything is dropped when
+kb_reloader re-indexes changed knowledge files.
+
+The vectors live in one (max_entries, dim) matrix allocated on the first
+store; freed rows go back to a free list and are reused, so a lookup is a
+single matrix-vector product over the rows in use with nothing stacked or
+copied per turn. Expiry pops entries off a creation-ordered deque.
+"""
+import time
+import heapq
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple, Text
+
+import numpy as np
+
+from .embedding_service import normalize_text
+from .metrics import get_metrics, cache_stats_collector
+from .fallback_config import (
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_TTL_SECONDS,
+    SEMANTIC_CACHE_MAX_ENTRIES
+)
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str]   # (mode, normalized query)
+
+
+class SemanticResponseCache:
+    """Similarity-keyed, TTL + LRU bounded cache of fallback answers."""
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 ttl_seconds: float = SEMANTIC_CACHE_TTL_SECONDS,
+                 max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None       # row per slot, allocated on first store
+        self._mode_codes: Dict[str, int] = {}
+        self._clear()
+        self.hits = 0
+        self.misses = 0
+
+    def _clear(self):
+        self._slots: "OrderedDict[Key, int]" = OrderedDict()   # key -> row, least recently used first
+        self._free: List[int] = list(range(self.max_entries))  # heap: lowest free row first
+        self._expiry: Deque[Tuple[float, int, Key]] = deque()  # (created_at, row, key), oldest first
+        self._modes = np.full(self.max_entries, -1, dtype=np.int16)   # mode code per row, -1 = free
+        self._keys: List[Optional[Key]] = [None] * self.max_entries
+        self._messages: List[Optional[List[Text]]] = [None] * self.max_entries
+        self._created = [0.0] * self.max_entries
+        self._rows = 0   # rows [0, _rows) have been used
+
+    def lookup(self, mode: str, query: str, vector: np.ndarray) -> Optional[List[Text]]:
+        """Return cached messages for a semantically equivalent query, if any."""
+        vector = self._unit(vector)
+        with self._lock:
+            self._expire(time.time())
+            slot = self._slots.get((mode, normalize_text(query)))
+            code = self._mode_codes.get(mode)
+            if slot is None and code is not None and self._rows:
+                scores = self._matrix[:self._rows] @ vector
+                scores[self._modes[:self._rows] != code] = -1.0
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    slot = best
+
+            if slot is None:
+                self.misses += 1
+                return None
+
+            self._slots.move_to_end(self._keys[slot])
+            self.hits += 1
+            return list(self._messages[slot])
+
+    def store(self, mode: str, query: str, vector: np.ndarray, messages: List[Text]):
+        """Cache the messages produced for ``query`` under ``mode``."""
+        vector = self._unit(vector)
+        with self._lock:
+            key = (mode, normalize_text(query))
+            slot = self._slots.pop(key, None)
+            if slot is None:
+                if not self._free:
+                    self._release(next(iter(self._slots)))
+                slot = heapq.heappop(self._free)
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+
+            created = time.time()
+            self._matrix[slot] = vector
+            self._modes[slot] = self._mode_codes.setdefault(mode, len(self._mode_codes))
+            self._keys[slot] = key
+            self._messages[slot] = list(messages)
+            self._created[slot] = created
+            self._slots[key] = slot
+            self._expiry.append((created, slot, key))
+            self._rows = max(self._rows, slot + 1)
+
+    def invalidate(self):
+        """Drop every cached answer."""
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            'size': len(self._slots),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0
+        }
+
+    def _release(self, key: Key):
+        slot = self._slots.pop(key)
+        self._modes[slot] = -1
+        self._keys[slot] = self._messages[slot] = None
+        heapq.heappush(self._free, slot)
+
+    def _expire(self, now: float):
+        while self._expiry and now - self._expiry[0][0] > self.ttl_seconds:
+            created, slot, key = self._expiry.popleft()
+            # Skip records of entries evicted or stored again since
+            if self._slots.get(key) == slot and self._created[slot] == created:
+                self._release(key)
+
+    @staticmethod
+    def _unit(vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> SemanticResponseCache:
+    """Return the process-wide semantic answer cache."""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = SemanticResponseCache()
+                get_metrics().add_collector(cache_stats_collector('semantic_answer', _response_cache.stats))
+    return _response_cache
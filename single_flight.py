@@ -0,0 +1,132 @@
+# actions/single_flight.py
+"""
+Single-flight coalescing of identical in-flight fallback queries.
+
+When many users send the same question within seconds (FAQ buttons,
+campaigns), only the first caller for a (mode, normalized query) key starts
+the retrieval + LLM work; everyone who arrives while it is running awaits
+that same result. Streams are shared the same way: late joiners get the
+chunks produced so far, then follow live.
+
+The shared work runs as its own task, so a caller that times out or
+disconnects does not cancel it for the others. Nothing is kept once the
+work finishes - remembering answers is the semantic cache's job.
+"""
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from .embedding_service import normalize_text
+from .metrics import get_metrics, cache_stats_collector
+
+
+def flight_key(mode: str, query: str) -> tuple:
+    return (mode, normalize_text(query))
+
+
+class _SharedStream:
+    """Chunks of one stream as they arrive, readable by any number of callers."""
+
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+    async def publish(self, source: AsyncIterator[Any]):
+        try:
+            async for chunk in source:
+                self.chunks.append(chunk)
+                async with self.changed:
+                    self.changed.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            async with self.changed:
+                self.changed.notify_all()
+
+    async def read(self) -> AsyncIterator[Any]:
+        position = 0
+        while True:
+            if position < len(self.chunks):
+                position += 1
+                yield self.chunks[position - 1]
+            elif self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            else:
+                async with self.changed:
+                    await self.changed.wait_for(lambda: position < len(self.chunks) or self.done)
+
+
+class SingleFlight:
+    """Per-key sharing of in-flight coroutines and async streams."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._streams: Dict[Hashable, _SharedStream] = {}
+        self.hits = 0      # callers that joined work already in flight
+        self.misses = 0    # callers that had to start it
+
+    async def run(self, key: Hashable, start: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of start() for key, shared with every concurrent caller of the same key."""
+        loop = asyncio.get_running_loop()
+        task = self._calls.get(key)
+        if task is None or task.get_loop() is not loop:
+            self.misses += 1
+            task = loop.create_task(start())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(self._calls, key, done))
+        else:
+            self.hits += 1
+        # shield: one caller timing out must not cancel the work for the rest
+        return await asyncio.shield(task)
+
+    async def stream(self, key: Hashable, start: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Chunks of start() for key; concurrent callers of the same key share one stream."""
+        loop = asyncio.get_running_loop()
+        shared = self._streams.get(key)
+        if shared is None or shared.task.get_loop() is not loop:
+            self.misses += 1
+            shared = _SharedStream()
+            shared.task = loop.create_task(shared.publish(start()))
+            self._streams[key] = shared
+            shared.task.add_done_callback(lambda done: self._finished(self._streams, key, shared))
+        else:
+            self.hits += 1
+        async for chunk in shared.read():
+            yield chunk
+
+    @staticmethod
+    def _finished(registry: Dict[Hashable, Any], key: Hashable, entry: Any):
+        if registry.get(key) is entry:
+            del registry[key]
+        if isinstance(entry, asyncio.Task) and not entry.cancelled():
+            entry.exception()  # retrieved here so an unawaited failure isn't logged as lost
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            'in_flight': len(self._calls) + len(self._streams),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0
+        }
+
+
+_fallback_flights = None
+_fallback_flights_lock = threading.Lock()
+
+
+def get_fallback_flights() -> SingleFlight:
+    """Return the process-wide coalescer for fallback answers."""
+    global _fallback_flights
+    if _fallback_flights is None:
+        with _fallback_flights_lock:
+            if _fallback_flights is None:
+                _fallback_flights = SingleFlight()
+                get_metrics().add_collector(cache_stats_collector('fallback_inflight', _fallback_flights.stats))
+    return _fallback_flights
@@ -0,0 +1,66 @@
+# actions/stream_endpoint.py
+"""
+Streaming fallback route on the action server.
+
+Streamed answers are generated in the action server, like every other
+fallback answer, so they share its engines, LLM scheduler (rate limit and
+backoff), in-flight coalescing and semantic cache. streaming_channel (in the
+Rasa server) only relays them: when ActionLLMFallback hands a turn over with
+a "stream_fallback" message, the channel POSTs {"query": ..., "mode": ...}
+to STREAM_ENDPOINT_PATH and forwards the answer it gets back, one JSON line
+per chunk: {"text": ...}, or {"error": ...} if the answer failed.
+
+The route is attached to rasa_sdk's Sanic app through the action server's
+plugin hook. register_stream_endpoint() has to run while the actions package
+is imported, i.e. before the server builds its app; action_llm_fallback
+calls it.
+"""
+import sys
+import json
+import logging
+
+import pluggy
+from sanic import response
+
+from .fallback_config import STREAM_ENDPOINT_PATH
+from .metrics import count_error
+
+logger = logging.getLogger(__name__)
+
+hookimpl = pluggy.HookimplMarker("rasa_sdk")
+
+
+def _frame(data) -> str:
+    return json.dumps(data, ensure_ascii=False) + "\n"
+
+
+async def stream_fallback(request):
+    """POST {"query", "mode"} -> the fallback answer as newline-delimited JSON chunks"""
+    from .action_llm_fallback import ActionLLMFallback, astream_fallback
+    body = request.json or {}
+    query, mode = body.get('query'), body.get('mode')
+    if not query or mode not in ActionLLMFallback.HANDLERS:
+        return response.json({'error': 'query and a fallback mode are required'}, status=400)
+
+    stream = await request.respond(content_type='application/x-ndjson')
+    try:
+        async for chunk in astream_fallback(query, mode):
+            await stream.send(_frame({'text': chunk}))
+    except Exception as e:
+        count_error('streaming', e)
+        logger.error(f"❌ Streaming fallback error: {e}")
+        await stream.send(_frame({'error': str(e)}))
+    await stream.eof()
+
+
+@hookimpl
+def attach_sanic_app_extensions(app) -> None:
+    app.add_route(stream_fallback, STREAM_ENDPOINT_PATH, methods=['POST'], name='billmart_stream_fallback')
+
+
+def register_stream_endpoint():
+    """Have the action server serve STREAM_ENDPOINT_PATH (once per process)"""
+    from rasa_sdk.plugin import plugin_manager
+    manager = plugin_manager()
+    if manager.get_plugin(__name__) is None:
+        manager.register(sys.modules[__name__], name=__name__)
@@ -0,0 +1,107 @@
+# actions/streaming_channel.py
+"""
+Streaming REST channel for the web widget.
+
+Works like Rasa's REST channel with ?stream=true, but frames every bot
+message as a server-sent event. When ActionLLMFallback hands a turn over for
+streaming (a custom "stream_fallback" message), the answer is fetched from
+the action server's stream endpoint (stream_endpoint.py) and forwarded
+token-by-token, so the widget can render partial text. Nothing is generated
+in the Rasa server: the engines, LLM rate limit and answer cache all live in
+the action server.
+
+Register in credentials.yml as ``actions.streaming_channel.StreamingRestInput``;
+the widget posts to /webhooks/stream/webhook?stream=true.
+"""
+import json
+import asyncio
+import logging
+from asyncio import Queue
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Text
+
+import httpx
+from rasa.core.channels.channel import UserMessage
+from rasa.core.channels.rest import RestInput
+
+from .fallback_config import STREAM_CHANNEL_NAME, STREAM_ENDPOINT_URL, FALLBACK_TIMEOUT_SECONDS
+from .metrics import count_error
+
+logger = logging.getLogger(__name__)
+
+
+def sse_event(event: Text, data: Dict[Text, Any]) -> Text:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class StreamingRestInput(RestInput):
+    """REST input channel that streams LLM fallback answers as server-sent events."""
+
+    def __init__(self, stream_url: Text = STREAM_ENDPOINT_URL):
+        self.stream_url = stream_url
+        self._http: Optional[httpx.AsyncClient] = None
+
+    @classmethod
+    def name(cls) -> Text:
+        return STREAM_CHANNEL_NAME
+
+    @classmethod
+    def from_credentials(cls, credentials: Optional[Dict[Text, Any]]) -> "StreamingRestInput":
+        return cls((credentials or {}).get("stream_url") or STREAM_ENDPOINT_URL)
+
+    def stream_response(
+        self,
+        on_new_message: Callable[[UserMessage], Awaitable[None]],
+        text: Text,
+        sender_id: Text,
+        input_channel: Text,
+        metadata: Optional[Dict[Text, Any]],
+    ) -> Callable[[Any], Awaitable[None]]:
+        async def stream(resp: Any) -> None:
+            q: Queue = Queue()
+            task = asyncio.ensure_future(
+                self.on_message_wrapper(
+                    on_new_message, text, q, sender_id, input_channel, metadata
+                )
+            )
+            while True:
+                result = await q.get()
+                if result == "DONE":
+                    break
+                handoff = (result.get("custom") or {}).get("stream_fallback")
+                if handoff:
+                    await self._stream_fallback(resp, sender_id, handoff)
+                else:
+                    await resp.write(sse_event("message", result))
+            await task
+            await resp.write(sse_event("done", {"recipient_id": sender_id}))
+
+        return stream
+
+    async def _stream_fallback(self, resp: Any, sender_id: Text, handoff: Dict[Text, Any]) -> None:
+        """Forward the fallback answer as 'delta' events, then the full text as 'message'."""
+        parts = []
+        try:
+            async for chunk in self._fetch_stream(handoff):
+                parts.append(chunk)
+                await resp.write(sse_event("delta", {"recipient_id": sender_id, "text": chunk}))
+        except Exception as e:
+            count_error('streaming', e)
+            logger.error(f"❌ Streaming fallback error: {e}")
+            if not parts:
+                parts.append("I apologize, I'm experiencing technical difficulties. Please try rephrasing your question or contact BillMart support.")
+        await resp.write(sse_event("message", {"recipient_id": sender_id, "text": "".join(parts), "final": True}))
+
+    async def _fetch_stream(self, handoff: Dict[Text, Any]) -> AsyncIterator[Text]:
+        """Chunks of the answer the action server streams for the handed-over turn"""
+        if self._http is None:
+            # Pooled, so relaying an answer doesn't open a new connection to the action server
+            self._http = httpx.AsyncClient(timeout=httpx.Timeout(FALLBACK_TIMEOUT_SECONDS, connect=5))
+        async with self._http.stream("POST", self.stream_url, json=handoff) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                frame = json.loads(line)
+                if "error" in frame:
+                    raise RuntimeError(frame["error"])
+                yield frame["text"]
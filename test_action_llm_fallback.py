@@ -0,0 +1,137 @@
+# actions/test_action_llm_fallback.py
+"""
+Tests for ActionLLMFallback, run offline: a hashing embedder and a scripted
+LLM backend stand in for the model and the Sarvam API through the
+register_embedding_backend / register_backend extension points.
+
+    python -m pytest actions/test_action_llm_fallback.py
+"""
+import asyncio
+import hashlib
+from types import SimpleNamespace
+
+import numpy as np
+from rasa_sdk import Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+from . import action_llm_fallback, embedding_service, llm_client
+from .embedding_backends import EmbeddingBackend, register_embedding_backend
+from .llm_backends import LLMBackend, register_backend
+from .semantic_cache import get_response_cache
+
+ANSWER = ["LRD is ", "lease rental ", "discounting."]
+
+
+class _HashingBackend(EmbeddingBackend):
+    """Same text, same unit vector; different texts are far apart."""
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        vectors = np.stack([
+            np.frombuffer(hashlib.sha256(text.encode()).digest(), dtype=np.uint8).astype(np.float32) - 127.5
+            for text in texts
+        ])
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    @property
+    def dimension(self):
+        return 32
+
+
+class _ScriptedCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, messages, stream=False, **kwargs):
+        self.calls += 1
+        return self._chunks()
+
+    @staticmethod
+    async def _chunks():
+        for text in ANSWER:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class _ScriptedBackend(LLMBackend):
+    name = 'scripted'
+
+    def __init__(self):
+        self.completions = _ScriptedCompletions()
+
+    def create_client(self, http, timeout):
+        return SimpleNamespace(chat=SimpleNamespace(completions=self.completions))
+
+    def create_async_client(self, http, timeout):
+        return self.create_client(http, timeout)
+
+
+def _offline(monkeypatch) -> _ScriptedBackend:
+    register_embedding_backend('hashing', _HashingBackend)
+    monkeypatch.setattr(embedding_service, '_embedder', embedding_service.SharedEmbedder(backend='hashing'))
+    backend = _ScriptedBackend()
+    register_backend(backend.name, lambda: backend)
+    llm_client.set_backend(backend)
+    monkeypatch.setattr(action_llm_fallback, 'ACTIVE_FALLBACK', 'llm_only')
+    monkeypatch.setattr(action_llm_fallback, 'INTENT_RESCUE_ENABLED', False)
+    get_response_cache().invalidate()
+    return backend
+
+
+def _tracker(text: str, input_channel: str = 'stream', confidence: float = 0.3) -> Tracker:
+    parse_data = {'text': text, 'intent': {'name': 'nlu_fallback', 'confidence': confidence}, 'entities': []}
+    return Tracker(
+        'tester', {}, parse_data,
+        [{'event': 'user', 'text': text, 'parse_data': parse_data, 'input_channel': input_channel}],
+        False, None, {}, 'action_listen'
+    )
+
+
+def _run_action(tracker: Tracker) -> CollectingDispatcher:
+    dispatcher = CollectingDispatcher()
+    asyncio.run(action_llm_fallback.ActionLLMFallback().run(dispatcher, tracker, {}))
+    return dispatcher
+
+
+def test_streamed_answer_is_served_from_cache_next_time(monkeypatch):
+    backend = _offline(monkeypatch)
+    query = "what is LRD"
+
+    # First ask: a cache miss, handed over to the stream endpoint
+    dispatcher = _run_action(_tracker(query))
+    assert dispatcher.messages[0]['custom'] == {'stream_fallback': {'query': query, 'mode': 'llm_only'}}
+
+    async def stream():
+        return [chunk async for chunk in action_llm_fallback.astream_fallback(query, 'llm_only')]
+
+    assert "".join(asyncio.run(stream())) == "".join(ANSWER)
+    assert backend.completions.calls == 1
+
+    # Second ask: answered from the cache the stream filled, no LLM call
+    dispatcher = _run_action(_tracker(query))
+    assert [message['text'] for message in dispatcher.messages] == ["".join(ANSWER)]
+    assert backend.completions.calls == 1
+
+
+def _rescues_attempted(monkeypatch, **settings) -> list:
+    """Queries ActionLLMFallback tried to rescue to an intent, running with the given config"""
+    _offline(monkeypatch)
+    monkeypatch.setattr(action_llm_fallback, 'INTENT_RESCUE_ENABLED', True)
+    for name, value in settings.items():
+        monkeypatch.setattr(action_llm_fallback, name, value)
+    attempted = []
+
+    async def rescue(self, tracker, query, confidence):
+        attempted.append(query)
+        return None
+
+    monkeypatch.setattr(action_llm_fallback.ActionLLMFallback, '_rescue_intent', rescue)
+    dispatcher = _run_action(_tracker("how do i apply for gigcash", input_channel='rest'))
+    assert dispatcher.messages[0]['text'].startswith("I'm not sure about that")
+    return attempted
+
+
+def test_no_intent_rescue_when_fallback_disabled(monkeypatch):
+    assert _rescues_attempted(monkeypatch, FALLBACK_ENABLED=False) == []
+
+
+def test_no_intent_rescue_when_fallback_mode_is_none(monkeypatch):
+    assert _rescues_attempted(monkeypatch, ACTIVE_FALLBACK='none') == []
@@ -0,0 +1,142 @@
+# actions/vector_store.py
+"""
+Persistent, content-hashed embedding store for the RAG fallbacks.
+
+Document embeddings are kept on disk as a float32 .npy matrix plus a JSON
+manifest mapping each document's content hash to its row. On startup the
+matrix is memory-mapped, and only documents whose content changed since the
+last run are sent through the embedding model.
+
+Every rewrite goes to a new, uniquely named matrix file; the manifest names
+the matrix it describes and is replaced last, so readers (and a restart
+after a crash) see either the old pair or the new one, and workers saving
+at the same time never write to each other's files.
+"""
+import os
+import json
+import hashlib
+import tempfile
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of a document's content."""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingStore:
+    """On-disk embedding matrix keyed by document content hash."""
+
+    MATRIX_FILE = 'embeddings.npy'   # matrix of manifests written before they named theirs
+    MANIFEST_FILE = 'manifest.json'
+
+    def __init__(self, index_dir: str, model_name: str):
+        self.index_dir = index_dir
+        self.model_name = model_name
+        self.rows: Dict[str, int] = {}
+        self.matrix: Optional[np.ndarray] = None
+        self.matrix_file = self.MATRIX_FILE
+        self._load()
+
+    @property
+    def matrix_path(self) -> str:
+        return os.path.join(self.index_dir, self.matrix_file)
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.index_dir, self.MANIFEST_FILE)
+
+    def _load(self):
+        """Memory-map a previously saved index, if it matches the model."""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('model') != self.model_name:
+                print(f"⚠️ Embedding index built with {manifest.get('model')}, rebuilding for {self.model_name}")
+                return
+            self.matrix_file = manifest.get('matrix', self.MATRIX_FILE)
+            self.matrix = np.load(self.matrix_path, mmap_mode='r')
+            self.rows = manifest.get('rows', {})
+            print(f"✅ Loaded {len(self.rows)} cached embeddings from {self.index_dir}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Could not load embedding index from {self.index_dir}: {e}")
+            self.rows, self.matrix = {}, None
+
+    def embed(self, texts: List[str], encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Return embeddings for ``texts`` in order, calling ``encode`` only for
+        content not already in the store. Entries no longer referenced by
+        ``texts`` are dropped when the store is rewritten; an empty ``texts``
+        (e.g. no knowledge file could be read) leaves the store as it is.
+        """
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        hashes = [content_hash(t) for t in texts]
+
+        missing: Dict[str, str] = {}
+        for h, text in zip(hashes, texts):
+            if h not in self.rows and h not in missing:
+                missing[h] = text
+
+        stale = set(self.rows) - set(hashes)
+        if missing or stale:
+            new_vectors = None
+            if missing:
+                print(f"🔄 Embedding {len(missing)} new/changed documents ({len(texts) - len(missing)} cached)")
+                new_vectors = np.asarray(encode(list(missing.values())), dtype=np.float32)
+            self._save(list(missing), new_vectors, keep=set(hashes))
+
+        return np.asarray(self.matrix[[self.rows[h] for h in hashes]])
+
+    def _save(self, new_hashes: List[str], new_vectors: Optional[np.ndarray], keep: set):
+        """Rewrite the matrix with kept rows plus new vectors, atomically."""
+        kept = [h for h in self.rows if h in keep]
+        parts = []
+        if kept and self.matrix is not None:
+            parts.append(np.array(self.matrix[[self.rows[h] for h in kept]], dtype=np.float32))
+        if new_vectors is not None and len(new_vectors):
+            parts.append(new_vectors)
+
+        matrix = np.concatenate(parts) if parts else np.zeros((0, 0), dtype=np.float32)
+        rows = {h: i for i, h in enumerate(kept + new_hashes)}
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        matrix_path = self._write_new('embeddings-', '.npy', lambda f: np.save(f, matrix))
+        manifest = {'model': self.model_name, 'matrix': os.path.basename(matrix_path), 'rows': rows}
+        try:
+            manifest_path = self._write_new('manifest-', '.tmp', lambda f: f.write(json.dumps(manifest).encode('utf-8')))
+            try:
+                # The publishing step: until here readers get the previous manifest and matrix
+                os.replace(manifest_path, self.manifest_path)
+            except BaseException:
+                os.remove(manifest_path)
+                raise
+        except BaseException:
+            os.remove(matrix_path)
+            raise
+
+        previous = self.matrix_path
+        self.matrix_file = manifest['matrix']
+        self.rows = rows
+        self.matrix = np.load(self.matrix_path, mmap_mode='r')
+        try:
+            os.remove(previous)
+        except OSError:
+            pass  # already gone, or still mapped by another process (Windows)
+
+    def _write_new(self, prefix: str, suffix: str, write: Callable) -> str:
+        """Write a new uniquely named file in index_dir through write(f), flushed to disk; returns its path."""
+        fd, path = tempfile.mkstemp(prefix=prefix, suffix=suffix, dir=self.index_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            os.remove(path)
+            raise
+        return path